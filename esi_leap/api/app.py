@@ -15,6 +15,9 @@ from oslo_context import context
 import pecan
 from pecan import hooks
 
+from esi_leap.api.controllers import render
+from esi_leap.common import identity_map
+from esi_leap.common import policy
 import esi_leap.conf
 
 
@@ -25,9 +28,11 @@ class ContextHook(hooks.PecanHook):
     def before(self, state):
         ctx = context.RequestContext.from_environ(state.request.environ)
         state.request.context = ctx
+        identity_map.start()
 
     def after(self, state):
         state.request.context = None
+        identity_map.stop()
 
 
 def get_pecan_config():
@@ -49,12 +54,15 @@ def setup_app(config=None):
 
     pecan.configuration.set_config(dict(config), overwrite=True)
 
+    policy.init()
+
     app = pecan.make_app(
         config.app.root,
         hooks=lambda: [ContextHook()],
         debug=CONF.pecan.debug,
         static_root=config.app.static_root if CONF.pecan.debug else None,
         force_canonical=getattr(config.app, 'force_canonical', True),
+        custom_renderers=render.RENDERERS,
     )
 
     if CONF.pecan.auth_enable:
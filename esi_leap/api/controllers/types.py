@@ -13,6 +13,8 @@
 # Borrowed from Ironic
 
 import json
+from oslo_utils import strutils
+import wsme
 from wsme import types as wtypes
 
 
@@ -37,6 +39,27 @@ class JsonType(wtypes.UserType):
         return JsonType.validate(value)
 
 
+class BooleanType(wtypes.UserType):
+    """A simple boolean type."""
+
+    basetype = wtypes.text
+    name = 'boolean'
+
+    @staticmethod
+    def validate(value):
+        try:
+            return strutils.bool_from_string(value, strict=True)
+        except ValueError as e:
+            # raise Invalid to return 400 (BadRequest) in the API
+            raise wsme.exc.ClientSideError(str(e))
+
+    @staticmethod
+    def frombasetype(value):
+        if value is None:
+            return None
+        return BooleanType.validate(value)
+
+
 class Collection(wtypes.Base):
 
     @property
@@ -67,3 +90,4 @@ class Collection(wtypes.Base):
 
 
 jsontype = JsonType()
+boolean = BooleanType()
@@ -0,0 +1,108 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import pecan
+from pecan import rest
+import wsme
+from wsme import types as wtypes
+
+from esi_leap.api.controllers import base
+from esi_leap.api.controllers import render
+from esi_leap.api.controllers import types
+from esi_leap.api.controllers.v1 import utils
+from esi_leap.common import exception
+from esi_leap.common import freebusy
+from esi_leap.common import statuses
+from esi_leap.objects import offer as offer_obj
+from esi_leap.resource_objects import bulk_load_all
+
+FORMATS = ('bitmap', 'intervals')
+
+
+class Calendar(base.ESILEAPBase):
+
+    resource_type = wsme.wsattr(wtypes.text, readonly=True)
+    resource_uuid = wsme.wsattr(wtypes.text, readonly=True)
+    free = wsme.wsattr(types.jsontype, readonly=True)
+    busy = wsme.wsattr(types.jsontype, readonly=True)
+
+
+class CalendarCollection(types.Collection):
+    calendar = [Calendar]
+
+    def __init__(self, **kwargs):
+        self._type = 'calendar'
+
+
+class CalendarController(rest.RestController):
+
+    @render.collection_expose(CalendarCollection, datetime.datetime,
+                              datetime.datetime, int, wtypes.text,
+                              wtypes.text, wtypes.text)
+    def get_all(self, start_time=None, end_time=None, granularity=60,
+                resource_type=None, resource_class=None, format='bitmap'):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+        utils.policy_authorize('esi_leap:offer:get_all', cdict, cdict)
+
+        if format not in FORMATS:
+            raise exception.InvalidCalendarFormat(format=format)
+        step, buckets = utils.get_buckets('a calendar', start_time, end_time,
+                                          granularity)
+
+        filters = {'status': [statuses.AVAILABLE]}
+        if resource_type is not None:
+            filters['resource_type'] = resource_type
+        try:
+            utils.policy_authorize('esi_leap:offer:offer_admin', cdict, cdict)
+        except exception.HTTPForbidden:
+            filters['lessee_id'] = cdict['project_id']
+            utils.resolve_lessee_tree(filters)
+
+        class_filter = {}
+        if resource_class:
+            class_filter = utils.get_resource_class_filter(
+                resource_class, resource_type)[0]
+            filters['resources'] = class_filter
+
+        not_modified = utils.check_not_modified(
+            offer_obj.Offer.get_version(filters),
+            offer_obj.Offer.get_lease_version(filters))
+        if not_modified:
+            return not_modified
+
+        calendar = offer_obj.Offer.get_calendar(filters, start_time,
+                                                end_time)
+
+        # resources of types that cannot be searched by class
+        unchecked = [ident for ident in calendar
+                     if class_filter.get(ident[0], ()) is None]
+        if unchecked:
+            for ident, resource in bulk_load_all(unchecked).items():
+                if resource.get_resource_class(None) != resource_class:
+                    del calendar[ident]
+
+        items = []
+        for (r_type, r_uuid), (offers, leases) in sorted(calendar.items()):
+            free, busy = freebusy.timeline(offers, leases, start_time, step,
+                                           buckets)
+            if format == 'bitmap':
+                free = freebusy.to_bitmap(free)
+                busy = freebusy.to_bitmap(busy)
+            else:
+                free = freebusy.to_intervals(free, start_time, step)
+                busy = freebusy.to_intervals(busy, start_time, step)
+            items.append({'resource_type': r_type, 'resource_uuid': r_uuid,
+                          'free': free, 'busy': busy})
+
+        return render.collection(Calendar, 'calendar', items)
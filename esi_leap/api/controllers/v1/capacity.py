@@ -0,0 +1,79 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import pecan
+from pecan import rest
+import wsme
+from wsme import types as wtypes
+
+from esi_leap.api.controllers import base
+from esi_leap.api.controllers import render
+from esi_leap.api.controllers import types
+from esi_leap.api.controllers.v1 import utils
+from esi_leap.common import exception
+from esi_leap.common import statuses
+from esi_leap.objects import offer as offer_obj
+
+
+class Capacity(base.ESILEAPBase):
+
+    resource_class = wsme.wsattr(wtypes.text, readonly=True)
+    free = wsme.wsattr([int], readonly=True)
+
+
+class CapacityCollection(types.Collection):
+    capacity = [Capacity]
+
+    def __init__(self, **kwargs):
+        self._type = 'capacity'
+
+
+class CapacityController(rest.RestController):
+
+    @render.collection_expose(CapacityCollection, datetime.datetime,
+                              datetime.datetime, int, wtypes.text,
+                              wtypes.text)
+    def get_all(self, start_time=None, end_time=None, granularity=60,
+                resource_type=None, resource_class=None):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+        utils.policy_authorize('esi_leap:offer:get_all', cdict, cdict)
+
+        step = utils.get_buckets('a capacity forecast', start_time,
+                                 end_time, granularity)[0]
+
+        filters = {'status': [statuses.AVAILABLE]}
+        if resource_type is not None:
+            filters['resource_type'] = resource_type
+        try:
+            utils.policy_authorize('esi_leap:offer:offer_admin', cdict, cdict)
+        except exception.HTTPForbidden:
+            filters['lessee_id'] = cdict['project_id']
+            utils.resolve_lessee_tree(filters)
+        if resource_class:
+            filters['resources'] = utils.get_resource_class_filter(
+                resource_class, resource_type)[0]
+
+        versions = (offer_obj.Offer.get_version(filters),
+                    offer_obj.Offer.get_lease_version(filters))
+        not_modified = utils.check_not_modified(*versions)
+        if not_modified:
+            return not_modified
+
+        capacity = offer_obj.Offer.get_capacity(filters, start_time,
+                                                end_time, step,
+                                                resource_class, versions)
+
+        items = [{'resource_class': r_class, 'free': free}
+                 for r_class, free in sorted(capacity.items())]
+        return render.collection(Capacity, 'capacity', items)
@@ -15,9 +15,9 @@ import pecan
 from pecan import rest
 import wsme
 from wsme import types as wtypes
-import wsmeext.pecan as wsme_pecan
 
 from esi_leap.api.controllers import base
+from esi_leap.api.controllers import render
 from esi_leap.api.controllers import types
 from esi_leap.api.controllers.v1 import utils
 from esi_leap.common import exception
@@ -57,15 +57,19 @@ class EventCollection(types.Collection):
 
 class EventsController(rest.RestController):
 
-    @wsme_pecan.wsexpose(EventCollection, int, wtypes.text,
-                         datetime.datetime, wtypes.text, wtypes.text,
-                         wtypes.text, wtypes.text)
+    @render.collection_expose(EventCollection, int, wtypes.text,
+                              datetime.datetime, wtypes.text, wtypes.text,
+                              wtypes.text, wtypes.text, wtypes.text,
+                              types.boolean)
     def get_all(self, last_event_id=None, lessee_or_owner_id=None,
                 last_event_time=None, event_type=None,
-                resource_type=None, resource_uuid=None):
+                resource_type=None, resource_uuid=None, fields=None,
+                stream=None):
         request = pecan.request.context
         cdict = request.to_policy_values()
 
+        fields = utils.get_requested_fields(Event, (), fields)
+
         try:
             utils.policy_authorize('esi_leap:offer:offer_admin', cdict, cdict)
         except exception.HTTPForbidden:
@@ -95,19 +99,27 @@ class EventsController(rest.RestController):
             if v is None:
                 del filters[k]
 
+        if stream:
+            batches = event_obj.Event.get_all_batches(
+                filters, CONF.api.stream_batch_size, request)
+            return render.stream(Event, 'events', (
+                EventsController._get_dicts(events, fields)
+                for events in batches))
+
         events = event_obj.Event.get_all(filters, request)
-        event_collection = EventCollection()
-        event_collection.events = []
-        for event in events:
-            e = Event(id=event.id,
-                      event_type=event.event_type,
-                      event_time=event.event_time,
-                      object_type=event.object_type,
-                      object_uuid=event.object_uuid,
-                      resource_type=event.resource_type,
-                      resource_uuid=event.resource_uuid,
-                      lessee_id=event.lessee_id,
-                      owner_id=event.owner_id)
-            event_collection.events.append(e)
-
-        return event_collection
+        return render.collection(Event, 'events',
+                                 EventsController._get_dicts(events, fields))
+
+    @staticmethod
+    def _get_dicts(events, fields):
+        return [utils.filter_fields(
+            {'id': event.id,
+             'event_type': event.event_type,
+             'event_time': event.event_time,
+             'object_type': event.object_type,
+             'object_uuid': event.object_uuid,
+             'resource_type': event.resource_type,
+             'resource_uuid': event.resource_uuid,
+             'lessee_id': event.lessee_id,
+             'owner_id': event.owner_id}, fields)
+            for event in events]
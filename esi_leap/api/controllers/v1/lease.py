@@ -10,7 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import concurrent.futures
+import collections
 import datetime
 import http.client as http_client
 from oslo_utils import uuidutils
@@ -21,15 +21,18 @@ from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
 
 from esi_leap.api.controllers import base
+from esi_leap.api.controllers import render
 from esi_leap.api.controllers import types
 from esi_leap.api.controllers.v1 import utils
 from esi_leap.common import constants
 from esi_leap.common import exception
-from esi_leap.common import ironic
+from esi_leap.common import identity_map
 from esi_leap.common import keystone
 from esi_leap.common import statuses
 import esi_leap.conf
 from esi_leap.objects import lease as lease_obj
+from esi_leap.objects import offer as offer_obj
+from esi_leap.resource_objects import bulk_load_all
 from esi_leap.resource_objects import get_resource_object
 
 CONF = esi_leap.conf.CONF
@@ -57,14 +60,14 @@ class Lease(base.ESILEAPBase):
     purpose = wsme.wsattr(wtypes.text)
     offer_uuid = wsme.wsattr(wtypes.text, readonly=True)
     parent_lease_uuid = wsme.wsattr(wtypes.text, readonly=True)
+    group_id = wsme.wsattr(wtypes.text, readonly=True)
 
     def __init__(self, **kwargs):
         self.fields = lease_obj.Lease.fields
         for field in self.fields:
             setattr(self, field, kwargs.get(field, wtypes.Unset))
 
-        for attr in ('project', 'owner', 'resource', 'resource_class',
-                     'resource_properties'):
+        for attr in utils.LEASE_ADDED_FIELDS:
             setattr(self, attr, kwargs.get(attr, wtypes.Unset))
 
 
@@ -75,8 +78,39 @@ class LeaseCollection(types.Collection):
         self._type = 'leases'
 
 
+class LeaseGroup(base.ESILEAPBase):
+    """Leases to create together, either all of them or none.
+
+    The leases are made on the given offers, or on count offers of
+    resource_class that are free for the whole time range.
+    """
+
+    offer_uuids = [wtypes.text]
+    count = wsme.wsattr(int)
+    resource_class = wsme.wsattr(wtypes.text)
+    resource_type = wsme.wsattr(wtypes.text)
+    name = wsme.wsattr(wtypes.text)
+    purpose = wsme.wsattr(wtypes.text)
+    properties = {wtypes.text: types.jsontype}
+    start_time = wsme.wsattr(datetime.datetime)
+    end_time = wsme.wsattr(datetime.datetime)
+
+    def __init__(self, **kwargs):
+
+        # the values given to each lease of the group
+        self.fields = ('name', 'purpose', 'properties', 'start_time',
+                       'end_time')
+        for field in ('offer_uuids', 'count', 'resource_class',
+                      'resource_type') + self.fields:
+            setattr(self, field, kwargs.get(field, wtypes.Unset))
+
+
 class LeasesController(rest.RestController):
 
+    _custom_actions = {
+        'group': ['POST']
+    }
+
     @wsme_pecan.wsexpose(Lease, wtypes.text)
     def get_one(self, lease_id):
         request = pecan.request.context
@@ -84,18 +118,34 @@ class LeasesController(rest.RestController):
         lease = utils.check_lease_policy_and_retrieve(
             request, 'esi_leap:lease:get', lease_id)
 
-        return Lease(**utils.lease_get_dict_with_added_info(lease))
+        not_modified = utils.check_not_modified(
+            lease_obj.Lease.get_version({'uuid': lease.uuid}))
+        if not_modified:
+            return not_modified
+
+        node_list, project_list = utils.get_enrichment_lists(
+            None, [lease], utils.LEASE_PROJECT_FIELDS,
+            [(lease.resource_type, lease.resource_uuid)])
 
-    @wsme_pecan.wsexpose(LeaseCollection, wtypes.text,
-                         datetime.datetime, datetime.datetime, wtypes.text,
-                         wtypes.text, wtypes.text, wtypes.text,
-                         wtypes.text, wtypes.text, wtypes.text)
+        return Lease(**utils.lease_get_dict_with_added_info(
+            lease, project_list, node_list))
+
+    @render.collection_expose(LeaseCollection, wtypes.text,
+                              datetime.datetime, datetime.datetime,
+                              wtypes.text, wtypes.text, wtypes.text,
+                              wtypes.text, wtypes.text, wtypes.text,
+                              wtypes.text, wtypes.text, types.boolean,
+                              types.boolean, wtypes.text)
     def get_all(self, project_id=None, start_time=None, end_time=None,
                 status=None, offer_uuid=None, view=None, owner_id=None,
-                resource_type=None, resource_uuid=None, resource_class=None):
+                resource_type=None, resource_uuid=None, resource_class=None,
+                fields=None, detail=None, stream=None, group_id=None):
         request = pecan.request.context
         cdict = request.to_policy_values()
 
+        fields = utils.get_requested_fields(Lease, utils.LEASE_ADDED_FIELDS,
+                                            fields, detail)
+
         if project_id is not None:
             project_id = keystone.get_project_uuid_from_ident(project_id)
 
@@ -114,34 +164,31 @@ class LeasesController(rest.RestController):
             start_time=start_time, end_time=end_time,
             status=status, offer_uuid=offer_uuid, view=view,
             resource_type=resource_type, resource_uuid=resource_uuid)
+        if group_id is not None:
+            filters['group_id'] = group_id
 
-        lease_collection = LeaseCollection()
-        leases = lease_obj.Lease.get_all(filters, request)
+        resources = {}
+        check_class = None
+        if resource_class:
+            class_filter, resources = utils.get_resource_class_filter(
+                resource_class, resource_type)
+            filters['resources'] = class_filter
+            if None in class_filter.values():
+                check_class = resource_class
 
-        lease_collection.leases = []
+        not_modified = utils.check_not_modified(
+            lease_obj.Lease.get_version(filters))
+        if not_modified:
+            return not_modified
 
-        if len(leases) > 0:
-            project_list = None
-            node_list = None
+        if stream:
+            return render.stream(Lease, 'leases', LeasesController._stream(
+                filters, request, fields, resources, check_class))
 
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                f1 = executor.submit(ironic.get_node_list)
-                f2 = executor.submit(keystone.get_project_list)
-                node_list = f1.result()
-                project_list = f2.result()
+        leases = lease_obj.Lease.get_all(filters, request, read_only=True)
 
-            leases_with_added_info = [
-                Lease(**utils.lease_get_dict_with_added_info(l, project_list,
-                                                             node_list))
-                for l in leases]
-            if resource_class:
-                lease_collection.leases = [
-                    l for l in leases_with_added_info
-                    if l.resource_class == resource_class]
-            else:
-                lease_collection.leases = leases_with_added_info
-
-        return lease_collection
+        return render.collection(Lease, 'leases', LeasesController._get_dicts(
+            leases, fields, resources, check_class))
 
     @wsme_pecan.wsexpose(Lease, body=Lease, status_code=http_client.CREATED)
     def post(self, new_lease):
@@ -189,7 +236,114 @@ class LeasesController(rest.RestController):
 
         lease = lease_obj.Lease(**lease_dict)
         lease.create(request)
-        return Lease(**utils.lease_get_dict_with_added_info(lease))
+        return Lease(**utils.lease_get_dict_with_added_info(
+            lease, resource=resource))
+
+    @wsme_pecan.wsexpose(LeaseCollection, body=LeaseGroup,
+                         status_code=http_client.CREATED)
+    def group(self, new_group):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+
+        lease_dict = new_group.to_dict()
+        if 'start_time' not in lease_dict:
+            lease_dict['start_time'] = datetime.datetime.now()
+
+        if 'end_time' not in lease_dict:
+            lease_dict['end_time'] = lease_dict['start_time'] + \
+                datetime.timedelta(days=CONF.api.default_lease_time)
+        else:
+            utils.check_lease_length(cdict,
+                                     lease_dict['start_time'],
+                                     lease_dict['end_time'],
+                                     CONF.api.max_lease_time)
+
+        if new_group.offer_uuids:
+            offers = [utils.check_offer_policy_and_retrieve(
+                request, 'esi_leap:offer:claim', offer_uuid,
+                [statuses.AVAILABLE])
+                for offer_uuid in new_group.offer_uuids]
+        elif new_group.count and new_group.count > 0 and \
+                new_group.resource_class:
+            offers = LeasesController._find_group_offers(
+                cdict, new_group.count, new_group.resource_class,
+                new_group.resource_type or None,
+                lease_dict['start_time'], lease_dict['end_time'])
+            for offer in offers:
+                utils.check_offer_policy(cdict, 'esi_leap:offer:claim',
+                                         offer)
+        else:
+            raise exception.LeaseGroupEmpty()
+
+        group_id = uuidutils.generate_uuid()
+        leases = []
+        for offer in offers:
+            utils.check_offer_lessee(cdict, offer)
+            leases.append(lease_obj.Lease(
+                uuid=uuidutils.generate_uuid(),
+                project_id=request.project_id,
+                owner_id=offer.project_id,
+                offer_uuid=offer.uuid,
+                resource_type=offer.resource_type,
+                resource_uuid=offer.resource_uuid,
+                parent_lease_uuid=offer.parent_lease_uuid,
+                group_id=group_id,
+                **lease_dict))
+
+        lease_obj.Lease.create_group(leases, request)
+
+        node_list, project_list = utils.get_enrichment_lists(
+            None, leases, utils.LEASE_PROJECT_FIELDS,
+            [(l.resource_type, l.resource_uuid) for l in leases])
+
+        collection = LeaseCollection()
+        collection.leases = [
+            Lease(**utils.lease_get_dict_with_added_info(
+                l, project_list, node_list))
+            for l in leases]
+        return collection
+
+    @staticmethod
+    def _find_group_offers(cdict, count, resource_class, resource_type,
+                           start_time, end_time):
+        """Pick count offers of resource_class on distinct resources.
+
+        Only offers that are free from start_time to end_time and that the
+        project may lease are considered.
+
+        :raises: LeaseGroupNoOffers if there are not enough of them.
+        """
+        class_filter = utils.get_resource_class_filter(resource_class,
+                                                       resource_type)[0]
+        filters = {
+            'status': [statuses.AVAILABLE],
+            'resources': class_filter,
+            'available_start_time': start_time,
+            'available_end_time': end_time,
+        }
+        try:
+            utils.policy_authorize('esi_leap:offer:offer_admin', cdict, cdict)
+        except exception.HTTPForbidden:
+            filters['lessee_id'] = cdict['project_id']
+
+        offers = []
+        idents = set()
+        for offer in offer_obj.Offer.get_all(filters):
+            ident = (offer.resource_type, offer.resource_uuid)
+            if ident in idents:
+                continue
+            if (class_filter.get(offer.resource_type, ()) is None and
+                    offer.resource_object().get_resource_class() !=
+                    resource_class):
+                continue
+            idents.add(ident)
+            offers.append(offer)
+            if len(offers) == count:
+                return offers
+
+        raise exception.LeaseGroupNoOffers(
+            found=len(offers), count=count, resource_class=resource_class,
+            start_time=str(start_time), end_time=str(end_time))
 
     @wsme_pecan.wsexpose(Lease, wtypes.text, body={wtypes.text: wtypes.text})
     def patch(self, lease_uuid, patch=None):
@@ -220,6 +374,65 @@ class LeasesController(rest.RestController):
 
         lease.cancel(request)
 
+    @staticmethod
+    def _get_dicts(leases, fields, resources, resource_class=None):
+        """Return the response dicts of leases.
+
+        :param fields: the requested fields, or None for all of them.
+        :param resources: resources already loaded, keyed by
+            (resource_type, resource_uuid).
+        :param resource_class: if given, leave out leases whose resource
+            is of another class.
+        """
+        if not leases:
+            return []
+
+        added_fields = fields
+        if resource_class and fields is not None:
+            added_fields = fields | {'resource_class'}
+
+        missing = set()
+        if utils.wants_fields(added_fields, *utils.RESOURCE_FIELDS):
+            missing = set((l.resource_type, l.resource_uuid)
+                          for l in leases) - set(resources)
+
+        node_list, project_list = utils.get_enrichment_lists(
+            added_fields, leases, utils.LEASE_PROJECT_FIELDS, missing)
+
+        if missing:
+            resources = collections.ChainMap(
+                bulk_load_all(missing, node_list), resources)
+
+        leases_with_added_info = [
+            utils.lease_get_dict_with_added_info(
+                l, project_list, node_list,
+                resources.get((l.resource_type, l.resource_uuid)),
+                added_fields)
+            for l in leases]
+        if resource_class:
+            leases_with_added_info = [
+                l for l in leases_with_added_info
+                if l.get('resource_class') == resource_class]
+            if fields is not None and 'resource_class' not in fields:
+                for l in leases_with_added_info:
+                    del l['resource_class']
+        return leases_with_added_info
+
+    @staticmethod
+    def _stream(filters, context, fields, resources, resource_class=None):
+        """Yield the response dicts of the leases, one batch at a time.
+
+        The first batch is built during the request, the others after it
+        has returned, so each batch is built in a scope of its own.
+        """
+        for leases in lease_obj.Lease.get_all_batches(
+                filters, CONF.api.stream_batch_size, context,
+                read_only=True):
+            with identity_map.scope():
+                dicts = LeasesController._get_dicts(
+                    leases, fields, resources, resource_class)
+            yield dicts
+
     @staticmethod
     def _lease_get_all_authorize_filters(cdict,
                                          start_time=None, end_time=None,
@@ -10,8 +10,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import concurrent.futures
+import collections
 from datetime import datetime
+import functools
 import pecan
 from pecan import rest
 import wsme
@@ -20,6 +21,9 @@ import wsmeext.pecan as wsme_pecan
 
 from esi_leap.api.controllers import base
 from esi_leap.api.controllers import types
+from esi_leap.api.controllers.v1 import utils
+from esi_leap.common import exception
+from esi_leap.common import executor
 from esi_leap.common import ironic
 from esi_leap.common import keystone
 from esi_leap.common import statuses
@@ -56,6 +60,7 @@ class Node(base.ESILEAPBase):
 
 class NodeCollection(types.Collection):
     nodes = [Node]
+    next = wtypes.text
 
     def __init__(self, **kwargs):
         self._type = 'nodes'
@@ -64,45 +69,86 @@ class NodeCollection(types.Collection):
 
 class NodesController(rest.RestController):
 
-    @wsme_pecan.wsexpose(NodeCollection)
-    def get_all(self):
+    @wsme_pecan.wsexpose(NodeCollection, wtypes.text, wtypes.text,
+                         wtypes.text, wtypes.text, int, wtypes.text)
+    def get_all(self, resource_class=None, owner=None, lessee=None,
+                provision_state=None, limit=None, marker=None):
         context = pecan.request.context
 
-        nodes = None
-        project_list = None
+        if limit is not None and limit <= 0:
+            raise exception.InvalidLimit(limit=limit)
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            f1 = executor.submit(ironic.get_node_list, context)
-            f2 = executor.submit(keystone.get_project_list)
-            nodes = f1.result()
-            project_list = f2.result()
+        if owner is not None:
+            owner = keystone.get_project_uuid_from_ident(owner)
+
+        if lessee is not None:
+            lessee = keystone.get_project_uuid_from_ident(lessee)
+
+        filters = {
+            'resource_class': resource_class,
+            'owner': owner,
+            'lessee': lessee,
+            'provision_state': provision_state,
+            'limit': limit,
+            'marker': marker,
+        }
+
+        # unpack iterator to tuple so we can use 'del'
+        for k, v in tuple(filters.items()):
+            if v is None:
+                del filters[k]
+
+        nodes = executor.gather(
+            ('ironic', functools.partial(ironic.get_node_list, **filters),
+             context))[0]
 
         node_collection = NodeCollection()
 
+        if not nodes:
+            return node_collection
+
+        offer_filters = {'status': [statuses.AVAILABLE]}
+        lease_filters = {'status': [statuses.CREATED]}
+        # only ask for the offers and leases of the listed nodes when the
+        # node list is a subset of all nodes
+        if filters:
+            offer_filters['resource_uuids'] = [node.uuid for node in nodes]
+            lease_filters['resource_uuids'] = offer_filters['resource_uuids']
+
+        not_modified = utils.check_not_modified(
+            [(node.uuid, node.updated_at) for node in nodes],
+            offer_obj.Offer.get_version(offer_filters),
+            lease_obj.Lease.get_version(lease_filters))
+        if not_modified:
+            return not_modified
+
+        # the project list is only needed for a 200, so polls answered
+        # with a 304 do not reach Keystone
+        project_list = keystone.get_project_list()
         now = datetime.now()
 
-        offers = offer_obj.Offer.get_all({'status': [statuses.AVAILABLE]},
-                                         context)
+        node_offers = collections.defaultdict(list)
+        for offer in offer_obj.Offer.get_all(offer_filters, context,
+                                             read_only=True):
+            node_offers[offer.resource_uuid].append(offer)
 
-        leases = lease_obj.Lease.get_all({'status': [statuses.CREATED]},
-                                         context)
+        node_leases = collections.defaultdict(list)
+        for lease in lease_obj.Lease.get_all(lease_filters, context,
+                                             read_only=True):
+            node_leases[lease.resource_uuid].append(lease.uuid)
 
         for node in nodes:
             future_offers = []
             current_offer = None
 
-            node_offers = [offer for offer in offers
-                           if offer.resource_uuid == node.uuid]
-
-            for offer in node_offers:
+            for offer in node_offers.get(node.uuid, ()):
                 if offer.start_time > now:
                     future_offers.append(offer.uuid)
                 elif offer.end_time >= now:
                     current_offer = offer
             future_offers = ' '.join(future_offers)
 
-            f_lease_uuids = ''.join([lease.uuid for lease in leases
-                                     if lease.resource_uuid == node.uuid])
+            f_lease_uuids = ' '.join(node_leases.get(node.uuid, ()))
 
             n = Node(name=node.name, uuid=node.uuid,
                      provision_state=node.provision_state,
@@ -123,4 +169,10 @@ class NodesController(rest.RestController):
 
             node_collection.nodes.append(n)
 
+        if limit is not None:
+            filters.pop('limit')
+            filters.pop('marker', None)
+            node_collection.next = node_collection.get_next(
+                limit, url=pecan.request.host_url, **filters)
+
         return node_collection
@@ -10,7 +10,6 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import concurrent.futures
 import datetime
 import http.client as http_client
 from oslo_utils import uuidutils
@@ -21,16 +20,19 @@ from wsme import types as wtypes
 import wsmeext.pecan as wsme_pecan
 
 from esi_leap.api.controllers import base
+from esi_leap.api.controllers import render
 from esi_leap.api.controllers import types
 from esi_leap.api.controllers.v1 import lease
 from esi_leap.api.controllers.v1 import utils
 from esi_leap.common import exception
-from esi_leap.common import ironic
 from esi_leap.common import keystone
+from esi_leap.common import placement
 from esi_leap.common import statuses
 import esi_leap.conf
 from esi_leap.objects import lease as lease_obj
 from esi_leap.objects import offer as offer_obj
+from esi_leap.resource_objects import bulk_load_all
+from esi_leap.resource_objects import find_by_resource_class
 from esi_leap.resource_objects import get_resource_object
 
 CONF = esi_leap.conf.CONF
@@ -62,9 +64,7 @@ class Offer(base.ESILEAPBase):
         for field in self.fields:
             setattr(self, field, kwargs.get(field, wtypes.Unset))
 
-        for attr in ('availabilities', 'project', 'lessee',
-                     'resource', 'resource_class',
-                     'resource_properties'):
+        for attr in utils.OFFER_ADDED_FIELDS:
             setattr(self, attr, kwargs.get(attr, wtypes.Unset))
 
 
@@ -75,10 +75,160 @@ class OfferCollection(types.Collection):
         self._type = 'offers'
 
 
+class OfferBulk(base.ESILEAPBase):
+    """Offers to create, listed or selected by resource class.
+
+    The resources selected by resource_class are the ones owned by the
+    project, and are offered with the given lessee, times and properties.
+    """
+
+    offers = [Offer]
+    resource_type = wsme.wsattr(wtypes.text)
+    resource_class = wsme.wsattr(wtypes.text)
+    name = wsme.wsattr(wtypes.text)
+    lessee_id = wsme.wsattr(wtypes.text)
+    start_time = wsme.wsattr(datetime.datetime)
+    end_time = wsme.wsattr(datetime.datetime)
+    properties = {wtypes.text: types.jsontype}
+
+    def __init__(self, **kwargs):
+
+        # the values given to each offer selected by resource_class
+        self.fields = ('name', 'lessee_id', 'start_time', 'end_time',
+                       'properties')
+        for field in ('offers', 'resource_type', 'resource_class') + \
+                self.fields:
+            setattr(self, field, kwargs.get(field, wtypes.Unset))
+
+
+class OfferBulkError(base.ESILEAPBase):
+
+    resource_type = wsme.wsattr(wtypes.text)
+    resource_uuid = wsme.wsattr(wtypes.text)
+    message = wsme.wsattr(wtypes.text)
+
+
+class OfferBulkResult(base.ESILEAPBase):
+
+    offers = [Offer]
+    errors = [OfferBulkError]
+
+
+class OfferSearch(base.ESILEAPBase):
+    """Criteria for offers free over a time range.
+
+    properties maps property names to the value a resource must have, or
+    to a {"min": x, "max": y} range; traits lists the traits a resource
+    must all have.
+    """
+
+    start_time = wsme.wsattr(datetime.datetime, mandatory=True)
+    end_time = wsme.wsattr(datetime.datetime, mandatory=True)
+    resource_type = wsme.wsattr(wtypes.text)
+    resource_class = wsme.wsattr(wtypes.text)
+    properties = {wtypes.text: types.jsontype}
+    traits = [wtypes.text]
+
+
+class OfferSlotSearch(base.ESILEAPBase):
+    """Criteria for the earliest slots of duration minutes.
+
+    resource_type, resource_class, properties and traits select offers
+    as for OfferSearch. Slots start no earlier than not_before, which
+    defaults to now; at most limit slots are returned, one per resource.
+    """
+
+    duration = wsme.wsattr(int, mandatory=True)
+    not_before = wsme.wsattr(datetime.datetime)
+    limit = wsme.wsattr(int, default=10)
+    resource_type = wsme.wsattr(wtypes.text)
+    resource_class = wsme.wsattr(wtypes.text)
+    properties = {wtypes.text: types.jsontype}
+    traits = [wtypes.text]
+
+
+class OfferSlot(base.ESILEAPBase):
+
+    offer_uuid = wsme.wsattr(wtypes.text, readonly=True)
+    offer_name = wsme.wsattr(wtypes.text, readonly=True)
+    resource_type = wsme.wsattr(wtypes.text, readonly=True)
+    resource_uuid = wsme.wsattr(wtypes.text, readonly=True)
+    resource = wsme.wsattr(wtypes.text, readonly=True)
+    start_time = wsme.wsattr(datetime.datetime, readonly=True)
+    end_time = wsme.wsattr(datetime.datetime, readonly=True)
+
+
+class OfferSlotCollection(types.Collection):
+    slots = [OfferSlot]
+
+    def __init__(self, **kwargs):
+        self._type = 'slots'
+
+
+class OfferWindow(base.ESILEAPBase):
+
+    start_time = wsme.wsattr(datetime.datetime, mandatory=True)
+    end_time = wsme.wsattr(datetime.datetime, mandatory=True)
+
+
+class OfferCheck(base.ESILEAPBase):
+    """Windows to check against an offer.
+
+    Without an offer in the URL, the windows are checked against the
+    available offers on the resource given by resource_type and
+    resource_uuid.
+    """
+
+    resource_type = wsme.wsattr(wtypes.text)
+    resource_uuid = wsme.wsattr(wtypes.text)
+    windows = wsme.wsattr([OfferWindow], mandatory=True)
+
+
+class OfferWindowCheck(base.ESILEAPBase):
+
+    start_time = wsme.wsattr(datetime.datetime, readonly=True)
+    end_time = wsme.wsattr(datetime.datetime, readonly=True)
+    available = wsme.wsattr(bool, readonly=True)
+    offer_uuid = wsme.wsattr(wtypes.text, readonly=True)
+    lease_uuid = wsme.wsattr(wtypes.text, readonly=True)
+
+
+class OfferCheckCollection(types.Collection):
+    windows = [OfferWindowCheck]
+
+    def __init__(self, **kwargs):
+        self._type = 'windows'
+
+
+class OfferClaim(lease.Lease):
+    """A lease to create on an offer.
+
+    Without an offer in the URL, count offers are picked whose resources
+    have resource_type, resource_class, resource_properties and all the
+    traits, and that are free from start_time to end_time.
+    """
+
+    count = wsme.wsattr(int)
+    traits = [wtypes.text]
+
+    # the values given to the leases of a claim by criteria
+    _lease_fields = ('name', 'purpose', 'properties', 'start_time',
+                     'end_time')
+
+    def __init__(self, **kwargs):
+        super(OfferClaim, self).__init__(**kwargs)
+        self.count = kwargs.get('count', wtypes.Unset)
+        self.traits = kwargs.get('traits', wtypes.Unset)
+
+
 class OffersController(rest.RestController):
 
     _custom_actions = {
-        'claim': ['POST']
+        'bulk': ['POST'],
+        'check': ['POST'],
+        'claim': ['POST'],
+        'earliest': ['POST'],
+        'search': ['POST']
     }
 
     @wsme_pecan.wsexpose(Offer, wtypes.text)
@@ -90,23 +240,39 @@ class OffersController(rest.RestController):
             request, 'esi_leap:offer:get', offer_id)
         utils.check_offer_lessee(cdict, offer)
 
-        o = utils.offer_get_dict_with_added_info(offer)
+        # availabilities depend on the leases of the offer
+        not_modified = utils.check_not_modified(
+            offer_obj.Offer.get_version({'uuid': offer.uuid}),
+            lease_obj.Lease.get_version({'offer_uuid': offer.uuid}))
+        if not_modified:
+            return not_modified
+
+        node_list, project_list = utils.get_enrichment_lists(
+            None, [offer], utils.OFFER_PROJECT_FIELDS,
+            [(offer.resource_type, offer.resource_uuid)])
+
+        o = utils.offer_get_dict_with_added_info(offer, project_list,
+                                                 node_list)
 
         return Offer(**o)
 
-    @wsme_pecan.wsexpose(OfferCollection, wtypes.text, wtypes.text,
-                         wtypes.text, wtypes.text, datetime.datetime,
-                         datetime.datetime, datetime.datetime,
-                         datetime.datetime, wtypes.text)
+    @render.collection_expose(OfferCollection, wtypes.text, wtypes.text,
+                              wtypes.text, wtypes.text, datetime.datetime,
+                              datetime.datetime, datetime.datetime,
+                              datetime.datetime, wtypes.text, wtypes.text,
+                              types.boolean)
     def get_all(self, project_id=None, resource_type=None,
                 resource_class=None, resource_uuid=None,
                 start_time=None, end_time=None,
                 available_start_time=None, available_end_time=None,
-                status=None):
+                status=None, fields=None, detail=None):
         request = pecan.request.context
         cdict = request.to_policy_values()
         utils.policy_authorize('esi_leap:offer:get_all', cdict, cdict)
 
+        fields = utils.get_requested_fields(Offer, utils.OFFER_ADDED_FIELDS,
+                                            fields, detail)
+
         if project_id is not None:
             project_id = keystone.get_project_uuid_from_ident(project_id)
 
@@ -165,33 +331,58 @@ class OffersController(rest.RestController):
         for k, v in tuple(filters.items()):
             if v is None:
                 del filters[k]
+        utils.resolve_lessee_tree(filters)
+
+        resources = {}
+        check_class = False
+        if resource_class:
+            class_filter, resources = utils.get_resource_class_filter(
+                resource_class, resource_type)
+            filters['resources'] = class_filter
+            check_class = None in class_filter.values()
 
-        offer_collection = OfferCollection()
-        offers = offer_obj.Offer.get_all(filters, request)
+        # availabilities depend on the leases of the offers
+        not_modified = utils.check_not_modified(
+            offer_obj.Offer.get_version(filters),
+            offer_obj.Offer.get_lease_version(filters))
+        if not_modified:
+            return not_modified
 
-        offer_collection.offers = []
+        offers = offer_obj.Offer.get_all(filters, request, read_only=True)
+
+        offers_with_added_info = []
 
         if len(offers) > 0:
-            project_list = None
-            node_list = None
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                f1 = executor.submit(ironic.get_node_list)
-                f2 = executor.submit(keystone.get_project_list)
-                node_list = f1.result()
-                project_list = f2.result()
+            added_fields = fields
+            if check_class and fields is not None:
+                added_fields = fields | {'resource_class'}
+
+            missing = set()
+            if utils.wants_fields(added_fields, *utils.RESOURCE_FIELDS):
+                missing = set((o.resource_type, o.resource_uuid)
+                              for o in offers) - set(resources)
+
+            node_list, project_list = utils.get_enrichment_lists(
+                added_fields, offers, utils.OFFER_PROJECT_FIELDS, missing)
+
+            if missing:
+                resources.update(bulk_load_all(missing, node_list))
 
             offers_with_added_info = [
-                Offer(**utils.offer_get_dict_with_added_info(o, project_list,
-                                                             node_list))
+                utils.offer_get_dict_with_added_info(
+                    o, project_list, node_list,
+                    resources.get((o.resource_type, o.resource_uuid)),
+                    added_fields)
                 for o in offers]
-            if resource_class:
-                offer_collection.offers = [
+            if check_class:
+                offers_with_added_info = [
                     o for o in offers_with_added_info
-                    if o.resource_class == resource_class]
-            else:
-                offer_collection.offers = offers_with_added_info
+                    if o.get('resource_class') == resource_class]
+                if fields is not None and 'resource_class' not in fields:
+                    for o in offers_with_added_info:
+                        del o['resource_class']
 
-        return offer_collection
+        return render.collection(Offer, 'offers', offers_with_added_info)
 
     @wsme_pecan.wsexpose(Offer, body=Offer, status_code=http_client.CREATED)
     def post(self, new_offer):
@@ -240,6 +431,307 @@ class OffersController(rest.RestController):
         o.create()
         return Offer(**utils.offer_get_dict_with_added_info(o))
 
+    @staticmethod
+    def _select_resources(new_offers, project_id):
+        """Find the resources of new_offers.resource_class owned by project_id.
+
+        :returns: dict mapping (resource_type, uuid) to the resource object.
+        """
+        resource_type = (new_offers.resource_type or
+                         CONF.api.default_resource_type)
+        found = find_by_resource_class(new_offers.resource_class,
+                                       [resource_type])[resource_type]
+        if found is None:
+            raise exception.ResourceClassNotSearchable(
+                resource_type=resource_type)
+        return dict(((resource_type, uuid), resource)
+                    for uuid, resource in found.items()
+                    if resource.get_owner_project_id() == project_id)
+
+    @wsme_pecan.wsexpose(OfferBulkResult, body=OfferBulk,
+                         status_code=http_client.CREATED)
+    def bulk(self, new_offers):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+        utils.policy_authorize('esi_leap:offer:create', cdict, cdict)
+
+        offer_dicts = [o.to_dict() for o in new_offers.offers or ()]
+        for o in offer_dicts:
+            o.setdefault('resource_type', CONF.api.default_resource_type)
+        # resources given by uuid are loaded together
+        resources = bulk_load_all(
+            (o['resource_type'], o['resource_uuid']) for o in offer_dicts
+            if uuidutils.is_uuid_like(o['resource_uuid']))
+
+        if new_offers.resource_class:
+            selected = self._select_resources(new_offers, request.project_id)
+            resources.update(selected)
+            for resource_type, resource_uuid in selected:
+                o = new_offers.to_dict()
+                o['resource_type'] = resource_type
+                o['resource_uuid'] = resource_uuid
+                offer_dicts.append(o)
+
+        if not offer_dicts:
+            raise exception.OfferBulkEmpty()
+
+        now = datetime.datetime.now()
+        lessees = {}
+        values_list = []
+        errors = []
+        for offer_dict in offer_dicts:
+            try:
+                ident = (offer_dict['resource_type'],
+                         offer_dict['resource_uuid'])
+                resource = resources.get(ident) or get_resource_object(*ident)
+                offer_dict['resource_uuid'] = resource.get_uuid()
+                resources[(resource.resource_type,
+                           resource.get_uuid())] = resource
+
+                offer_dict.setdefault('start_time', now)
+                offer_dict.setdefault('end_time', datetime.datetime.max)
+                if offer_dict['start_time'] >= offer_dict['end_time']:
+                    raise exception.InvalidTimeRange(
+                        resource='an offer',
+                        start_time=str(offer_dict['start_time']),
+                        end_time=str(offer_dict['end_time']))
+
+                # offers on leased resources are created one at a time
+                utils.check_resource_admin(cdict, resource,
+                                           request.project_id)
+
+                lessee = offer_dict.get('lessee_id')
+                if lessee is not None:
+                    if lessee not in lessees:
+                        lessees[lessee] = \
+                            keystone.get_project_uuid_from_ident(lessee)
+                    offer_dict['lessee_id'] = lessees[lessee]
+            except exception.ESILeapException as e:
+                errors.append(OfferBulkError(
+                    resource_type=offer_dict['resource_type'],
+                    resource_uuid=offer_dict['resource_uuid'],
+                    message=e.message))
+                continue
+
+            offer_dict['project_id'] = request.project_id
+            offer_dict['uuid'] = uuidutils.generate_uuid()
+            values_list.append(offer_dict)
+
+        offers, conflicts = offer_obj.Offer.create_bulk(values_list, request)
+
+        for values in conflicts:
+            errors.append(OfferBulkError(
+                resource_type=values['resource_type'],
+                resource_uuid=values['resource_uuid'],
+                message=exception.ResourceTimeConflict(
+                    resource_type=values['resource_type'],
+                    resource_uuid=values['resource_uuid']).message))
+
+        # new offers have no leases, so their availabilities would only
+        # repeat their times; leave them out rather than query for them
+        fields = set(render.attribute_names(Offer)) - {'availabilities'}
+        node_list, project_list = utils.get_enrichment_lists(
+            fields, offers, utils.OFFER_PROJECT_FIELDS)
+
+        result = OfferBulkResult(
+            offers=[Offer(**utils.offer_get_dict_with_added_info(
+                o, project_list, node_list,
+                resources[(o.resource_type, o.resource_uuid)], fields))
+                for o in offers],
+            errors=errors)
+        if errors:
+            # some offers were not created: report each outcome
+            return wsme.api.Response(result,
+                                     status_code=http_client.MULTI_STATUS)
+        return result
+
+    @wsme_pecan.wsexpose(OfferCollection, body=OfferSearch)
+    def search(self, criteria):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+        utils.policy_authorize('esi_leap:offer:get_all', cdict, cdict)
+
+        if criteria.end_time <= criteria.start_time:
+            raise exception.InvalidAvailabilityAPICommand(
+                a_start=str(criteria.start_time),
+                a_end=str(criteria.end_time))
+        properties = criteria.properties or None
+        utils.check_property_filters(properties)
+
+        matches, node_list, project_list = self._match_offers(
+            request, criteria.start_time, criteria.end_time,
+            criteria.resource_type, criteria.resource_class, properties,
+            criteria.traits, utils.OFFER_PROJECT_FIELDS)
+
+        collection = OfferCollection()
+        collection.offers = [
+            Offer(**utils.offer_get_dict_with_added_info(
+                o, project_list, node_list, resource))
+            for o, resource in matches]
+        return collection
+
+    @wsme_pecan.wsexpose(OfferCheckCollection, wtypes.text, body=OfferCheck)
+    def check(self, offer_id=None, offer_check=None):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+
+        if offer_check is None:
+            raise exception.OfferCheckNoWindows()
+
+        if offer_id is not None:
+            offer = utils.check_offer_policy_and_retrieve(
+                request, 'esi_leap:offer:get', offer_id)
+            utils.check_offer_lessee(cdict, offer)
+            offers = [offer] if offer.status == statuses.AVAILABLE else []
+        elif offer_check.resource_type and offer_check.resource_uuid:
+            utils.policy_authorize('esi_leap:offer:get_all', cdict, cdict)
+            filters = {
+                'status': [statuses.AVAILABLE],
+                'resource_type': offer_check.resource_type,
+                'resource_uuid': offer_check.resource_uuid,
+            }
+            try:
+                utils.policy_authorize('esi_leap:offer:offer_admin',
+                                       cdict, cdict)
+            except exception.HTTPForbidden:
+                filters['lessee_id'] = cdict['project_id']
+            offers = offer_obj.Offer.get_all(filters, request,
+                                             read_only=True)
+        else:
+            raise exception.OfferCheckNoTarget()
+
+        if len(offer_check.windows) > CONF.api.max_limit:
+            raise exception.OfferCheckTooManyWindows(
+                max_windows=CONF.api.max_limit,
+                windows=len(offer_check.windows))
+        windows = []
+        for window in offer_check.windows:
+            if window.start_time >= window.end_time:
+                raise exception.InvalidWindow(
+                    start_time=str(window.start_time),
+                    end_time=str(window.end_time))
+            windows.append((window.start_time, window.end_time))
+
+        checks = offer_obj.Offer.check_windows(offers, windows)
+
+        collection = OfferCheckCollection()
+        collection.windows = []
+        for i, (start_time, end_time) in enumerate(windows):
+            result = OfferWindowCheck(start_time=start_time,
+                                      end_time=end_time, available=False)
+            # an offer taking the window, or else one blocked by a lease
+            for o in offers:
+                available, blocking = checks[o.uuid][i]
+                if available:
+                    result.available = True
+                    result.offer_uuid = o.uuid
+                    result.lease_uuid = wtypes.Unset
+                    break
+                if blocking is not None and not result.lease_uuid:
+                    result.offer_uuid = o.uuid
+                    result.lease_uuid = blocking.uuid
+            collection.windows.append(result)
+        return collection
+
+    @wsme_pecan.wsexpose(OfferSlotCollection, body=OfferSlotSearch)
+    def earliest(self, criteria):
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+        utils.policy_authorize('esi_leap:offer:get_all', cdict, cdict)
+
+        if criteria.duration <= 0:
+            raise exception.InvalidDuration(duration=criteria.duration)
+        if criteria.limit <= 0:
+            raise exception.InvalidLimit(limit=criteria.limit)
+        not_before = criteria.not_before or datetime.datetime.now()
+        properties = criteria.properties or None
+        utils.check_property_filters(properties)
+
+        matches, node_list, _ = self._match_offers(
+            request, not_before, None, criteria.resource_type,
+            criteria.resource_class, properties, criteria.traits, {})
+        matched = dict((o.uuid, resource) for o, resource in matches)
+        slots = placement.earliest_slots(
+            [o for o, resource in matches],
+            offer_obj.Offer.get_conflict_times_bulk(list(matched)),
+            datetime.timedelta(minutes=criteria.duration), not_before)
+
+        collection = OfferSlotCollection()
+        collection.slots = []
+        resources = set()
+        for o, start_time, end_time in slots:
+            ident = (o.resource_type, o.resource_uuid)
+            if ident in resources:
+                continue
+            resources.add(ident)
+            collection.slots.append(OfferSlot(
+                offer_uuid=o.uuid, offer_name=o.name,
+                resource_type=o.resource_type,
+                resource_uuid=o.resource_uuid,
+                resource=matched[o.uuid].get_name(node_list),
+                start_time=start_time, end_time=end_time))
+            if len(collection.slots) == criteria.limit:
+                break
+        return collection
+
+    @staticmethod
+    def _match_offers(request, start_time, end_time, resource_type,
+                      resource_class, properties, traits, project_fields):
+        """Find the available offers free from start_time to end_time.
+
+        Without end_time, offers are not filtered by time.
+
+        Offers are kept if their resource has resource_class, the given
+        properties and all the traits, and if the project may lease them.
+
+        :param project_fields: the project fields of the offers that will
+            be filled in, as for utils.get_enrichment_lists.
+        :returns: (matches, node_list, project_list); matches is a list of
+            (offer, resource) pairs.
+        """
+        cdict = request.to_policy_values()
+        filters = {'status': [statuses.AVAILABLE]}
+        if end_time is not None:
+            filters['available_start_time'] = start_time
+            filters['available_end_time'] = end_time
+        if resource_type:
+            filters['resource_type'] = resource_type
+        try:
+            utils.policy_authorize('esi_leap:offer:offer_admin', cdict, cdict)
+        except exception.HTTPForbidden:
+            filters['lessee_id'] = cdict['project_id']
+
+        resources = {}
+        class_filter = {}
+        if resource_class:
+            class_filter, resources = utils.get_resource_class_filter(
+                resource_class, resource_type or None)
+            filters['resources'] = class_filter
+
+        offers = offer_obj.Offer.get_all(filters, request, read_only=True)
+        if not offers:
+            return [], [], []
+
+        missing = set((o.resource_type, o.resource_uuid)
+                      for o in offers) - set(resources)
+        node_list, project_list = utils.get_enrichment_lists(
+            None, offers, project_fields, missing)
+        if missing:
+            resources.update(bulk_load_all(missing, node_list))
+
+        matches = []
+        for o in offers:
+            resource = resources[(o.resource_type, o.resource_uuid)]
+            if (class_filter.get(o.resource_type, ()) is None and
+                    resource.get_resource_class(node_list) !=
+                    resource_class):
+                continue
+            if ((properties or traits) and not utils.resource_matches(
+                    resource.get_properties(node_list), properties, traits)):
+                continue
+            matches.append((o, resource))
+        return matches, node_list, project_list
+
     @wsme_pecan.wsexpose(Offer, wtypes.text)
     def delete(self, offer_id):
         request = pecan.request.context
@@ -249,6 +741,14 @@ class OffersController(rest.RestController):
             statuses.OFFER_CAN_DELETE)
         offer.cancel()
 
+    def _handle_post(self, method, remainder, request=None):
+        # POST /v1/offers/claim picks the offers itself, while
+        # POST /v1/offers/<uuid_or_name>/claim leases the given one
+        if list(remainder) == ['claim']:
+            return self._find_controller('claim_matching'), []
+        return super(OffersController, self)._handle_post(
+            method, remainder, request)
+
     @wsme_pecan.wsexpose(lease.Lease, wtypes.text, body=lease.Lease,
                          status_code=http_client.CREATED)
     def claim(self, offer_uuid, new_lease):
@@ -284,3 +784,81 @@ class OffersController(rest.RestController):
         new_lease = lease_obj.Lease(**lease_dict)
         new_lease.create(request)
         return lease.Lease(**utils.lease_get_dict_with_added_info(new_lease))
+
+    @wsme_pecan.wsexpose(lease.LeaseCollection, body=OfferClaim,
+                         status_code=http_client.CREATED)
+    def claim_matching(self, new_claim):
+        """Lease count offers matching the criteria of new_claim."""
+        request = pecan.request.context
+        cdict = request.to_policy_values()
+
+        lease_dict = dict((k, v) for k, v in new_claim.to_dict().items()
+                          if k in OfferClaim._lease_fields)
+        if 'start_time' not in lease_dict:
+            lease_dict['start_time'] = datetime.datetime.now()
+        if 'end_time' not in lease_dict:
+            lease_dict['end_time'] = lease_dict['start_time'] + \
+                datetime.timedelta(days=CONF.api.default_lease_time)
+        else:
+            utils.check_lease_length(cdict,
+                                     lease_dict['start_time'],
+                                     lease_dict['end_time'],
+                                     CONF.api.max_lease_time)
+        if lease_dict['start_time'] >= lease_dict['end_time']:
+            raise exception.InvalidTimeRange(
+                resource='a lease',
+                start_time=str(lease_dict['start_time']),
+                end_time=str(lease_dict['end_time']))
+
+        count = 1 if new_claim.count is wtypes.Unset else new_claim.count
+        if count < 1:
+            raise exception.OfferClaimInvalidCount(count=count)
+        properties = new_claim.resource_properties or None
+        utils.check_property_filters(properties)
+
+        matches, node_list, _ = self._match_offers(
+            request, lease_dict['start_time'], lease_dict['end_time'],
+            new_claim.resource_type, new_claim.resource_class, properties,
+            new_claim.traits, {})
+
+        matched = dict((o.uuid, resource) for o, resource in matches)
+        offers = placement.best_fit(
+            [o for o, resource in matches],
+            offer_obj.Offer.get_conflict_times_bulk(list(matched)),
+            lease_dict['start_time'], lease_dict['end_time'])
+
+        group_id = uuidutils.generate_uuid() if count > 1 else None
+        resources = {}
+        candidates = []
+        for offer in offers:
+            ident = (offer.resource_type, offer.resource_uuid)
+            if ident in resources:
+                continue
+            resource = matched[offer.uuid]
+            try:
+                utils.check_offer_policy(cdict, 'esi_leap:offer:claim', offer)
+            except exception.HTTPResourceForbidden:
+                continue
+            resources[ident] = resource
+            candidates.append(lease_obj.Lease(
+                uuid=uuidutils.generate_uuid(),
+                project_id=request.project_id,
+                owner_id=offer.project_id,
+                offer_uuid=offer.uuid,
+                resource_type=offer.resource_type,
+                resource_uuid=offer.resource_uuid,
+                parent_lease_uuid=offer.parent_lease_uuid,
+                group_id=group_id,
+                **lease_dict))
+
+        leases = lease_obj.Lease.claim_first(candidates, count, request)
+
+        _, project_list = utils.get_enrichment_lists(
+            None, leases, utils.LEASE_PROJECT_FIELDS)
+        collection = lease.LeaseCollection()
+        collection.leases = [
+            lease.Lease(**utils.lease_get_dict_with_added_info(
+                l, project_list, node_list,
+                resources[(l.resource_type, l.resource_uuid)]))
+            for l in leases]
+        return collection
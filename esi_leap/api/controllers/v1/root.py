@@ -14,6 +14,8 @@ from oslo_serialization import jsonutils
 import pecan
 from pecan import rest
 
+from esi_leap.api.controllers.v1 import calendar
+from esi_leap.api.controllers.v1 import capacity
 from esi_leap.api.controllers.v1 import event
 from esi_leap.api.controllers.v1 import lease
 from esi_leap.api.controllers.v1 import node
@@ -26,6 +28,8 @@ class Controller(rest.RestController):
     offers = offer.OffersController()
     nodes = node.NodesController()
     events = event.EventsController()
+    calendar = calendar.CalendarController()
+    capacity = capacity.CapacityController()
 
     @pecan.expose(content_type='application/json')
     def index(self):
@@ -12,14 +12,196 @@
 
 from oslo_policy import policy as oslo_policy
 from oslo_utils import uuidutils
+import pecan
+import wsme
+from wsme import types as wtypes
 
 import datetime
+import hashlib
+import http.client as http_client
 
+from esi_leap.common import enrichment
 from esi_leap.common import exception
+from esi_leap.common import freebusy
 from esi_leap.common import keystone
 from esi_leap.common import policy
+import esi_leap.conf
 from esi_leap.objects import lease as lease_obj
 from esi_leap.objects import offer as offer_obj
+from esi_leap import resource_objects
+
+CONF = esi_leap.conf.CONF
+
+RESOURCE_FIELDS = ('resource', 'resource_class', 'resource_properties')
+LEASE_ADDED_FIELDS = ('project', 'owner') + RESOURCE_FIELDS
+OFFER_ADDED_FIELDS = ('availabilities', 'project', 'lessee') + RESOURCE_FIELDS
+
+# added fields naming a project, and the attribute holding its id
+LEASE_PROJECT_FIELDS = {'project': 'project_id', 'owner': 'owner_id'}
+OFFER_PROJECT_FIELDS = {'project': 'project_id', 'lessee': 'lessee_id'}
+
+
+def get_requested_fields(api_type, added_fields, fields=None, detail=None):
+    """Return the attributes a list request asked for.
+
+    :param api_type: the API type being listed.
+    :param added_fields: attributes that need extra lookups to fill in.
+    :param fields: comma separated attribute names, if given.
+    :param detail: False to leave out the added fields.
+    :returns: a set of attribute names, or None for all of them.
+    """
+    attributes = set(attr.name for attr in wtypes.list_attributes(api_type))
+    if fields:
+        requested = set(f.strip() for f in fields.split(',')) - {''}
+        invalid = requested - attributes
+        if invalid:
+            raise exception.InvalidFields(fields=', '.join(sorted(invalid)))
+        return requested
+    if detail is False:
+        return attributes - set(added_fields)
+    return None
+
+
+def wants_fields(fields, *names):
+    return fields is None or any(name in fields for name in names)
+
+
+def filter_fields(d, fields):
+    if fields is None:
+        return d
+    return dict((k, v) for k, v in d.items() if k in fields)
+
+
+def get_enrichment_lists(fields, objs, project_fields, resources=()):
+    """Fetch the nodes and projects needed to fill in fields.
+
+    :param fields: the requested fields, or None for all of them.
+    :param objs: the leases or offers being returned.
+    :param project_fields: dict mapping each added project field to the
+        attribute holding the project id.
+    :param resources: (resource_type, uuid) of the resources that still
+        have to be loaded.
+    :returns: (node_list, project_list)
+    """
+    node_uuids = ()
+    if wants_fields(fields, *RESOURCE_FIELDS):
+        node_uuids = [uuid for resource_type, uuid in resources
+                      if resource_type == 'ironic_node']
+
+    project_ids = set()
+    for field, attr in project_fields.items():
+        if wants_fields(fields, field):
+            project_ids.update(getattr(o, attr) for o in objs
+                               if o.obj_attr_is_set(attr))
+
+    return enrichment.fetch(node_uuids, project_ids)
+
+
+def check_not_modified(*versions):
+    """Set a weak ETag on the response and compare it with If-None-Match.
+
+    The ETag covers the request URL, the caller's identity and the given
+    versions of the data the response is built from.
+
+    :returns: a 304 response if the client already has this
+        representation, otherwise None.
+    """
+    request = pecan.request
+    context = request.context
+    etag = hashlib.sha1(repr((
+        request.path_qs, context.user_id, context.project_id,
+        sorted(context.roles or ()), versions)).encode()).hexdigest()
+
+    pecan.response.etag = (etag, False)
+    if etag in request.if_none_match:
+        return wsme.api.Response(None, status_code=http_client.NOT_MODIFIED,
+                                 return_type=None)
+    return None
+
+
+def get_buckets(resource, start_time, end_time, granularity):
+    """Split a time range into buckets of granularity minutes.
+
+    :returns: (the length of a bucket as a timedelta, number of buckets)
+    """
+    if not (start_time and end_time) or end_time <= start_time:
+        raise exception.InvalidTimeAPICommand(resource=resource,
+                                              start_time=str(start_time),
+                                              end_time=str(end_time))
+    if granularity <= 0:
+        raise exception.InvalidGranularity(granularity=granularity)
+
+    step = datetime.timedelta(minutes=granularity)
+    buckets = freebusy.bucket_count(start_time, end_time, step)
+    if buckets > CONF.api.max_calendar_buckets:
+        raise exception.CalendarTooLarge(
+            max_buckets=CONF.api.max_calendar_buckets, buckets=buckets)
+    return step, buckets
+
+
+def get_resource_class_filter(resource_class, resource_type=None):
+    """Resolve a resource_class filter against the resource inventory.
+
+    :returns: (resources, found). resources is the value of the
+        'resources' lease/offer filter; a resource type that cannot be
+        searched by class maps to None there, and the class of its rows
+        still has to be checked. found maps (resource_type, uuid) to each
+        resource known to have the class.
+    """
+    if resource_type is None:
+        resource_types = resource_objects.RESOURCE_TYPES
+    else:
+        resource_types = (resource_type,)
+
+    resources = {}
+    found = {}
+    for r_type, resource_set in resource_objects.find_by_resource_class(
+            resource_class, resource_types).items():
+        if resource_set is None:
+            resources[r_type] = None
+            continue
+        resources[r_type] = []
+        for uuid, resource in resource_set.items():
+            resources[r_type].append(uuid)
+            found[(r_type, uuid)] = resource
+    return resources, found
+
+
+def check_property_filters(properties):
+    for name, value in (properties or {}).items():
+        if isinstance(value, dict) and (
+                not value or set(value) - {'min', 'max'}):
+            raise exception.InvalidPropertyFilter(name=name, value=value)
+
+
+def resource_matches(resource_properties, properties=None, traits=None):
+    """Check the properties of a resource against search criteria.
+
+    :param resource_properties: the resource's properties, holding its
+        traits under 'traits'.
+    :param properties: dict mapping property names to the value the
+        resource must have, or to a {'min': x, 'max': y} range.
+    :param traits: the traits the resource must all have.
+    """
+    if traits and not set(traits).issubset(
+            resource_properties.get('traits') or ()):
+        return False
+
+    for name, wanted in (properties or {}).items():
+        value = resource_properties.get(name)
+        if not isinstance(wanted, dict):
+            if value != wanted:
+                return False
+            continue
+        try:
+            value = float(value)
+            if 'min' in wanted and value < float(wanted['min']):
+                return False
+            if 'max' in wanted and value > float(wanted['max']):
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
 
 
 def check_resource_admin(cdict, resource, project_id):
@@ -121,18 +303,33 @@ def check_lease_policy_and_retrieve(request, policy_name, lease_ident,
     return lease
 
 
-def check_offer_policy_and_retrieve(request, policy_name, offer_ident,
-                                    status_filters=[]):
-    offer = get_offer(offer_ident, status_filters)
-
-    cdict = request.to_policy_values()
+def check_offer_policy(cdict, policy_name, offer):
     target = dict(cdict)
     target['offer.project_id'] = offer.project_id
 
     resource_policy_authorize(policy_name, target, cdict, 'offer', offer.uuid)
+
+
+def check_offer_policy_and_retrieve(request, policy_name, offer_ident,
+                                    status_filters=[]):
+    offer = get_offer(offer_ident, status_filters)
+    check_offer_policy(request.to_policy_values(), policy_name, offer)
     return offer
 
 
+def resolve_lessee_tree(filters):
+    """Add the project tree of the lessee_id filter to offer filters.
+
+    Without it, every offer query with a lessee_id asks Keystone for the
+    tree again, and collection requests run several such queries.
+    """
+    lessee_id = filters.get('lessee_id')
+    if lessee_id:
+        filters['lessee_id_tree'] = keystone.get_parent_project_id_tree(
+            lessee_id)
+    return filters
+
+
 def check_offer_lessee(cdict, offer):
     project_id = cdict['project_id']
 
@@ -146,31 +343,43 @@ def check_offer_lessee(cdict, offer):
             cdict, cdict, 'offer', offer.uuid)
 
 
-def offer_get_dict_with_added_info(offer, project_list=None, node_list=None):
-    resource = offer.resource_object()
-
+def offer_get_dict_with_added_info(offer, project_list=None, node_list=None,
+                                   resource=None, fields=None):
     o = offer.to_dict()
-    o['availabilities'] = offer.get_availabilities()
-    o['project'] = keystone.get_project_name(offer.project_id, project_list)
-    o['lessee'] = keystone.get_project_name(offer.lessee_id, project_list)
-    o['resource'] = resource.get_name(node_list)
-    o['resource_class'] = resource.get_resource_class(node_list)
-    o['resource_properties'] = resource.get_properties(node_list)
-    return o
-
-
-def lease_get_dict_with_added_info(lease, project_list=None, node_list=None):
-    resource = lease.resource_object()
-
+    if wants_fields(fields, 'availabilities'):
+        o['availabilities'] = offer.get_availabilities()
+    if wants_fields(fields, 'project'):
+        o['project'] = keystone.get_project_name(offer.project_id,
+                                                 project_list)
+    if wants_fields(fields, 'lessee'):
+        o['lessee'] = keystone.get_project_name(offer.lessee_id,
+                                                project_list)
+    if wants_fields(fields, *RESOURCE_FIELDS):
+        if resource is None:
+            resource = offer.resource_object()
+        o['resource'] = resource.get_name(node_list)
+        o['resource_class'] = resource.get_resource_class(node_list)
+        o['resource_properties'] = resource.get_properties(node_list)
+    return filter_fields(o, fields)
+
+
+def lease_get_dict_with_added_info(lease, project_list=None, node_list=None,
+                                   resource=None, fields=None):
     lease_dict = lease.to_dict()
-    lease_dict['project'] = keystone.get_project_name(lease.project_id,
-                                                      project_list)
-    lease_dict['owner'] = keystone.get_project_name(lease.owner_id,
-                                                    project_list)
-    lease_dict['resource'] = resource.get_name(node_list)
-    lease_dict['resource_class'] = resource.get_resource_class(node_list)
-    lease_dict['resource_properties'] = resource.get_properties(node_list)
-    return lease_dict
+    if wants_fields(fields, 'project'):
+        lease_dict['project'] = keystone.get_project_name(lease.project_id,
+                                                          project_list)
+    if wants_fields(fields, 'owner'):
+        lease_dict['owner'] = keystone.get_project_name(lease.owner_id,
+                                                        project_list)
+    if wants_fields(fields, *RESOURCE_FIELDS):
+        if resource is None:
+            resource = lease.resource_object()
+        lease_dict['resource'] = resource.get_name(node_list)
+        lease_dict['resource_class'] = resource.get_resource_class(node_list)
+        lease_dict['resource_properties'] = resource.get_properties(
+            node_list)
+    return filter_fields(lease_dict, fields)
 
 
 def check_lease_length(cdict, start_time, end_time, max_time):
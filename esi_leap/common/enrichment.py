@@ -0,0 +1,100 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Fetch the Ironic nodes and Keystone projects an API response needs.
+
+For each service the planner either looks up every id on its own or
+fetches the full list, whichever is cheaper: ids already held by the
+identity map are not fetched again, and once more than
+``[<service>] bulk_threshold`` ids are left the full list is fetched.
+All fetches run concurrently through the shared executors.
+"""
+
+from ironicclient.common.apiclient import exceptions as ir_exception
+
+from esi_leap.common import executor
+from esi_leap.common import identity_map
+from esi_leap.common import ironic
+from esi_leap.common import keystone
+import esi_leap.conf
+
+CONF = esi_leap.conf.CONF
+
+NODE = 'node'
+PROJECT = 'project'
+
+
+def _get_node(node_uuid):
+    try:
+        return ironic.get_node(node_uuid)
+    except ir_exception.NotFound:
+        return None
+
+
+class _Lookup(object):
+    """How the objects of one service are fetched."""
+
+    def __init__(self, dependency, obj_type, key, ids, get_one, get_list):
+        self.dependency = dependency
+        self.obj_type = obj_type
+        self.key = key
+        self.cached = []
+        self.missing = []
+        for ident in set(i for i in ids if i):
+            obj = identity_map.get(obj_type, ident)
+            if obj is None:
+                self.missing.append(ident)
+            else:
+                self.cached.append(obj)
+        self.bulk = len(self.missing) > CONF[dependency].bulk_threshold
+        self.get_one = get_one
+        self.get_list = get_list
+
+    def calls(self):
+        if self.bulk:
+            return [(self.dependency, self.get_list)]
+        return [(self.dependency, self.get_one, ident)
+                for ident in self.missing]
+
+    def result(self, results):
+        if self.bulk:
+            objs = results[0] or []
+        else:
+            objs = [obj for obj in results if obj is not None]
+        for obj in objs:
+            identity_map.add(self.obj_type, getattr(obj, self.key), obj)
+        return self.cached + objs
+
+
+def fetch(node_uuids=(), project_ids=()):
+    """Fetch the given Ironic nodes and Keystone projects.
+
+    :param node_uuids: uuids of the Ironic nodes needed.
+    :param project_ids: ids of the Keystone projects needed.
+    :returns: (node_list, project_list), holding at least the requested
+        nodes and projects that exist; either may hold more.
+    """
+    lookups = [
+        _Lookup('ironic', NODE, 'uuid', node_uuids,
+                _get_node, ironic.get_node_list),
+        _Lookup('keystone', PROJECT, 'id', project_ids,
+                keystone.get_project, keystone.get_project_list),
+    ]
+
+    calls = [lookup.calls() for lookup in lookups]
+    results = executor.gather(*[call for c in calls for call in c])
+
+    lists = []
+    for lookup, lookup_calls in zip(lookups, calls):
+        lists.append(lookup.result(results[:len(lookup_calls)]))
+        results = results[len(lookup_calls):]
+    return tuple(lists)
@@ -81,6 +81,19 @@ class LeaseNoOfferUUID(ESILeapException):
     msg_fmt = _('Cannot create lease without parameter offer_uuid.')
 
 
+class LeaseGroupEmpty(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('A lease group needs a list of offer_uuids, or a positive '
+                'count and a resource_class.')
+
+
+class LeaseGroupNoOffers(ESILeapException):
+    code = http_client.CONFLICT
+    msg_fmt = _('Only %(found)s of the %(count)s requested %(resource_class)s '
+                'offers are available between %(start_time)s and '
+                '%(end_time)s.')
+
+
 class LeaseNoTimeAvailabilities(ESILeapException):
     msg_fmt = _('Lease %(lease_uuid)s has no availabilities at given '
                 'time range %(start_time)s, %(end_time)s.')
@@ -105,6 +118,47 @@ class OfferNoTimeAvailabilities(ESILeapException):
                 'time range %(start_time)s, %(end_time)s.')
 
 
+class OfferBulkEmpty(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Bulk offer creation needs a list of offers or a '
+                'resource_class.')
+
+
+class OfferClaimInvalidCount(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('The number of offers to claim must be positive. '
+                'Got %(count)s.')
+
+
+class OfferClaimNoMatch(ESILeapException):
+    code = http_client.CONFLICT
+    msg_fmt = _('Only %(found)s of the %(count)s requested offers matching '
+                'the criteria could be claimed.')
+
+
+class OfferCheckNoTarget(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Checking windows needs an offer, or a resource_type and '
+                'resource_uuid.')
+
+
+class OfferCheckNoWindows(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Checking windows needs a body with a list of windows.')
+
+
+class OfferCheckTooManyWindows(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('At most %(max_windows)s windows can be checked at once, '
+                'got %(windows)s.')
+
+
+class InvalidWindow(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Window start_time must be strictly less than end_time. '
+                'Got %(start_time)s, %(end_time)s.')
+
+
 class OfferNotAvailable(ESILeapException):
     msg_fmt = _('Offer %(offer_uuid)s does not have status '
                 '"available". Got offer status "%(status)s".')
@@ -133,6 +187,12 @@ class ResourceNoPermissionTime(ESILeapException):
                 '%(start_time)s - %(end_time)s.')
 
 
+class ResourceClassNotSearchable(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('%(resource_type)s resources cannot be selected by '
+                'resource class.')
+
+
 class ResourceTypeUnknown(ESILeapException):
     msg_fmt = _('%(resource_type)s resource type unknown.')
 
@@ -144,6 +204,12 @@ class InvalidTimeAPICommand(ESILeapException):
                 'Got %(start_time)s, %(end_time)s.')
 
 
+class InvalidPropertyFilter(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Property filter %(name)s must be a value or an object '
+                'with "min" and/or "max". Got %(value)s.')
+
+
 class InvalidAvailabilityAPICommand(ESILeapException):
     msg_fmt = _('Attempted to get an offer resource without providing '
                 'both a valid Availability Start Time and Availability '
@@ -152,12 +218,52 @@ class InvalidAvailabilityAPICommand(ESILeapException):
                 'Got %(a_start)s, %(a_end)s.')
 
 
+class InvalidDuration(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Duration must be a positive number of minutes, got '
+                '%(duration)s.')
+
+
+class InvalidCalendarFormat(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Calendar format must be "bitmap" or "intervals", got '
+                '%(format)s.')
+
+
+class InvalidGranularity(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Granularity must be a positive number of minutes, got '
+                '%(granularity)s.')
+
+
+class CalendarTooLarge(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('A calendar may have at most %(max_buckets)s buckets, '
+                'this one would have %(buckets)s.')
+
+
+class InvalidFields(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Unknown fields requested: %(fields)s.')
+
+
+class InvalidLimit(ESILeapException):
+    code = http_client.BAD_REQUEST
+    msg_fmt = _('Limit must be a positive integer, got %(limit)s.')
+
+
 class InvalidTimeRange(ESILeapException):
     msg_fmt = _('Attempted to create %(resource)s resource with an invalid '
                 'Start Time and End Time. Start Time must be strictly less '
                 'than End Time. Got %(start_time)s, %(end_time)s.')
 
 
+class DependencyTimeout(ESILeapException):
+    code = http_client.SERVICE_UNAVAILABLE
+    msg_fmt = _('Timed out after %(timeout)s seconds waiting for '
+                '%(dependency)s.')
+
+
 class NodeNotFound(ESILeapException):
     code = http_client.NOT_FOUND
     msg_fmt = _('Encountered an error fetching info for node %(uuid)s '
@@ -0,0 +1,74 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Process-wide executors for calls to external services.
+
+Each dependency (ironic, keystone) gets its own bounded thread pool,
+sized by its ``[<dependency>] max_concurrency`` option, so a slow service
+cannot take up the threads used to reach the others.
+"""
+
+from concurrent import futures
+import threading
+import time
+
+from esi_leap.common import exception
+import esi_leap.conf
+
+CONF = esi_leap.conf.CONF
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(dependency):
+    executor = _executors.get(dependency)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(dependency)
+            if executor is None:
+                executor = futures.ThreadPoolExecutor(
+                    max_workers=CONF[dependency].max_concurrency,
+                    thread_name_prefix='esi-leap-%s' % dependency)
+                _executors[dependency] = executor
+    return executor
+
+
+def submit(dependency, func, *args, **kwargs):
+    return get_executor(dependency).submit(func, *args, **kwargs)
+
+
+def gather(*calls):
+    """Run calls in parallel and return their results in order.
+
+    Each call is a tuple of (dependency, func, arg, ...). All calls share
+    one deadline of ``[api] enrichment_timeout`` seconds.
+
+    :raises: DependencyTimeout if a call does not finish in time.
+    """
+    timeout = CONF.api.enrichment_timeout
+    deadline = time.monotonic() + timeout
+    pending = [(call[0], submit(*call)) for call in calls]
+
+    results = []
+    try:
+        for dependency, future in pending:
+            try:
+                results.append(future.result(
+                    timeout=max(deadline - time.monotonic(), 0)))
+            except futures.TimeoutError:
+                raise exception.DependencyTimeout(dependency=dependency,
+                                                  timeout=timeout)
+    finally:
+        for _, future in pending:
+            future.cancel()
+    return results
@@ -0,0 +1,117 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Free/busy timelines of resources over equal time buckets.
+
+Bucket i covers start + i * granularity to start + (i + 1) * granularity.
+Each interval adds one to the bucket it starts in and subtracts one from
+the bucket after it ends in a difference array; a single running sum then
+gives how many intervals cover every bucket. Filling a timeline costs
+O(intervals + buckets) rather than O(intervals * buckets).
+
+The free time of a resource, offered and not leased, is found by a sweep
+over the sorted endpoints of its offers and leases.
+"""
+
+import itertools
+
+
+def bucket_count(start, end, granularity):
+    """Return the number of buckets needed to cover start to end."""
+    count, rest = divmod(end - start, granularity)
+    return count + 1 if rest else count
+
+
+def _index(start, granularity, time, round_up):
+    index, rest = divmod(time - start, granularity)
+    return index + 1 if round_up and rest else index
+
+
+def coverage(intervals, start, granularity, buckets, partial):
+    """Count the intervals covering each bucket.
+
+    :param intervals: (start_time, end_time) pairs.
+    :param partial: whether a bucket an interval covers only in part
+        counts as covered.
+    :returns: a list with the count of each bucket.
+    """
+    diff = [0] * (buckets + 1)
+    for i_start, i_end in intervals:
+        first = max(_index(start, granularity, i_start, not partial), 0)
+        last = min(_index(start, granularity, i_end, partial), buckets)
+        if first < last:
+            diff[first] += 1
+            diff[last] -= 1
+    return list(itertools.accumulate(diff[:buckets]))
+
+
+def free_intervals(offers, leases):
+    """Return the times offers cover and no lease does.
+
+    :param offers: (start_time, end_time) of a resource's offers.
+    :param leases: (start_time, end_time) of the leases on those offers.
+    :returns: sorted, disjoint (start_time, end_time) pairs.
+    """
+    events = sorted(itertools.chain(
+        ((o_start, 1, 0) for o_start, o_end in offers),
+        ((o_end, -1, 0) for o_start, o_end in offers),
+        ((l_start, 0, 1) for l_start, l_end in leases),
+        ((l_end, 0, -1) for l_start, l_end in leases)))
+
+    intervals = []
+    offered = leased = 0
+    free_start = None
+    for time, group in itertools.groupby(events, key=lambda e: e[0]):
+        for _, d_offered, d_leased in group:
+            offered += d_offered
+            leased += d_leased
+        if offered > 0 and leased == 0:
+            if free_start is None:
+                free_start = time
+        elif free_start is not None:
+            intervals.append((free_start, time))
+            free_start = None
+    return intervals
+
+
+def timeline(offers, leases, start, granularity, buckets):
+    """Return the free and busy buckets of a resource.
+
+    A bucket is busy if a lease covers any of it, and free if all of it
+    is in the resource's free time, as free_intervals finds it.
+
+    :param offers: (start_time, end_time) of the resource's offers.
+    :param leases: (start_time, end_time) of the leases on those offers.
+    :returns: (free, busy) lists of booleans, one per bucket.
+    """
+    free = coverage(free_intervals(offers, leases), start, granularity,
+                    buckets, False)
+    leased = coverage(leases, start, granularity, buckets, True)
+    return [count > 0 for count in free], [count > 0 for count in leased]
+
+
+def to_bitmap(flags):
+    """Return flags as a string of '1' and '0', one per bucket."""
+    return ''.join('1' if flag else '0' for flag in flags)
+
+
+def to_intervals(flags, start, granularity):
+    """Merge runs of set buckets into [start_time, end_time] pairs."""
+    intervals = []
+    index = 0
+    for flag, run in itertools.groupby(flags):
+        length = len(list(run))
+        if flag:
+            intervals.append([start + index * granularity,
+                              start + (index + length) * granularity])
+        index += length
+    return intervals
@@ -0,0 +1,89 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Request-scoped identity map.
+
+Within a scope, objects loaded by (type, uuid) are remembered so that the
+same lease, offer or resource is only fetched once per API request or
+manager job. Outside of a scope nothing is cached.
+"""
+
+import contextlib
+import functools
+import threading
+
+
+_LOCAL = threading.local()
+
+
+def _get_map():
+    return getattr(_LOCAL, 'objects', None)
+
+
+def start():
+    """Open a new scope, dropping anything left over from an earlier one.
+
+    Threads are reused across requests, so a scope that was never stopped
+    must not leak its objects into the next one.
+    """
+    _LOCAL.objects = {}
+
+
+def stop():
+    """Close the active scope, dropping everything it holds."""
+    _LOCAL.objects = None
+
+
+@contextlib.contextmanager
+def scope():
+    """Context manager for a scope; nested scopes share the outer map."""
+    if active():
+        yield
+        return
+    start()
+    try:
+        yield
+    finally:
+        stop()
+
+
+def scoped(func):
+    """Decorator running the wrapped function inside an identity map scope."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with scope():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def active():
+    return _get_map() is not None
+
+
+def get(obj_type, uuid):
+    objects = _get_map()
+    if objects is None:
+        return None
+    return objects.get((obj_type, uuid))
+
+
+def add(obj_type, uuid, obj):
+    objects = _get_map()
+    if objects is not None and obj is not None:
+        objects[(obj_type, uuid)] = obj
+    return obj
+
+
+def invalidate(obj_type, uuid):
+    objects = _get_map()
+    if objects is not None:
+        objects.pop((obj_type, uuid), None)
@@ -43,8 +43,8 @@ def get_ironic_client(context=None):
     return cli
 
 
-def get_node_list(context=None):
-    return get_ironic_client(context).node.list(detail=True)
+def get_node_list(context=None, **filters):
+    return get_ironic_client(context).node.list(detail=True, **filters)
 
 
 def get_node(node_uuid, node_list=None):
@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from keystoneauth1 import exceptions as ks_exception
 from keystoneauth1 import loading as ks_loading
 from keystoneclient import client as keystone_client
 from oslo_utils import uuidutils
@@ -58,6 +59,13 @@ def get_project_uuid_from_ident(project_ident):
         raise exception.ProjectNoSuchName(name=project_ident)
 
 
+def get_project(project_id):
+    try:
+        return get_keystone_client().projects.get(project_id)
+    except ks_exception.NotFound:
+        return None
+
+
 def get_project_list():
     return get_keystone_client().projects.list()
 
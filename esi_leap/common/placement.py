@@ -0,0 +1,120 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Choosing which of several free offers takes a lease.
+
+A lease placed in the middle of a long free gap splits it into two
+shorter ones, and longer leases asked for later may then fit nowhere
+even though enough time is free overall. Offers are therefore ranked
+by interval best fit: the offer whose free gap around the lease is the
+smallest, i.e. that leaves the least time unused next to the lease,
+goes first.
+
+Finding the offers free the soonest for a lease of a given length merges
+the free gaps of all the offers in order of start time, so only the gaps
+before the slots returned are looked at.
+"""
+
+import heapq
+
+
+def free_gap(conflicts, offer_start, offer_end, start, end):
+    """Return the free gap of an offer holding start to end.
+
+    :param conflicts: the (start_time, end_time) of the leases on the
+        offer, sorted by start time, as offer_get_conflict_times returns
+        them. None of them may overlap start to end.
+    :returns: (gap_start, gap_end)
+    """
+    gap_start = offer_start
+    gap_end = offer_end
+    for c_start, c_end in conflicts:
+        if c_start >= end:
+            # later conflicts start later still
+            gap_end = min(gap_end, c_start)
+            break
+        if c_end <= start:
+            gap_start = max(gap_start, c_end)
+    return gap_start, gap_end
+
+
+def leftover(conflicts, offer_start, offer_end, start, end):
+    """Return the free time left next to start to end in its gap."""
+    gap_start, gap_end = free_gap(conflicts, offer_start, offer_end,
+                                  start, end)
+    return (start - gap_start) + (gap_end - end)
+
+
+def best_fit(offers, conflicts, start, end):
+    """Order offers free from start to end, best fit first.
+
+    :param offers: the candidate offers.
+    :param conflicts: dict mapping offer uuids to their conflict times.
+    :returns: the offers sorted by the free time they would leave next
+        to the lease, then by uuid so the order is deterministic.
+    """
+    return sorted(offers, key=lambda o: (
+        leftover(conflicts.get(o.uuid, ()), o.start_time, o.end_time,
+                 start, end),
+        o.uuid))
+
+
+def free_gaps(conflicts, offer_start, offer_end, not_before):
+    """Yield the free gaps of an offer from not_before on, in order.
+
+    :param conflicts: the (start_time, end_time) of the leases on the
+        offer, sorted by start time.
+    :returns: (gap_start, gap_end) pairs.
+    """
+    gap_start = max(offer_start, not_before)
+    for c_start, c_end in conflicts:
+        if gap_start >= offer_end:
+            return
+        if c_start > gap_start:
+            yield gap_start, min(c_start, offer_end)
+        gap_start = max(gap_start, c_end)
+    if gap_start < offer_end:
+        yield gap_start, offer_end
+
+
+def earliest_slots(offers, conflicts, duration, not_before):
+    """Yield the earliest slot of duration on each offer, earliest first.
+
+    A heap holds the next free gap of every offer. The gap starting first
+    is either long enough, giving that offer's slot, or replaced by the
+    offer's next gap.
+
+    :param offers: the candidate offers.
+    :param conflicts: dict mapping offer uuids to their conflict times.
+    :returns: (offer, start_time, end_time) triples; ties are broken by
+        offer uuid.
+    """
+    heap = []
+    for i, o in enumerate(offers):
+        gaps = free_gaps(conflicts.get(o.uuid, ()), o.start_time,
+                         o.end_time, not_before)
+        gap = next(gaps, None)
+        if gap is not None:
+            heap.append((gap, o.uuid, i, gaps))
+    heapq.heapify(heap)
+
+    while heap:
+        (gap_start, gap_end), uuid, i, gaps = heap[0]
+        if gap_end - gap_start >= duration:
+            heapq.heappop(heap)
+            yield offers[i], gap_start, gap_start + duration
+            continue
+        gap = next(gaps, None)
+        if gap is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (gap, uuid, i, gaps))
@@ -10,10 +10,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections.abc
 import itertools
 
+from oslo_config import cfg
 from oslo_policy import policy
 
+from esi_leap.common import identity_map
 import esi_leap.conf
 
 CONF = esi_leap.conf.CONF
@@ -122,8 +125,12 @@ def list_rules():
     return policies
 
 
-def get_enforcer():
-    CONF([], project='esi-leap')
+def init():
+    """Create the policy enforcer, once per process.
+
+    The policy file is not read here: oslo.policy loads it on first use
+    and reloads it whenever its modification time changes.
+    """
     global _ENFORCER
     if not _ENFORCER:
         _ENFORCER = policy.Enforcer(CONF)
@@ -131,9 +138,55 @@ def get_enforcer():
     return _ENFORCER
 
 
+def reset():
+    """Drop the policy enforcer, so the next check creates a new one."""
+    global _ENFORCER
+    _ENFORCER = None
+
+
+def get_enforcer():
+    """Return the policy enforcer, creating it if needed.
+
+    This is also the oslo.policy.enforcer entry point. The policy
+    generator scripts call it before anything has parsed the
+    configuration, which the enforcer needs to find the policy file, so
+    it is parsed here in that case.
+    """
+    if _ENFORCER:
+        return _ENFORCER
+    try:
+        CONF.find_file('policy.yaml')
+    except cfg.NotInitializedError:
+        CONF([], project='esi-leap')
+    return init()
+
+
+def _freeze(value):
+    if isinstance(value, collections.abc.Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
 def authorize(rule, target, creds, *args, **kwargs):
+    """Check rule, raising PolicyNotAuthorized if it is not met.
+
+    Within an identity map scope, such as an API request, the decision
+    for a given rule, target and credentials is only computed once.
+    """
     if not CONF.pecan.auth_enable:
         return True
 
-    return get_enforcer().authorize(
-        rule, target, creds, do_raise=True, *args, **kwargs)
+    if args or kwargs or not identity_map.active():
+        return get_enforcer().authorize(
+            rule, target, creds, do_raise=True, *args, **kwargs)
+
+    key = (rule, _freeze(target), _freeze(creds))
+    allowed = identity_map.get('policy', key)
+    if allowed is None:
+        allowed = identity_map.add('policy', key, get_enforcer().authorize(
+            rule, target, creds, do_raise=False))
+    if not allowed:
+        raise policy.PolicyNotAuthorized(rule, target, creds)
+    return allowed
@@ -10,11 +10,46 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+import time
+
 from oslo_concurrency import lockutils
+from oslo_log import log as logging
+
+LOG = logging.getLogger(__name__)
 
 _prefix = 'esileap'
-lock = lockutils.lock_with_prefix(_prefix)
+_lock = lockutils.lock_with_prefix(_prefix)
+
+# raised by lock() when blocking is False and the lock is already held
+LockHeld = lockutils.AcquireLockFailedException
+
+
+@contextlib.contextmanager
+def lock(name, external=False, blocking=True):
+    """Take a lock, logging how long it was waited for and held.
+
+    :raises: LockHeld if blocking is False and the lock is already held.
+    """
+    start = time.monotonic()
+    with _lock(name, external=external, blocking=blocking):
+        acquired = time.monotonic()
+        try:
+            yield
+        finally:
+            LOG.debug('Lock "%s" waited %.3fs, held %.3fs', name,
+                      acquired - start, time.monotonic() - acquired)
 
 
 def get_resource_lock_name(resource_type, resource_uuid):
     return resource_type + '-' + resource_uuid
+
+
+def get_resource_update_lock_name(resource_type, resource_uuid):
+    """Return the name of the lock serializing updates to a resource.
+
+    Calls that change the resource itself (setting or removing a lease)
+    take this lock instead of the resource lock, so a slow backend does
+    not hold up lease and offer admission for the resource.
+    """
+    return get_resource_lock_name(resource_type, resource_uuid) + '-update'
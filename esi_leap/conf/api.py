@@ -23,6 +23,10 @@ opts = [
     cfg.StrOpt('default_resource_type', default='ironic_node'),
     cfg.IntOpt('max_lease_time', default=21),
     cfg.IntOpt('default_lease_time', default=7),
+    cfg.IntOpt('enrichment_timeout', default=60, min=1),
+    cfg.IntOpt('stream_batch_size', default=500, min=1),
+    cfg.IntOpt('max_calendar_buckets', default=10000, min=1),
+    cfg.IntOpt('capacity_cache_size', default=128, min=0),
 ]
 
 
@@ -16,7 +16,10 @@ from keystoneauth1 import loading
 from oslo_config import cfg
 
 
-opts = []
+opts = [
+    cfg.IntOpt('max_concurrency', default=8, min=1),
+    cfg.IntOpt('bulk_threshold', default=10, min=0),
+]
 keystone_group = cfg.OptGroup('keystone', title='Keystone Options')
 
 
@@ -87,11 +87,27 @@ def offer_get_all():
     return IMPL.offer_get_all()
 
 
+def offer_get_version(filters):
+    return IMPL.offer_get_version(filters)
+
+
+def offer_get_lease_version(filters):
+    return IMPL.offer_get_lease_version(filters)
+
+
 @to_dict
 def offer_get_conflict_times(offer_ref):
     return IMPL.offer_get_conflict_times(offer_ref)
 
 
+def offer_get_conflict_times_bulk(offer_uuids):
+    return IMPL.offer_get_conflict_times_bulk(offer_uuids)
+
+
+def offer_get_calendar(filters, start, end):
+    return IMPL.offer_get_calendar(filters, start, end)
+
+
 def offer_get_next_lease_start_time(offer_uuid, start):
     return IMPL.offer_get_next_lease_start_time(
         offer_uuid, start)
@@ -102,10 +118,18 @@ def offer_verify_availability(offer_ref, start, end):
         offer_ref, start, end)
 
 
+def offer_check_windows(offer_refs, windows):
+    return IMPL.offer_check_windows(offer_refs, windows)
+
+
 def offer_create(values):
     return IMPL.offer_create(values)
 
 
+def offer_create_bulk(values_list):
+    return IMPL.offer_create_bulk(values_list)
+
+
 def offer_update(context, offer_uuid, values):
     return IMPL.offer_update(context, offer_uuid, values)
 
@@ -130,10 +154,22 @@ def lease_get_all():
     return IMPL.lease_get_all()
 
 
+def lease_get_version(filters):
+    return IMPL.lease_get_version(filters)
+
+
+def lease_get_all_batches(filters, batch_size):
+    return IMPL.lease_get_all_batches(filters, batch_size)
+
+
 def lease_create(values):
     return IMPL.lease_create(values)
 
 
+def lease_create_group(values_list):
+    return IMPL.lease_create_group(values_list)
+
+
 def lease_update(lease_uuid, values):
     return IMPL.lease_update(lease_uuid, values)
 
@@ -147,12 +183,30 @@ def lease_verify_child_availability(lease_ref, start, end):
         lease_ref, start, end)
 
 
+def lease_get_descendants(lease_uuids, offer_uuids,
+                          lease_status, offer_status):
+    return IMPL.lease_get_descendants(lease_uuids, offer_uuids,
+                                      lease_status, offer_status)
+
+
+def lease_offer_batch_update(lease_values, offer_values):
+    return IMPL.lease_offer_batch_update(lease_values, offer_values)
+
+
 # Resource object
 def resource_verify_availability(r_type, r_uuid, start, end):
     return IMPL.resource_verify_availability(
         r_type, r_uuid, start, end)
 
 
+def resource_verify_admission(start, end, offer_uuid=None,
+                              parent_lease_uuid=None, resource_type=None,
+                              resource_uuid=None):
+    return IMPL.resource_verify_admission(
+        start, end, offer_uuid, parent_lease_uuid,
+        resource_type, resource_uuid)
+
+
 def resource_check_admin(resource_type, resource_uuid,
                          start_time, end_time,
                          default_admin_project_id, project_id):
@@ -167,5 +221,9 @@ def event_get_all():
     return IMPL.event_get_all()
 
 
+def event_get_all_batches(filters, batch_size):
+    return IMPL.event_get_all_batches(filters, batch_size)
+
+
 def event_create(values):
     return IMPL.event_create(values)
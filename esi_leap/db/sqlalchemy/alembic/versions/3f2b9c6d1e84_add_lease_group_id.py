@@ -0,0 +1,39 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add lease group id
+
+Revision ID: 3f2b9c6d1e84
+Revises: a1ea63fec697
+Create Date: 2026-10-19 10:12:45.218303
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2b9c6d1e84'
+down_revision = 'a1ea63fec697'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('leases',
+                  sa.Column('group_id', sa.String(length=36), nullable=True))
+    op.create_index('lease_group_id_idx', 'leases', ['group_id'],
+                    unique=False)
+
+
+def downgrade():
+    pass
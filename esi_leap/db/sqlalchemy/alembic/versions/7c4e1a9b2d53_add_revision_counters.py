@@ -0,0 +1,38 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""add revision counters
+
+Revision ID: 7c4e1a9b2d53
+Revises: 3f2b9c6d1e84
+Create Date: 2026-10-19 13:02:17.604811
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e1a9b2d53'
+down_revision = '3f2b9c6d1e84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('offers', 'leases'):
+        op.add_column(table, sa.Column('revision', sa.Integer(),
+                                       nullable=False, server_default='0'))
+
+
+def downgrade():
+    pass
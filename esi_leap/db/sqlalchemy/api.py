@@ -10,6 +10,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import bisect
+import datetime
 import sys
 import threading
 
@@ -19,6 +21,7 @@ from oslo_log import log as logging
 
 import sqlalchemy as sa
 from sqlalchemy import or_
+from sqlalchemy import orm
 
 from esi_leap.common import constants
 from esi_leap.common import exception
@@ -116,23 +119,33 @@ def offer_get_all(filters):
     query = model_query(models.Offer)
 
     lessee_id = filters.pop('lessee_id', None)
+    lessee_id_tree = filters.pop('lessee_id_tree', None)
     start = filters.pop('start_time', None)
     end = filters.pop('end_time', None)
     time_filter_type = filters.pop('time_filter_type', None)
     a_start = filters.pop('available_start_time', None)
     status = filters.pop('status', None)
     a_end = filters.pop('available_end_time', None)
+    resource_uuids = filters.pop('resource_uuids', None)
+    resources = filters.pop('resources', None)
 
     query = query.filter_by(**filters)
 
     if status:
         query = query.filter((models.Offer.status.in_(status)))
 
+    if resource_uuids is not None:
+        query = query.filter(models.Offer.resource_uuid.in_(resource_uuids))
+
+    if resources is not None:
+        query = query.filter(resources_clause(models.Offer, resources))
+
     if lessee_id:
-        lessee_id_list = keystone.get_parent_project_id_tree(lessee_id)
+        if lessee_id_tree is None:
+            lessee_id_tree = keystone.get_parent_project_id_tree(lessee_id)
         query = query.filter(or_(models.Offer.project_id == lessee_id,
                                  models.Offer.lessee_id.__eq__(None),
-                                 models.Offer.lessee_id.in_(lessee_id_list)))
+                                 models.Offer.lessee_id.in_(lessee_id_tree)))
 
     if start and end:
         if time_filter_type == constants.WITHIN_TIME_FILTER:
@@ -146,15 +159,24 @@ def offer_get_all(filters):
                                  (end <= models.Offer.end_time))
 
     if a_start and a_end:
-        for o in query:
-            try:
-                offer_verify_availability(o, a_start, a_end)
-            except exception.OfferNoTimeAvailabilities:
-                query = query.filter(models.Offer.uuid != o.uuid)
+        query = add_offer_availability_filter(query, a_start, a_end)
 
     return query
 
 
+def offer_get_version(filters):
+    return collection_version(offer_get_all(filters), models.Offer)
+
+
+def offer_get_lease_version(filters):
+    """Return the version of the leases on the offers matching filters."""
+    offer_uuids = offer_get_all(filters).with_entities(models.Offer.uuid)
+    return collection_version(
+        model_query(models.Lease).filter(
+            models.Lease.offer_uuid.in_(offer_uuids.scalar_subquery())),
+        models.Lease)
+
+
 def offer_get_conflict_times(offer_ref):
 
     l_query = model_query(models.Lease)
@@ -169,6 +191,57 @@ def offer_get_conflict_times(offer_ref):
                ).all()
 
 
+def offer_get_conflict_times_bulk(offer_uuids):
+    """Return the conflict times of several offers in one query.
+
+    :returns: dict mapping each offer uuid to the (start_time, end_time)
+        of its leases, sorted as offer_get_conflict_times sorts them.
+    """
+    conflicts = dict((offer_uuid, []) for offer_uuid in offer_uuids)
+    if not conflicts:
+        return conflicts
+
+    query = model_query(models.Lease).with_entities(
+        models.Lease.offer_uuid, models.Lease.start_time,
+        models.Lease.end_time).\
+        order_by(models.Lease.start_time).\
+        filter(models.Lease.offer_uuid.in_(list(conflicts)),
+               (models.Lease.status != statuses.EXPIRED) &
+               (models.Lease.status != statuses.DELETED))
+
+    for offer_uuid, start, end in query:
+        conflicts[offer_uuid].append((start, end))
+    return conflicts
+
+
+def offer_get_calendar(filters, start, end):
+    """Return the offers overlapping start to end with their open leases.
+
+    Offers are selected with the offer_get_all filters and outer joined to
+    their CREATED and ACTIVE leases overlapping the range, so everything
+    is read in one query.
+
+    :returns: rows of (resource_type, resource_uuid, offer start_time,
+        offer end_time, lease start_time, lease end_time), ordered by
+        resource. The lease times are None for an offer without leases in
+        the range.
+    """
+    query = add_offer_conflict_filter(offer_get_all(dict(filters)),
+                                      start, end)
+    query = query.outerjoin(
+        models.Lease,
+        (models.Lease.offer_uuid == models.Offer.uuid) &
+        models.Lease.status.in_([statuses.CREATED, statuses.ACTIVE]) &
+        time_conflict_clause(models.Lease, start, end))
+
+    return query.with_entities(
+        models.Offer.resource_type, models.Offer.resource_uuid,
+        models.Offer.start_time, models.Offer.end_time,
+        models.Lease.start_time, models.Lease.end_time).\
+        order_by(models.Offer.resource_type,
+                 models.Offer.resource_uuid).all()
+
+
 def offer_get_next_lease_start_time(offer_uuid, start):
     l_query = model_query(models.Lease)
 
@@ -183,30 +256,86 @@ def offer_get_next_lease_start_time(offer_uuid, start):
                (models.Lease.start_time >= start)).first()
 
 
-def offer_verify_availability(offer_ref, start, end):
+def _offer_open_leases(offer_uuids, start, end):
+    """Return the CREATED and ACTIVE leases of offers overlapping a range.
+
+    :returns: dict mapping offer uuids to their leases, sorted by start
+        time. The leases of an offer never overlap each other.
+    """
+    leases = model_query(models.Lease).with_entities(
+        models.Lease.uuid, models.Lease.offer_uuid,
+        models.Lease.start_time, models.Lease.end_time).\
+        filter(models.Lease.offer_uuid.in_(offer_uuids),
+               models.Lease.status.in_([statuses.CREATED, statuses.ACTIVE])).\
+        order_by(models.Lease.start_time)
+    leases = add_lease_conflict_filter(leases, start, end)
+
+    by_offer = {}
+    for lease in leases:
+        by_offer.setdefault(lease.offer_uuid, []).append(lease)
+    return by_offer
 
+
+def _check_window(offer_ref, leases, lease_starts, start, end):
+    """Check whether an offer can take a lease from start to end.
+
+    :param leases: the offer's open leases, as _offer_open_leases
+        returns them.
+    :param lease_starts: the start times of leases.
+    :returns: (available, blocking lease or None)
+    """
     if start < offer_ref.start_time or end > offer_ref.end_time:
-        raise exception.OfferNoTimeAvailabilities(offer_uuid=offer_ref.uuid,
-                                                  start_time=start,
-                                                  end_time=end)
+        return False, None
 
-    l_query = model_query(models.Lease)
+    # only the last lease starting before end can overlap start to end
+    i = bisect.bisect_left(lease_starts, end)
+    if i and leases[i - 1].end_time > start:
+        return False, leases[i - 1]
+    return True, None
 
-    leases = l_query.with_entities(
-        models.Lease.start_time, models.Lease.end_time).\
-        filter((models.Lease.offer_uuid == offer_ref.uuid),
-               (models.Lease.status == statuses.CREATED) |
-               (models.Lease.status == statuses.ACTIVE)
-               )
-    leases = add_lease_conflict_filter(leases, start, end)
-    conflict = leases.first()
 
-    if conflict:
+def offer_verify_availability(offer_ref, start, end):
+    leases = _offer_open_leases([offer_ref.uuid], start, end).get(
+        offer_ref.uuid, [])
+    available, _ = _check_window(offer_ref, leases,
+                                 [lease.start_time for lease in leases],
+                                 start, end)
+    if not available:
         raise exception.OfferNoTimeAvailabilities(offer_uuid=offer_ref.uuid,
                                                   start_time=start,
                                                   end_time=end)
 
 
+def offer_check_windows(offer_refs, windows):
+    """Check many time windows against offers at once.
+
+    The open leases of all the offers over all the windows are fetched
+    with one query; each window is then checked against each offer by
+    bisection, as offer_verify_availability checks a single one.
+
+    :param windows: (start_time, end_time) pairs.
+    :returns: dict mapping offer uuids to a list holding, for each window,
+        a pair of whether the offer is available and the lease blocking
+        it, if any.
+    """
+    if not offer_refs or not windows:
+        return dict((offer_ref.uuid, []) for offer_ref in offer_refs)
+
+    leases = _offer_open_leases(
+        [offer_ref.uuid for offer_ref in offer_refs],
+        min(start for start, end in windows),
+        max(end for start, end in windows))
+
+    checks = {}
+    for offer_ref in offer_refs:
+        offer_leases = leases.get(offer_ref.uuid, [])
+        lease_starts = [lease.start_time for lease in offer_leases]
+        checks[offer_ref.uuid] = [
+            _check_window(offer_ref, offer_leases, lease_starts, start, end)
+            for start, end in windows]
+    return checks
+
+
 def offer_create(values):
     offer_ref = models.Offer()
     offer_ref.update(values)
@@ -217,6 +346,68 @@ def offer_create(values):
         return offer_ref
 
 
+def offer_create_bulk(values_list):
+    """Create the offers whose resources are free, in one transaction.
+
+    The offers and leases that could conflict with any of the new offers
+    are fetched with one query each. An offer is not created if its
+    resource is offered or leased for an overlapping time, including by
+    an earlier offer of the same call.
+
+    :param values_list: a list of dicts of offer values.
+    :returns: a tuple of the created offer refs and the values of the
+        offers that were not created because of a time conflict.
+    """
+    if not values_list:
+        return [], []
+
+    resources = {}
+    for values in values_list:
+        resources.setdefault(values['resource_type'], set()).add(
+            values['resource_uuid'])
+    start = min(values['start_time'] for values in values_list)
+    end = max(values['end_time'] for values in values_list)
+
+    with _session_for_write() as session:
+        offers = model_query(models.Offer).with_entities(
+            models.Offer.resource_type, models.Offer.resource_uuid,
+            models.Offer.start_time, models.Offer.end_time).\
+            filter(resources_clause(models.Offer, resources),
+                   models.Offer.status == statuses.AVAILABLE)
+        offers = add_offer_conflict_filter(offers, start, end)
+        leases = model_query(models.Lease).with_entities(
+            models.Lease.resource_type, models.Lease.resource_uuid,
+            models.Lease.start_time, models.Lease.end_time).\
+            filter(resources_clause(models.Lease, resources),
+                   models.Lease.status.in_([statuses.CREATED,
+                                            statuses.ACTIVE]))
+        leases = add_lease_conflict_filter(leases, start, end)
+
+        busy = {}
+        for row in offers.all() + leases.all():
+            busy.setdefault((row.resource_type, row.resource_uuid),
+                            []).append((row.start_time, row.end_time))
+
+        created = []
+        conflicts = []
+        for values in values_list:
+            key = (values['resource_type'], values['resource_uuid'])
+            times = busy.setdefault(key, [])
+            if any(s < values['end_time'] and values['start_time'] < e
+                   for s, e in times):
+                conflicts.append(values)
+                continue
+            times.append((values['start_time'], values['end_time']))
+
+            offer_ref = models.Offer()
+            offer_ref.update(values)
+            session.add(offer_ref)
+            created.append(offer_ref)
+
+        session.flush()
+        return created, conflicts
+
+
 def offer_update(offer_uuid, values):
 
     with _session_for_write() as session:
@@ -256,16 +447,22 @@ def offer_destroy(offer_uuid):
 
 
 def add_offer_conflict_filter(query, start, end):
-    return query.filter((
-        ((start >= models.Offer.start_time) &
-         (start < models.Offer.end_time)) |
+    return query.filter(time_conflict_clause(models.Offer, start, end))
 
-        ((end > models.Offer.start_time) &
-         (end <= models.Offer.end_time)) |
 
-        ((start <= models.Offer.start_time) &
-         (end >= models.Offer.end_time))
-    ))
+def add_offer_availability_filter(query, start, end):
+    """Keep the offers free from start to end.
+
+    The SQL counterpart of offer_verify_availability: the offer has to
+    span the range, and no open lease on it may overlap the range.
+    """
+    conflicts = model_query(models.Lease.id).filter(
+        models.Lease.offer_uuid == models.Offer.uuid,
+        models.Lease.status.in_([statuses.CREATED, statuses.ACTIVE]))
+    conflicts = add_lease_conflict_filter(conflicts, start, end)
+    return query.filter(models.Offer.start_time <= start,
+                        models.Offer.end_time >= end,
+                        ~conflicts.exists())
 
 
 # Leases
@@ -289,12 +486,20 @@ def lease_get_all(filters):
     time_filter_type = filters.pop('time_filter_type', None)
     status = filters.pop('status', None)
     project_or_owner_id = filters.pop('project_or_owner_id', None)
+    resource_uuids = filters.pop('resource_uuids', None)
+    resources = filters.pop('resources', None)
 
     query = query.filter_by(**filters)
 
     if status:
         query = query.filter((models.Lease.status.in_(status)))
 
+    if resource_uuids is not None:
+        query = query.filter(models.Lease.resource_uuid.in_(resource_uuids))
+
+    if resources is not None:
+        query = query.filter(resources_clause(models.Lease, resources))
+
     if start and end:
         if time_filter_type == constants.WITHIN_TIME_FILTER:
             query = query.filter(((start <= models.Lease.start_time) &
@@ -318,6 +523,14 @@ def lease_get_all(filters):
     return query
 
 
+def lease_get_version(filters):
+    return collection_version(lease_get_all(filters), models.Lease)
+
+
+def lease_get_all_batches(filters, batch_size):
+    return query_batches(lease_get_all(filters), models.Lease, batch_size)
+
+
 def lease_create(values):
     lease_ref = models.Lease()
     lease_ref.update(values)
@@ -328,6 +541,78 @@ def lease_create(values):
         return lease_ref
 
 
+def lease_create_group(values_list):
+    """Create leases on offers, either all of them or none.
+
+    The offers and the leases that could conflict with any of the new
+    leases are fetched with one query each. Each new lease is checked
+    like resource_verify_admission checks a lease on an offer, and also
+    against the new leases before it.
+
+    :param values_list: a list of dicts of lease values, each with an
+        offer_uuid.
+    :returns: the created lease refs.
+    :raises: OfferNotFound, OfferNotAvailable or OfferNoTimeAvailabilities
+             for the first lease that cannot be admitted, in which case
+             no lease is created.
+    """
+    if not values_list:
+        return []
+
+    offer_uuids = set(values['offer_uuid'] for values in values_list)
+    start = min(values['start_time'] for values in values_list)
+    end = max(values['end_time'] for values in values_list)
+
+    with _session_for_write() as session:
+        offers = dict((row.uuid, row) for row in model_query(
+            models.Offer).with_entities(
+                models.Offer.uuid, models.Offer.status,
+                models.Offer.start_time, models.Offer.end_time).
+            filter(models.Offer.uuid.in_(offer_uuids)))
+
+        leases = model_query(models.Lease).with_entities(
+            models.Lease.offer_uuid, models.Lease.start_time,
+            models.Lease.end_time).\
+            filter(models.Lease.offer_uuid.in_(offer_uuids),
+                   models.Lease.status.in_([statuses.CREATED,
+                                            statuses.ACTIVE]))
+        leases = add_lease_conflict_filter(leases, start, end)
+        busy = {}
+        for row in leases:
+            busy.setdefault(row.offer_uuid, []).append(
+                (row.start_time, row.end_time))
+
+        lease_refs = []
+        for values in values_list:
+            offer_uuid = values['offer_uuid']
+            lease_start = values['start_time']
+            lease_end = values['end_time']
+
+            offer = offers.get(offer_uuid)
+            if offer is None:
+                raise exception.OfferNotFound(offer_uuid=offer_uuid)
+            if offer.status != statuses.AVAILABLE:
+                raise exception.OfferNotAvailable(offer_uuid=offer_uuid,
+                                                  status=offer.status)
+            times = busy.setdefault(offer_uuid, [])
+            if (lease_start < offer.start_time or
+                    lease_end > offer.end_time or
+                    any(s < lease_end and lease_start < e
+                        for s, e in times)):
+                raise exception.OfferNoTimeAvailabilities(
+                    offer_uuid=offer_uuid, start_time=lease_start,
+                    end_time=lease_end)
+            times.append((lease_start, lease_end))
+
+            lease_ref = models.Lease()
+            lease_ref.update(values)
+            session.add(lease_ref)
+            lease_refs.append(lease_ref)
+
+        session.flush()
+        return lease_refs
+
+
 def lease_update(lease_uuid, values):
     with _session_for_write() as session:
         query = model_query(models.Lease)
@@ -401,17 +686,163 @@ def lease_verify_child_availability(lease_ref, start, end):
                                                   end_time=end)
 
 
+def lease_get_descendants(lease_uuids, offer_uuids,
+                          lease_status, offer_status):
+    """Return every lease and offer descending from the given roots.
+
+    Child leases hang off a lease through parent_lease_uuid or off an offer
+    through offer_uuid, and child offers hang off a lease through
+    parent_lease_uuid. The tree is walked one level at a time with batched
+    IN queries, so the number of queries depends on the depth of the tree
+    rather than on the number of nodes in it.
+
+    :param lease_uuids: uuids of the root leases.
+    :param offer_uuids: uuids of the root offers.
+    :param lease_status: statuses a descendant lease must have.
+    :param offer_status: statuses a descendant offer must have.
+    :returns: a (leases, offers) tuple; each list is ordered parents first.
+    """
+    leases = []
+    offers = []
+    seen = set(lease_uuids) | set(offer_uuids)
+    lease_uuids = list(lease_uuids)
+    offer_uuids = list(offer_uuids)
+
+    with _session_for_read():
+        while lease_uuids or offer_uuids:
+            parent_filters = []
+            if lease_uuids:
+                parent_filters.append(
+                    models.Lease.parent_lease_uuid.in_(lease_uuids))
+            if offer_uuids:
+                parent_filters.append(
+                    models.Lease.offer_uuid.in_(offer_uuids))
+            child_leases = model_query(models.Lease).\
+                filter(or_(*parent_filters),
+                       models.Lease.status.in_(lease_status)).\
+                order_by(models.Lease.id).all()
+
+            child_offers = []
+            if lease_uuids:
+                child_offers = model_query(models.Offer).\
+                    filter(models.Offer.parent_lease_uuid.in_(lease_uuids),
+                           models.Offer.status.in_(offer_status)).\
+                    order_by(models.Offer.id).all()
+
+            lease_uuids = []
+            offer_uuids = []
+            for lease in child_leases:
+                if lease.uuid not in seen:
+                    seen.add(lease.uuid)
+                    leases.append(lease)
+                    lease_uuids.append(lease.uuid)
+            for offer in child_offers:
+                if offer.uuid not in seen:
+                    seen.add(offer.uuid)
+                    offers.append(offer)
+                    offer_uuids.append(offer.uuid)
+
+    return leases, offers
+
+
+def lease_offer_batch_update(lease_values, offer_values):
+    """Update many leases and offers in a single transaction.
+
+    Rows receiving identical values are written with one UPDATE statement.
+
+    :param lease_values: dict mapping lease uuid to the values to set.
+    :param offer_values: dict mapping offer uuid to the values to set.
+    """
+    with _session_for_write() as session:
+        for model, values in ((models.Lease, lease_values),
+                              (models.Offer, offer_values)):
+            batches = []
+            for uuid, updates in values.items():
+                updates = dict(updates)
+                updates.pop('uuid', None)
+                updates.pop('project_id', None)
+                if not updates:
+                    continue
+                for batch_updates, uuids in batches:
+                    if batch_updates == updates:
+                        uuids.append(uuid)
+                        break
+                else:
+                    batches.append((updates, [uuid]))
+
+            for updates, uuids in batches:
+                model_query(model).\
+                    filter(model.uuid.in_(uuids)).\
+                    update(updates, synchronize_session=False)
+        session.flush()
+
+
 def add_lease_conflict_filter(query, start, end):
-    return query.filter((
-        ((start >= models.Lease.start_time) &
-         (start < models.Lease.end_time)) |
+    return query.filter(time_conflict_clause(models.Lease, start, end))
+
 
-        ((end > models.Lease.start_time) &
-         (end <= models.Lease.end_time)) |
+def time_conflict_clause(model, start, end):
+    return (
+        ((start >= model.start_time) &
+         (start < model.end_time)) |
+
+        ((end > model.start_time) &
+         (end <= model.end_time)) |
+
+        ((start <= model.start_time) &
+         (end >= model.end_time))
+    )
+
+
+def collection_version(query, model):
+    """Summarize the rows matched by query.
+
+    The result changes whenever a row is added, removed or updated, or
+    when the start or end time of a row is passed. Inserts raise the
+    highest id, deletes lower the count, and updates bump the revision of
+    the row.
+    """
+    now = datetime.datetime.now()
+    return tuple(query.with_entities(
+        sa.func.count(model.id),
+        sa.func.max(model.id),
+        sa.func.sum(model.revision),
+        sa.func.sum(sa.case((model.start_time <= now, 1), else_=0)),
+        sa.func.sum(sa.case((model.end_time <= now, 1), else_=0))).one())
 
-        ((start <= models.Lease.start_time) &
-         (end >= models.Lease.end_time))
-    ))
+
+def query_batches(query, model, batch_size):
+    """Yield the rows matched by query in lists of batch_size, by id.
+
+    Each batch is fetched by its own query, so no cursor stays open
+    while a batch is being processed.
+    """
+    last_id = None
+    while True:
+        batch_query = query
+        if last_id is not None:
+            batch_query = batch_query.filter(model.id > last_id)
+        batch = batch_query.order_by(model.id).limit(batch_size).all()
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1].id
+
+
+def resources_clause(model, resources):
+    """Match rows whose resource is one of the given resources.
+
+    :param resources: dict mapping a resource type to a list of resource
+        uuids, or to None to match any resource of that type.
+    """
+    clauses = []
+    for resource_type, uuids in resources.items():
+        clause = model.resource_type == resource_type
+        if uuids is not None:
+            clause = clause & model.resource_uuid.in_(uuids)
+        clauses.append(clause)
+    return or_(sa.false(), *clauses)
 
 
 # Resources
@@ -449,6 +880,91 @@ def resource_verify_availability(r_type, r_uuid, start, end):
             resource_type=r_type)
 
 
+def resource_verify_admission(start, end, offer_uuid=None,
+                              parent_lease_uuid=None, resource_type=None,
+                              resource_uuid=None):
+    """Check in one query whether a lease may be admitted for a time range.
+
+    The lease is checked against its offer if offer_uuid is given, else
+    against its parent lease if parent_lease_uuid is given, else against
+    the bare resource. The existence, status and time bounds of the offer
+    or parent lease and all conflicting rows are fetched in a single
+    SELECT; the most specific problem found is raised.
+
+    :raises: OfferNotFound, OfferNotAvailable, OfferNoTimeAvailabilities,
+             LeaseNotFound, LeaseNotActive, LeaseNoTimeAvailabilities or
+             ResourceTimeConflict.
+    """
+    lease_active = models.Lease.status.in_([statuses.CREATED,
+                                            statuses.ACTIVE])
+
+    if offer_uuid:
+        lease_conflict = sa.exists().where(
+            (models.Lease.offer_uuid == models.Offer.uuid) &
+            lease_active &
+            time_conflict_clause(models.Lease, start, end))
+        row = model_query(models.Offer).with_entities(
+            models.Offer.status, models.Offer.start_time,
+            models.Offer.end_time, lease_conflict.label('conflict')).\
+            filter(models.Offer.uuid == offer_uuid).first()
+
+        if row is None:
+            raise exception.OfferNotFound(offer_uuid=offer_uuid)
+        if row.status != statuses.AVAILABLE:
+            raise exception.OfferNotAvailable(offer_uuid=offer_uuid,
+                                              status=row.status)
+        if start < row.start_time or end > row.end_time or row.conflict:
+            raise exception.OfferNoTimeAvailabilities(offer_uuid=offer_uuid,
+                                                      start_time=start,
+                                                      end_time=end)
+
+    elif parent_lease_uuid:
+        child_lease = orm.aliased(models.Lease)
+        lease_conflict = sa.exists().where(
+            (child_lease.parent_lease_uuid == models.Lease.uuid) &
+            child_lease.status.in_([statuses.CREATED, statuses.ACTIVE]) &
+            time_conflict_clause(child_lease, start, end))
+        offer_conflict = sa.exists().where(
+            (models.Offer.parent_lease_uuid == models.Lease.uuid) &
+            (models.Offer.status == statuses.AVAILABLE) &
+            time_conflict_clause(models.Offer, start, end))
+        row = model_query(models.Lease).with_entities(
+            models.Lease.status, models.Lease.start_time,
+            models.Lease.end_time,
+            sa.or_(lease_conflict, offer_conflict).label('conflict')).\
+            filter(models.Lease.uuid == parent_lease_uuid).first()
+
+        if row is None:
+            raise exception.LeaseNotFound(lease_id=parent_lease_uuid)
+        if row.status != statuses.ACTIVE:
+            raise exception.LeaseNotActive(lease_id=parent_lease_uuid)
+        if start < row.start_time or end > row.end_time or row.conflict:
+            raise exception.LeaseNoTimeAvailabilities(
+                lease_uuid=parent_lease_uuid,
+                start_time=start,
+                end_time=end)
+
+    else:
+        offer_conflict = sa.exists().where(
+            (models.Offer.resource_uuid == resource_uuid) &
+            (models.Offer.resource_type == resource_type) &
+            (models.Offer.status == statuses.AVAILABLE) &
+            time_conflict_clause(models.Offer, start, end))
+        lease_conflict = sa.exists().where(
+            (models.Lease.resource_uuid == resource_uuid) &
+            (models.Lease.resource_type == resource_type) &
+            lease_active &
+            time_conflict_clause(models.Lease, start, end))
+        with _session_for_read() as session:
+            conflict = session.query(
+                sa.or_(offer_conflict, lease_conflict)).scalar()
+
+        if conflict:
+            raise exception.ResourceTimeConflict(
+                resource_uuid=resource_uuid,
+                resource_type=resource_type)
+
+
 # Events
 
 def event_get_all(filters):
@@ -473,6 +989,10 @@ def event_get_all(filters):
     return query
 
 
+def event_get_all_batches(filters, batch_size):
+    return query_batches(event_get_all(filters), models.Event, batch_size)
+
+
 def event_create(values):
     event_ref = models.Event()
     event_ref.update(values)
@@ -18,6 +18,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import orm
 from sqlalchemy import Column, DateTime, ForeignKey
 from sqlalchemy import Index, Integer, String
+from sqlalchemy import literal_column
 
 from esi_leap.common import statuses
 
@@ -41,6 +42,16 @@ class ESILEAPBase(models.TimestampMixin, models.ModelBase):
 Base = declarative_base(cls=ESILEAPBase)
 
 
+def revision_column():
+    """A counter bumped by every UPDATE of the row, in SQL.
+
+    Unlike updated_at it changes on each write even within the same
+    clock tick, so it can tell whether rows have changed.
+    """
+    return Column(Integer, nullable=False, default=0, server_default='0',
+                  onupdate=literal_column('revision') + 1)
+
+
 class Offer(Base):
     """Represents a resource that is offered."""
 
@@ -66,6 +77,7 @@ class Offer(Base):
     parent_lease_uuid = Column(String(36),
                                ForeignKey('leases.uuid'),
                                nullable=True)
+    revision = revision_column()
     parent_lease = orm.relationship(
         'Lease',
         foreign_keys=[parent_lease_uuid],
@@ -81,6 +93,7 @@ class Lease(Base):
         Index('lease_project_id_idx', 'project_id'),
         Index('lease_owner_id_idx', 'owner_id'),
         Index('lease_status_idx', 'status'),
+        Index('lease_group_id_idx', 'group_id'),
     )
 
     id = Column(Integer, primary_key=True, nullable=False, autoincrement=True)
@@ -103,6 +116,8 @@ class Lease(Base):
     parent_lease_uuid = Column(String(36),
                                ForeignKey('leases.uuid'),
                                nullable=True)
+    group_id = Column(String(36), nullable=True)
+    revision = revision_column()
     offer = orm.relationship(
         Offer,
         backref=orm.backref('offers'),
@@ -11,6 +11,7 @@
 #    under the License.
 
 
+from esi_leap.common import identity_map
 from esi_leap.common import statuses
 import esi_leap.conf
 from esi_leap.manager import utils
@@ -60,6 +61,7 @@ class ManagerService(service.Service):
         LOG.info('Shutting down esi-leap manager RPC server')
         self._server.stop()
 
+    @identity_map.scoped
     def _fulfill_leases(self):
         LOG.info('Checking for leases to fulfill')
         leases = lease_obj.Lease.get_all(
@@ -78,6 +80,7 @@ class ManagerService(service.Service):
                     lease.status = statuses.ERROR
                     lease.save()
 
+    @identity_map.scoped
     def _expire_leases(self):
         LOG.info('Checking for expiring leases')
         leases = lease_obj.Lease.get_all(
@@ -97,6 +100,7 @@ class ManagerService(service.Service):
                     lease.status = statuses.ERROR
                     lease.save()
 
+    @identity_map.scoped
     def _cancel_leases(self):
         LOG.info('Checking for leases to cancel')
         leases = lease_obj.Lease.get_all(
@@ -112,6 +116,7 @@ class ManagerService(service.Service):
                 lease.status = statuses.ERROR
                 lease.save()
 
+    @identity_map.scoped
     def _expire_offers(self):
         LOG.info('Checking for expiring offers')
         offers = offer_obj.Offer.get_all({'status': statuses.OFFER_CAN_DELETE},
@@ -9,29 +9,113 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import copy
+
 from oslo_log import log
 from oslo_versionedobjects import base as object_base
 
+from esi_leap.common import identity_map
 from esi_leap.objects import fields as object_fields
 
 
 LOG = log.getLogger(__name__)
 
 
+class ReadOnlyView(object):
+    """Read-only view of a database row.
+
+    Values are taken from the row as-is, skipping field coercion and
+    change tracking, which makes building large lists much cheaper. Use
+    to_object() to get a full object before modifying anything.
+    """
+    __slots__ = ('_context',)
+
+    _obj_cls = None
+    _null_dicts = ()
+
+    def __init__(self, context, db_obj):
+        set_attr = object.__setattr__
+        set_attr(self, '_context', context)
+        for key in self._obj_cls.fields:
+            set_attr(self, key, db_obj[key])
+        for key in self._null_dicts:
+            if getattr(self, key) is None:
+                set_attr(self, key, {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError('%s is read-only' % type(self).__name__)
+
+    def obj_attr_is_set(self, attrname):
+        return attrname in self._obj_cls.fields
+
+    def to_dict(self):
+        return dict((k, getattr(self, k)) for k in self._obj_cls.fields)
+
+    def to_object(self):
+        return self._obj_cls._from_db_object(self._context, self._obj_cls(),
+                                             self.to_dict())
+
+
 class ESILEAPObject(object_base.VersionedObject):
     OBJ_SERIAL_NAMESPACE = 'esi_leap_object'
     OBJ_PROJECT_NAMESPACE = 'esi_leap'
 
+    # methods that only read fields and are safe to call on a view
+    READ_ONLY_METHODS = ()
+
     fields = {
         'created_at': object_fields.DateTimeField(nullable=True),
         'updated_at': object_fields.DateTimeField(nullable=True),
     }
 
+    @classmethod
+    def _view_class(cls):
+        view_cls = cls.__dict__.get('_view_cls')
+        if view_cls is None:
+            attrs = {
+                '__slots__': tuple(cls.fields),
+                '_obj_cls': cls,
+                '_null_dicts': tuple(
+                    k for k, f in cls.fields.items()
+                    if isinstance(f, object_fields.FlexibleDictField) and
+                    f.nullable),
+            }
+            if hasattr(cls, 'dbapi'):
+                attrs['dbapi'] = cls.dbapi
+            for name in cls.READ_ONLY_METHODS:
+                attrs[name] = getattr(cls, name)
+            view_cls = type(cls.__name__ + 'View', (ReadOnlyView,), attrs)
+            cls._view_cls = view_cls
+        return view_cls
+
+    @classmethod
+    def _view_from_db_object_list(cls, context, db_objs):
+        view_cls = cls._view_class()
+        return [view_cls(context, db_obj) for db_obj in db_objs]
+
+    @classmethod
+    def _get_mapped(cls, context, obj_type, uuid, db_get):
+        """Get an object by uuid through the identity map.
+
+        The map holds a read-only view of the row; every caller gets its
+        own copy bound to its own context, so unsaved changes made by one
+        caller are never seen by another.
+        """
+        view = identity_map.get(obj_type, uuid)
+        if view is None:
+            db_obj = db_get(uuid)
+            if not db_obj:
+                return None
+            view = identity_map.add(obj_type, uuid,
+                                    cls._view_class()(context, db_obj))
+        return cls._from_db_object(context, cls(),
+                                   copy.deepcopy(view.to_dict()))
+
     @staticmethod
     def _from_db_object(context, obj, db_obj):
         for key in obj.fields:
             setattr(obj, key, db_obj[key])
-            obj.obj_reset_changes()
+        obj.obj_reset_changes()
         obj._context = context
         return obj
 
@@ -43,6 +43,13 @@ class Event(base.ESILEAPObject):
         db_events = cls.dbapi.event_get_all(filters)
         return cls._from_db_object_list(context, db_events)
 
+    @classmethod
+    def get_all_batches(cls, filters, batch_size, context=None):
+        """Like get_all, but yield the events in lists of batch_size."""
+        for db_events in cls.dbapi.event_get_all_batches(filters,
+                                                         batch_size):
+            yield cls._from_db_object_list(context, db_events)
+
     def create(self, context=None):
         updates = self.obj_get_changes()
 
@@ -10,9 +10,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
 import datetime
 
 from esi_leap.common import exception
+from esi_leap.common import identity_map
 from esi_leap.common import notification_utils as notify
 from esi_leap.common import statuses
 from esi_leap.common import utils
@@ -128,6 +130,8 @@ CRUD_NOTIFY_OBJ = {
 class Lease(base.ESILEAPObject):
     dbapi = dbapi.get_instance()
 
+    READ_ONLY_METHODS = ('resource_object',)
+
     fields = {
         'id': fields.IntegerField(),
         'name': fields.StringField(nullable=True),
@@ -145,19 +149,37 @@ class Lease(base.ESILEAPObject):
         'properties': fields.FlexibleDictField(nullable=True),
         'offer_uuid': fields.UUIDField(nullable=True),
         'parent_lease_uuid': fields.UUIDField(nullable=True),
+        'group_id': fields.UUIDField(nullable=True),
     }
 
     @classmethod
     def get(cls, lease_uuid, context=None):
-        db_lease = cls.dbapi.lease_get_by_uuid(lease_uuid)
-        if db_lease:
-            return cls._from_db_object(context, cls(), db_lease)
+        return cls._get_mapped(context, 'lease', lease_uuid,
+                               cls.dbapi.lease_get_by_uuid)
 
     @classmethod
-    def get_all(cls, filters, context=None):
+    def get_all(cls, filters, context=None, read_only=False):
         db_leases = cls.dbapi.lease_get_all(filters)
+        if read_only:
+            return cls._view_from_db_object_list(context, db_leases)
         return cls._from_db_object_list(context, db_leases)
 
+    @classmethod
+    def get_version(cls, filters):
+        """Return a value that changes whenever get_all(filters) would."""
+        return cls.dbapi.lease_get_version(dict(filters))
+
+    @classmethod
+    def get_all_batches(cls, filters, batch_size, context=None,
+                        read_only=False):
+        """Like get_all, but yield the leases in lists of batch_size."""
+        for db_leases in cls.dbapi.lease_get_all_batches(filters,
+                                                         batch_size):
+            if read_only:
+                yield cls._view_from_db_object_list(context, db_leases)
+            else:
+                yield cls._from_db_object_list(context, db_leases)
+
     def create(self, context=None):
         updates = self.obj_get_changes()
         resource_type = updates['resource_type']
@@ -176,10 +198,110 @@ class Lease(base.ESILEAPObject):
             db_lease = self.dbapi.lease_create(updates)
             self._from_db_object(context, self, db_lease)
 
+    @classmethod
+    def create_group(cls, leases, context=None):
+        """Create leases on offers, either all of them or none.
+
+        The locks of all the resources are held while the leases are
+        checked and inserted, in one transaction.
+
+        :param leases: new lease objects, each with an offer_uuid.
+        :raises: InvalidTimeRange, OfferNotFound, OfferNotAvailable or
+                 OfferNoTimeAvailabilities.
+        """
+        values_list = [lease.obj_get_changes() for lease in leases]
+        for values in values_list:
+            if values['start_time'] >= values['end_time']:
+                raise exception.InvalidTimeRange(
+                    resource='lease',
+                    start_time=str(values['start_time']),
+                    end_time=str(values['end_time']))
+
+        lock_names = sorted(set(
+            utils.get_resource_lock_name(values['resource_type'],
+                                         values['resource_uuid'])
+            for values in values_list))
+
+        with contextlib.ExitStack() as stack:
+            for lock_name in lock_names:
+                stack.enter_context(utils.lock(lock_name, external=True))
+            LOG.info('Creating %d leases', len(values_list))
+            db_leases = cls.dbapi.lease_create_group(values_list)
+
+        for lease, db_lease in zip(leases, db_leases):
+            cls._from_db_object(context, lease, db_lease)
+
+    @classmethod
+    def claim_first(cls, candidates, count, context=None):
+        """Create leases on the first count candidates that can be taken.
+
+        Candidates are tried in order. One whose resource lock is held by
+        another request, or that is no longer free, is skipped instead of
+        waited for, so concurrent claims spread over the candidates rather
+        than queueing on the first one. The leases are inserted in one
+        transaction while the locks of the taken candidates are held.
+
+        :param candidates: new lease objects, each with an offer_uuid, on
+            distinct resources.
+        :raises: OfferClaimNoMatch if fewer than count could be taken.
+        """
+        claimed = []
+        with contextlib.ExitStack() as stack:
+            for lease in candidates:
+                if len(claimed) == count:
+                    break
+                values = lease.obj_get_changes()
+                lock_name = utils.get_resource_lock_name(
+                    values['resource_type'], values['resource_uuid'])
+                with contextlib.ExitStack() as candidate_stack:
+                    try:
+                        candidate_stack.enter_context(utils.lock(
+                            lock_name, external=True, blocking=False))
+                        cls.verify_time_range(
+                            values['start_time'], values['end_time'],
+                            values['offer_uuid'],
+                            values.get('parent_lease_uuid'),
+                            values['resource_type'], values['resource_uuid'])
+                    except (utils.LockHeld,
+                            exception.OfferNotFound,
+                            exception.OfferNotAvailable,
+                            exception.OfferNoTimeAvailabilities,
+                            exception.LeaseNotActive,
+                            exception.LeaseNoTimeAvailabilities,
+                            exception.ResourceTimeConflict):
+                        LOG.debug('Skipping offer %s for claim',
+                                  values['offer_uuid'])
+                        continue
+                    stack.enter_context(candidate_stack.pop_all())
+                claimed.append((lease, values))
+
+            if len(claimed) < count:
+                raise exception.OfferClaimNoMatch(found=len(claimed),
+                                                  count=count)
+
+            LOG.info('Claiming %d offers', count)
+            db_leases = cls.dbapi.lease_create_group(
+                [values for lease, values in claimed])
+
+        for (lease, values), db_lease in zip(claimed, db_leases):
+            cls._from_db_object(context, lease, db_lease)
+        return [lease for lease, values in claimed]
+
+    def get_group(self, status, context=None):
+        """Return this lease and the leases of its group with a status."""
+        if self.group_id is None:
+            return [self]
+        return [self] + [
+            lease for lease in Lease.get_all(
+                {'group_id': self.group_id, 'status': status}, context)
+            if lease.uuid != self.uuid]
+
     def update(self, updates, context=None):
         # only allow updates to end_time right now
         if 'end_time' not in updates:
             return
+        if self.group_id is not None:
+            return self._update_group(updates['end_time'], context)
         new_end_time = updates['end_time']
         with utils.lock(utils.get_resource_lock_name(self.resource_type,
                                                      self.resource_uuid),
@@ -203,51 +325,70 @@ class Lease(base.ESILEAPObject):
             self.end_time = new_end_time
             self.save(context)
 
-    def cancel(self, context=None):
-        leases = Lease.get_all(
-            {'parent_lease_uuid': self.uuid,
-             'status': statuses.LEASE_CAN_DELETE},
-            None)
-        for lease in leases:
-            lease.cancel()
-        offers = offer_obj.Offer.get_all(
-            {'parent_lease_uuid': self.uuid,
-             'status': statuses.OFFER_CAN_DELETE},
-            None)
-        for offer in offers:
-            offer.cancel()
+    def _update_group(self, new_end_time, context=None):
+        """Move the end time of every lease of the group, or of none."""
+        leases = self.get_group([statuses.CREATED, statuses.ACTIVE],
+                                context)
+        resource_idents = sorted(set(
+            (lease.resource_type, lease.resource_uuid) for lease in leases))
+
+        with contextlib.ExitStack() as stack:
+            for resource_type, resource_uuid in resource_idents:
+                stack.enter_context(utils.lock(
+                    utils.get_resource_lock_name(resource_type,
+                                                 resource_uuid),
+                    external=True))
+
+            for lease in leases:
+                if lease.start_time >= new_end_time:
+                    raise exception.InvalidTimeRange(
+                        resource='lease',
+                        start_time=str(lease.start_time),
+                        end_time=str(new_end_time))
+                if new_end_time > lease.end_time:
+                    lease.verify_time_range(
+                        lease.end_time, new_end_time,
+                        lease.offer_uuid, lease.parent_lease_uuid,
+                        lease.resource_type, lease.resource_uuid)
+
+            self.dbapi.lease_offer_batch_update(
+                {lease.uuid: {'end_time': new_end_time} for lease in leases},
+                {})
 
-        with utils.lock(utils.get_resource_lock_name(self.resource_type,
-                                                     self.resource_uuid),
-                        external=True):
-            LOG.info('Deleting lease %s', self.uuid)
-            try:
-                resource = self.resource_object()
-                self.deactivate(context, resource)
-                self.status = statuses.DELETED
-                self.expire_time = datetime.datetime.now()
+        for lease in leases:
+            identity_map.invalidate('lease', lease.uuid)
+            lease.end_time = new_end_time
+            lease.obj_reset_changes()
 
-            except Exception as e:
-                LOG.info('Error canceling lease: %s: %s' %
-                         (type(e).__name__, e))
-                LOG.info('Setting lease status to WAIT')
-                self.status = statuses.WAIT_CANCEL
-            self.save(context)
+    def cancel(self, context=None):
+        # the leases of a group are cancelled together
+        deactivate_tree(context,
+                        self.get_group(statuses.LEASE_CAN_DELETE, context),
+                        [], 'cancel')
 
     def destroy(self):
         self.dbapi.lease_destroy(self.uuid)
+        identity_map.invalidate('lease', self.uuid)
         self.obj_reset_changes()
 
     def save(self, context=None):
         updates = self.obj_get_changes()
         db_lease = self.dbapi.lease_update(
             self.uuid, updates)
+        identity_map.invalidate('lease', self.uuid)
         self._from_db_object(context, self, db_lease)
 
     def fulfill(self, context=None):
-        with utils.lock(utils.get_resource_lock_name(self.resource_type,
-                                                     self.resource_uuid),
-                        external=True):
+        with utils.lock(utils.get_resource_update_lock_name(
+                self.resource_type, self.resource_uuid), external=True):
+            # the lease may have been cancelled or fulfilled since it was
+            # loaded; only the current status counts
+            db_lease = self.dbapi.lease_get_by_uuid(self.uuid)
+            if (db_lease is None or db_lease['status'] not in
+                    (statuses.CREATED, statuses.WAIT_FULFILL)):
+                LOG.info('Lease %s no longer needs fulfilling', self.uuid)
+                return
+
             LOG.info('Fulfilling lease %s', self.uuid)
             try:
                 resource = self.resource_object()
@@ -278,36 +419,7 @@ class Lease(base.ESILEAPObject):
             self.save(context)
 
     def expire(self, context=None):
-        leases = Lease.get_all(
-            {'parent_lease_uuid': self.uuid,
-             'status': statuses.LEASE_CAN_DELETE},
-            None)
-        for lease in leases:
-            lease.expire(context)
-        offers = offer_obj.Offer.get_all(
-            {'parent_lease_uuid': self.uuid,
-             'status': statuses.OFFER_CAN_DELETE},
-            None)
-        for offer in offers:
-            offer.expire(context)
-
-        with utils.lock(utils.get_resource_lock_name(self.resource_type,
-                                                     self.resource_uuid),
-                        external=True):
-            LOG.info('Expiring lease %s', self.uuid)
-            try:
-                # expire lease
-                resource = self.resource_object()
-                self.deactivate(context, resource)
-                self.status = statuses.EXPIRED
-                self.expire_time = datetime.datetime.now()
-
-            except Exception as e:
-                LOG.info('Error expiring lease: %s: %s' %
-                         (type(e).__name__, e))
-                LOG.info('Setting lease status to WAIT')
-                self.status = statuses.WAIT_EXPIRE
-            self.save(context)
+        deactivate_tree(context, [self], [], 'expire')
 
     def resource_object(self):
         return get_resource_object(self.resource_type, self.resource_uuid)
@@ -316,7 +428,13 @@ class Lease(base.ESILEAPObject):
         return self.dbapi.lease_verify_child_availability(
             self, start_time, end_time)
 
-    def deactivate(self, context, resource):
+    def deactivate(self, context, resource, releasing=()):
+        """Disassociate this lease from its resource.
+
+        If the lease is a child lease the resource is handed back to the
+        parent lease, unless the parent is listed in releasing because it
+        is being deactivated in the same batch.
+        """
         notify.emit_start_notification(context, self,
                                        'delete', CRUD_NOTIFY_OBJ,
                                        node=resource)
@@ -329,9 +447,11 @@ class Lease(base.ESILEAPObject):
             if resource.get_lease_uuid() == self.uuid:
                 resource.remove_lease(self)
 
-                if self.parent_lease_uuid is not None:
+                if (self.parent_lease_uuid is not None and
+                        self.parent_lease_uuid not in releasing):
                     parent_lease = Lease.get(self.parent_lease_uuid)
-                    resource.set_lease(parent_lease)
+                    if parent_lease.status == statuses.ACTIVE:
+                        resource.set_lease(parent_lease)
 
         notify.emit_end_notification(context, self,
                                      'delete', CRUD_NOTIFY_OBJ,
@@ -348,26 +468,123 @@ class Lease(base.ESILEAPObject):
                 end_time=str(end_time)
             )
 
-        # check availability
-        if offer_uuid:
-            # lease is related to an offer
-            related_offer = offer_obj.Offer.get(offer_uuid)
-            if related_offer.status != statuses.AVAILABLE:
-                raise exception.OfferNotAvailable(
-                    offer_uuid=related_offer.uuid,
-                    status=related_offer.status)
-            related_offer.verify_availability(start_time,
-                                              end_time)
-        elif parent_lease_uuid:
-            # lease is a child of an existing lease
-            parent_lease = Lease.get(parent_lease_uuid)
-            if parent_lease.status != statuses.ACTIVE:
-                raise exception.LeaseNotActive(
-                    parent_lease_uuid)
-            parent_lease.verify_child_availability(start_time,
-                                                   end_time)
-        else:
-            ro = get_resource_object(resource_type,
-                                     resource_uuid)
-            ro.verify_availability(start_time, end_time)
+        # check the offer, parent lease or bare resource in one round trip
+        Lease.dbapi.resource_verify_admission(
+            start_time, end_time,
+            offer_uuid=offer_uuid,
+            parent_lease_uuid=parent_lease_uuid,
+            resource_type=resource_type,
+            resource_uuid=resource_uuid)
+        return
+
+
+# action: (lease status, lease status on error, offer status, log verb)
+_DEACTIVATE_TREE_STATUSES = {
+    'cancel': (statuses.DELETED, statuses.WAIT_CANCEL, statuses.DELETED,
+               'Deleting'),
+    'expire': (statuses.EXPIRED, statuses.WAIT_EXPIRE, statuses.EXPIRED,
+               'Expiring'),
+}
+
+
+def deactivate_tree(context, leases, offers, action):
+    """Cancel or expire leases and offers along with all their descendants.
+
+    This happens in three steps:
+
+    * under the resource locks, the descendant tree is loaded and every
+      lease is moved to its wait status and every offer to its final
+      status in one transaction, so that nothing new can be admitted
+      against the tree;
+    * under the resource update locks only, each resource is fetched once
+      and deactivated lease by lease, children before parents;
+    * the final lease statuses are written in one transaction.
+
+    A lease whose deactivation fails is left in its wait status for the
+    manager to retry.
+
+    :param context: request context.
+    :param leases: root lease objects.
+    :param offers: root offer objects.
+    :param action: 'cancel' or 'expire'.
+    """
+    lease_status, wait_status, offer_status, verb = \
+        _DEACTIVATE_TREE_STATUSES[action]
+
+    # descendants always live on the resource of their root
+    resource_idents = sorted(set(
+        (obj.resource_type, obj.resource_uuid)
+        for obj in list(leases) + list(offers)))
+
+    with contextlib.ExitStack() as stack:
+        for resource_type, resource_uuid in resource_idents:
+            stack.enter_context(utils.lock(
+                utils.get_resource_lock_name(resource_type, resource_uuid),
+                external=True))
+
+        db_leases, db_offers = Lease.dbapi.lease_get_descendants(
+            [lease.uuid for lease in leases],
+            [offer.uuid for offer in offers],
+            statuses.LEASE_CAN_DELETE, statuses.OFFER_CAN_DELETE)
+
+        # descendants are returned parents first; reversing puts children
+        # before their parents, and the roots last
+        leases = list(leases) + Lease._from_db_object_list(context,
+                                                           db_leases)
+        leases.reverse()
+        offers = list(offers) + offer_obj.Offer._from_db_object_list(
+            context, db_offers)
+
+        for lease in leases:
+            lease.status = wait_status
+        for offer in offers:
+            LOG.info('%s offer %s', verb, offer.uuid)
+            offer.status = offer_status
+
+        Lease.dbapi.lease_offer_batch_update(
+            {lease.uuid: {'status': wait_status} for lease in leases},
+            {offer.uuid: {'status': offer_status} for offer in offers})
+
+    for obj in leases + offers:
+        identity_map.invalidate(obj.obj_name().lower(), obj.uuid)
+        obj._context = context
+        obj.obj_reset_changes()
+
+    if not leases:
         return
+
+    resource_leases = {}
+    for lease in leases:
+        resource_leases.setdefault(
+            (lease.resource_type, lease.resource_uuid), []).append(lease)
+    releasing = set(lease.uuid for lease in leases)
+
+    with contextlib.ExitStack() as stack:
+        for resource_type, resource_uuid in sorted(resource_leases):
+            stack.enter_context(utils.lock(
+                utils.get_resource_update_lock_name(resource_type,
+                                                    resource_uuid),
+                external=True))
+
+        for resource_lease_list in resource_leases.values():
+            resource = None
+            for lease in resource_lease_list:
+                LOG.info('%s lease %s', verb, lease.uuid)
+                try:
+                    if resource is None:
+                        resource = lease.resource_object()
+                    lease.deactivate(context, resource, releasing)
+                    lease.status = lease_status
+                    lease.expire_time = datetime.datetime.now()
+                except Exception as e:
+                    LOG.info('Error %s lease: %s: %s' %
+                             (verb.lower(), type(e).__name__, e))
+                    LOG.info('Setting lease status to WAIT')
+                    lease.status = wait_status
+
+        Lease.dbapi.lease_offer_batch_update(
+            {lease.uuid: lease.obj_get_changes() for lease in leases}, {})
+
+    for lease in leases:
+        identity_map.invalidate('lease', lease.uuid)
+        lease.obj_reset_changes()
@@ -10,15 +10,21 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import contextlib
 import datetime
+import threading
 
 from esi_leap.common import exception
+from esi_leap.common import freebusy
+from esi_leap.common import identity_map
 from esi_leap.common import statuses
 from esi_leap.common import utils
 from esi_leap.db import api as dbapi
 from esi_leap.objects import base
 from esi_leap.objects import fields
 from esi_leap.objects import lease as lease_obj
+from esi_leap.resource_objects import bulk_load_all
 from esi_leap.resource_objects import get_resource_object
 
 from oslo_config import cfg
@@ -28,11 +34,19 @@ from oslo_versionedobjects import base as versioned_objects_base
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
+# capacity forecasts, keyed by the offer and lease versions they were
+# computed from, least recently used first
+_capacity_cache = collections.OrderedDict()
+_capacity_cache_lock = threading.Lock()
+
 
 @versioned_objects_base.VersionedObjectRegistry.register
 class Offer(base.ESILEAPObject):
     dbapi = dbapi.get_instance()
 
+    READ_ONLY_METHODS = ('get_availabilities', 'get_next_lease_start_time',
+                         'resource_object')
+
     fields = {
         'id': fields.IntegerField(),
         'name': fields.StringField(nullable=True),
@@ -50,15 +64,109 @@ class Offer(base.ESILEAPObject):
 
     @classmethod
     def get(cls, offer_uuid, context=None):
-        db_offer = cls.dbapi.offer_get_by_uuid(offer_uuid)
-        if db_offer:
-            return cls._from_db_object(context, cls(), db_offer)
+        return cls._get_mapped(context, 'offer', offer_uuid,
+                               cls.dbapi.offer_get_by_uuid)
 
     @classmethod
-    def get_all(cls, filters, context=None):
+    def get_all(cls, filters, context=None, read_only=False):
         db_offers = cls.dbapi.offer_get_all(filters)
+        if read_only:
+            return cls._view_from_db_object_list(context, db_offers)
         return cls._from_db_object_list(context, db_offers)
 
+    @classmethod
+    def get_version(cls, filters):
+        """Return a value that changes whenever get_all(filters) would."""
+        return cls.dbapi.offer_get_version(dict(filters))
+
+    @classmethod
+    def get_lease_version(cls, filters):
+        """Return a value that changes with the leases on those offers."""
+        return cls.dbapi.offer_get_lease_version(dict(filters))
+
+    @classmethod
+    def get_conflict_times_bulk(cls, offer_uuids):
+        """Return the conflict times of each offer, loaded together."""
+        return cls.dbapi.offer_get_conflict_times_bulk(offer_uuids)
+
+    @classmethod
+    def get_calendar(cls, filters, start_time, end_time):
+        """Return the offers of each resource and their leases in a range.
+
+        :returns: dict mapping (resource_type, resource_uuid) to a pair of
+            lists: the (start_time, end_time) of the resource's offers,
+            and of the open leases on them.
+        """
+        calendar = {}
+        for (resource_type, resource_uuid, o_start, o_end, l_start,
+             l_end) in cls.dbapi.offer_get_calendar(filters, start_time,
+                                                    end_time):
+            offers, leases = calendar.setdefault(
+                (resource_type, resource_uuid), (set(), []))
+            offers.add((o_start, o_end))
+            if l_start is not None:
+                leases.append((l_start, l_end))
+        return dict((ident, (sorted(offers), sorted(leases)))
+                    for ident, (offers, leases) in calendar.items())
+
+    @classmethod
+    def get_capacity(cls, filters, start_time, end_time, granularity,
+                     resource_class=None, versions=None):
+        """Count the free resources of each class over equal time buckets.
+
+        A resource is free in a bucket if its offers cover all of the
+        bucket and no open lease overlaps it. Results are cached under the
+        versions of the offers and leases, which change with every write
+        to them. Resource classes come from the resources themselves and
+        are not part of the key: a forecast made before a resource changes
+        class is served until its offers or leases change, or it is evicted.
+
+        :param versions: the offer and lease versions for filters, if the
+            caller already has them.
+        :returns: dict mapping resource classes to the number of free
+            resources in each bucket.
+        """
+        if versions is None:
+            versions = (cls.get_version(filters),
+                        cls.get_lease_version(filters))
+        key = (repr(sorted(filters.items())), start_time, end_time,
+               granularity, resource_class, tuple(versions))
+        with _capacity_cache_lock:
+            if key in _capacity_cache:
+                _capacity_cache.move_to_end(key)
+                return _capacity_cache[key]
+
+        calendar = cls.get_calendar(filters, start_time, end_time)
+        resources = bulk_load_all(calendar)
+        free = {}
+        for ident, (offers, leases) in calendar.items():
+            r_class = resources[ident].get_resource_class(None)
+            if resource_class is None or r_class == resource_class:
+                free.setdefault(r_class, []).extend(
+                    freebusy.free_intervals(offers, leases))
+
+        buckets = freebusy.bucket_count(start_time, end_time, granularity)
+        capacity = dict(
+            (r_class, freebusy.coverage(intervals, start_time, granularity,
+                                        buckets, False))
+            for r_class, intervals in free.items())
+
+        with _capacity_cache_lock:
+            _capacity_cache[key] = capacity
+            while len(_capacity_cache) > CONF.api.capacity_cache_size:
+                _capacity_cache.popitem(last=False)
+        return capacity
+
+    @classmethod
+    def check_windows(cls, offers, windows):
+        """Check whether offers are free over each of several windows.
+
+        :param windows: (start_time, end_time) pairs.
+        :returns: dict mapping offer uuids to an (available, blocking
+            lease) pair for each window.
+        """
+        return cls.dbapi.offer_check_windows(offers, windows)
+
     def get_availabilities(self):
 
         if self.status != statuses.AVAILABLE:
@@ -151,35 +259,37 @@ class Offer(base.ESILEAPObject):
             db_offer = self.dbapi.offer_create(updates)
             self._from_db_object(context, self, db_offer)
 
-    def cancel(self):
-        LOG.info('Deleting offer %s', self.uuid)
-        leases = lease_obj.Lease.get_all(
-            {'offer_uuid': self.uuid,
-             'status': statuses.LEASE_CAN_DELETE},
-            None)
-        for lease in leases:
-            lease.cancel()
-
-        with utils.lock(utils.get_resource_lock_name(self.resource_type,
-                                                     self.resource_uuid),
-                        external=True):
-            self.status = statuses.DELETED
-            self.save(None)
+    @classmethod
+    def create_bulk(cls, values_list, context=None):
+        """Create offers on resources that are neither offered nor leased.
+
+        The locks of all the resources are held while they are checked
+        for conflicts and the offers are inserted, in one transaction.
+
+        :param values_list: a list of dicts of offer values.
+        :returns: a tuple of the created offers and the values of the
+            offers that were not created because of a time conflict.
+        """
+        lock_names = sorted(set(
+            utils.get_resource_lock_name(values['resource_type'],
+                                         values['resource_uuid'])
+            for values in values_list))
+
+        with contextlib.ExitStack() as stack:
+            for lock_name in lock_names:
+                stack.enter_context(utils.lock(lock_name, external=True))
+            LOG.info('Creating %d offers', len(values_list))
+            db_offers, conflicts = cls.dbapi.offer_create_bulk(values_list)
+
+        offers = [cls._from_db_object(context, cls(), db_offer)
+                  for db_offer in db_offers]
+        return offers, conflicts
+
+    def cancel(self, context=None):
+        lease_obj.deactivate_tree(context, [], [self], 'cancel')
 
     def expire(self, context=None):
-        LOG.info('Expiring offer %s', self.uuid)
-        leases = lease_obj.Lease.get_all(
-            {'offer_uuid': self.uuid,
-             'status': statuses.LEASE_CAN_DELETE},
-            None)
-        for lease in leases:
-            lease.expire(context)
-
-        with utils.lock(utils.get_resource_lock_name(self.resource_type,
-                                                     self.resource_uuid),
-                        external=True):
-            self.status = statuses.EXPIRED
-            self.save(context)
+        lease_obj.deactivate_tree(context, [], [self], 'expire')
 
     def verify_availability(self, start_time, end_time):
         return self.dbapi.offer_verify_availability(
@@ -187,12 +297,14 @@ class Offer(base.ESILEAPObject):
 
     def destroy(self):
         self.dbapi.offer_destroy(self.uuid)
+        identity_map.invalidate('offer', self.uuid)
         self.obj_reset_changes()
 
     def save(self, context=None):
         updates = self.obj_get_changes()
         db_offer = self.dbapi.offer_update(
             self.uuid, updates)
+        identity_map.invalidate('offer', self.uuid)
         self._from_db_object(context, self, db_offer)
 
     def resource_object(self):
@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 from esi_leap.common.exception import ResourceTypeUnknown
+from esi_leap.common import identity_map
 from esi_leap.resource_objects import base
 # types derived from base won't show as subclasses unless imported somewhere
 from esi_leap.resource_objects import dummy_node  # noqa: F401
@@ -30,5 +31,55 @@ def get_type(resource_type):
         raise ResourceTypeUnknown(resource_type=resource_type)
 
 
+def bulk_load(resource_type, uuids, resource_list=None):
+    resources = get_type(resource_type).bulk_load(uuids, resource_list)
+    for uuid, resource in resources.items():
+        identity_map.add(resource_type, uuid, resource)
+    return resources
+
+
+def bulk_load_all(idents, resource_list=None):
+    """Load resources given as (resource_type, uuid) pairs
+
+    One bulk_load call is made per resource type.
+
+    :returns: dict mapping (resource_type, uuid) to the resource object.
+    """
+    uuids_by_type = {}
+    for resource_type, uuid in idents:
+        uuids_by_type.setdefault(resource_type, set()).add(uuid)
+
+    resources = {}
+    for resource_type, uuids in uuids_by_type.items():
+        for uuid, resource in bulk_load(resource_type, uuids,
+                                        resource_list).items():
+            resources[(resource_type, uuid)] = resource
+    return resources
+
+
+def find_by_resource_class(resource_class, resource_types=RESOURCE_TYPES):
+    """Find the resources with the given class
+
+    :returns: dict mapping each resource type to a ResourceSet, or to None
+        if resources of that type cannot be searched by class.
+    """
+    found = {}
+    for resource_type in resource_types:
+        resources = get_type(resource_type).find_by_resource_class(
+            resource_class)
+        if resources is not None:
+            for uuid, resource in resources.items():
+                identity_map.add(resource_type, uuid, resource)
+        found[resource_type] = resources
+    return found
+
+
 def get_resource_object(resource_type, resource_ident):
-    return get_type(resource_type)(resource_ident)
+    if not identity_map.active():
+        return get_type(resource_type)(resource_ident)
+
+    resource = identity_map.get(resource_type, resource_ident)
+    if resource is None:
+        resource = get_type(resource_type)(resource_ident)
+        identity_map.add(resource_type, resource.get_uuid(), resource)
+    return resource
@@ -15,11 +15,56 @@ import abc
 from esi_leap.db import api as dbapi
 
 
+class ResourceSet(object):
+    """Resources of a single type loaded together, keyed by uuid."""
+
+    def __init__(self, resource_type, resources):
+        self.resource_type = resource_type
+        self._resources = resources
+
+    def get(self, uuid, default=None):
+        return self._resources.get(uuid, default)
+
+    def items(self):
+        return self._resources.items()
+
+    def __getitem__(self, uuid):
+        return self._resources[uuid]
+
+    def __contains__(self, uuid):
+        return uuid in self._resources
+
+    def __iter__(self):
+        return iter(self._resources.values())
+
+    def __len__(self):
+        return len(self._resources)
+
+
 class ResourceObjectInterface(object, metaclass=abc.ABCMeta):
     dbapi = dbapi.get_instance()
 
     resource_type = 'base'
 
+    @classmethod
+    def bulk_load(cls, uuids, resource_list=None):
+        """Return a ResourceSet holding the resources with the given uuids
+
+        Implementations should fetch the data of all resources in as few
+        calls as possible; by default each resource is built on its own.
+        """
+        return ResourceSet(cls.resource_type,
+                           dict((uuid, cls(uuid)) for uuid in uuids))
+
+    @classmethod
+    def find_by_resource_class(cls, resource_class, resource_list=None):
+        """Return a ResourceSet of the resources with the given class
+
+        Returns None if resources of this type cannot be searched by class;
+        callers then have to check each resource's class themselves.
+        """
+        return None
+
     @abc.abstractmethod
     def get_uuid(self):
         """Return resource's uuid"""
@@ -10,22 +10,141 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
 import json
-import os.path
+import os
+import sqlite3
+import tempfile
 
 from oslo_log import log as logging
+from oslo_utils import excutils
 
 from esi_leap.common import exception
+from esi_leap.common import identity_map
 import esi_leap.conf
 from esi_leap.resource_objects import base
 from esi_leap.resource_objects import error
 
 
 CONF = esi_leap.conf.CONF
-DUMMY_NODE_DIR = CONF.dummy_node.dummy_node_dir
 
 LOG = logging.getLogger(__name__)
 
+# path -> ((inode, mtime, size), node dict)
+_NODE_FILE_CACHE = {}
+_store = None
+
+
+class FileNodeStore(object):
+    """Dummy nodes kept as one JSON file per node.
+
+    Parsed files are cached in process and only re-read once their
+    inode, mtime or size changes. Writes replace the file atomically.
+    """
+
+    def __init__(self, node_dir):
+        self._node_dir = node_dir
+
+    def _path(self, uuid):
+        return os.path.join(self._node_dir, uuid)
+
+    def get(self, uuid):
+        path = self._path(uuid)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+        cached = _NODE_FILE_CACHE.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        try:
+            with open(path) as node_file:
+                node_dict = json.load(node_file)
+        except FileNotFoundError:
+            return None
+        _NODE_FILE_CACHE[path] = (key, node_dict)
+        return node_dict
+
+    def get_many(self, uuids):
+        nodes = {}
+        for uuid in uuids:
+            node_dict = self.get(uuid)
+            if node_dict is not None:
+                nodes[uuid] = node_dict
+        return nodes
+
+    def put(self, uuid, node_dict):
+        path = self._path(uuid)
+        fd, tmp_path = tempfile.mkstemp(dir=self._node_dir,
+                                        prefix='.%s.' % uuid)
+        try:
+            with os.fdopen(fd, 'w') as node_file:
+                json.dump(node_dict, node_file)
+            os.replace(tmp_path, path)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                os.unlink(tmp_path)
+        _NODE_FILE_CACHE.pop(path, None)
+
+
+class SqliteNodeStore(object):
+    """Dummy nodes kept in a single sqlite database, one row per node."""
+
+    # stay below SQLITE_MAX_VARIABLE_NUMBER on older sqlite builds
+    _BATCH_SIZE = 500
+
+    def __init__(self, db_path):
+        self._db_path = db_path
+        with self._connection() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS nodes '
+                         '(uuid TEXT PRIMARY KEY, node TEXT NOT NULL)')
+
+    @contextlib.contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self._db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, uuid):
+        with self._connection() as conn:
+            row = conn.execute('SELECT node FROM nodes WHERE uuid = ?',
+                               (uuid,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def get_many(self, uuids):
+        uuids = list(set(uuids))
+        nodes = {}
+        with self._connection() as conn:
+            for i in range(0, len(uuids), self._BATCH_SIZE):
+                batch = uuids[i:i + self._BATCH_SIZE]
+                rows = conn.execute(
+                    'SELECT uuid, node FROM nodes WHERE uuid IN (%s)' %
+                    ', '.join('?' * len(batch)), batch)
+                for uuid, node in rows:
+                    nodes[uuid] = json.loads(node)
+        return nodes
+
+    def put(self, uuid, node_dict):
+        with self._connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO nodes (uuid, node) '
+                         'VALUES (?, ?)', (uuid, json.dumps(node_dict)))
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if CONF.dummy_node.dummy_node_db:
+            _store = SqliteNodeStore(CONF.dummy_node.dummy_node_db)
+        else:
+            _store = FileNodeStore(CONF.dummy_node.dummy_node_dir)
+    return _store
+
 
 class DummyNode(base.ResourceObjectInterface):
 
@@ -33,7 +152,19 @@ class DummyNode(base.ResourceObjectInterface):
 
     def __init__(self, uuid):
         self._uuid = uuid
-        self._path = os.path.join(DUMMY_NODE_DIR, uuid)
+        self._node = None
+
+    @classmethod
+    def bulk_load(cls, uuids, resource_list=None):
+        uuids = set(uuids)
+        nodes = get_store().get_many(uuids)
+
+        resources = {}
+        for uuid in uuids:
+            resource = cls(uuid)
+            resource._node = nodes.get(uuid)
+            resources[uuid] = resource
+        return base.ResourceSet(cls.resource_type, resources)
 
     def get_uuid(self):
         return self._uuid
@@ -79,27 +210,33 @@ class DummyNode(base.ResourceObjectInterface):
                                    err_val=error.UNKNOWN['provision_state'])
 
     def set_lease(self, lease):
-        node_dict = self._get_node()
+        # copy, the store may hand out cached dicts
+        node_dict = dict(self._get_node())
         node_dict['lease_uuid'] = lease.uuid
         node_dict['project_id'] = lease.project_id
-        with open(self._path, 'w') as node_file:
-            json.dump(node_dict, node_file)
+        self._put_node(node_dict)
 
     def remove_lease(self, lease):
-        node_dict = self._get_node()
+        node_dict = dict(self._get_node())
         node_dict.pop('lease_uuid', None)
         node_dict.pop('project_id', None)
-        with open(self._path, 'w') as node_file:
-            json.dump(node_dict, node_file)
+        self._put_node(node_dict)
 
     def _get_node(self):
-        try:
-            with open(self._path) as node_file:
-                return json.load(node_file)
-        except FileNotFoundError as e:
+        if self._node is not None:
+            return self._node
+        node_dict = get_store().get(self._uuid)
+        if node_dict is None:
             raise exception.NodeNotFound(uuid=self._uuid,
                                          resource_type=self.resource_type,
-                                         err=str(e))
+                                         err='No such dummy node')
+        return node_dict
+
+    def _put_node(self, node_dict):
+        get_store().put(self._uuid, node_dict)
+        if self._node is not None:
+            self._node = node_dict
+        identity_map.invalidate(self.resource_type, self._uuid)
 
     def _get_node_attr(self, attr, default=None, resource_list=None,
                        err_val=None, err_msg=None):
@@ -15,6 +15,7 @@ from oslo_log import log as logging
 from oslo_utils.uuidutils import is_uuid_like
 
 from esi_leap.common import exception
+from esi_leap.common import identity_map
 from esi_leap.common import ironic
 import esi_leap.conf
 from esi_leap.resource_objects import base
@@ -46,6 +47,35 @@ class IronicNode(base.ResourceObjectInterface):
             self._node = None
             self._uuid = ident
 
+    @classmethod
+    def bulk_load(cls, uuids, resource_list=None):
+        uuids = set(uuids)
+        if uuids and resource_list is None:
+            resource_list = ironic.get_node_list()
+        nodes = dict((node.uuid, node) for node in resource_list or ()
+                     if node.uuid in uuids)
+
+        resources = {}
+        for uuid in uuids:
+            resource = cls(uuid)
+            resource._node = nodes.get(uuid)
+            resources[uuid] = resource
+        return base.ResourceSet(cls.resource_type, resources)
+
+    @classmethod
+    def find_by_resource_class(cls, resource_class, resource_list=None):
+        if resource_list is None:
+            resource_list = ironic.get_node_list(
+                resource_class=resource_class)
+
+        resources = {}
+        for node in resource_list:
+            if node.resource_class == resource_class:
+                resource = cls(node.uuid)
+                resource._node = node
+                resources[node.uuid] = resource
+        return base.ResourceSet(cls.resource_type, resources)
+
     def get_uuid(self):
         return self._uuid
 
@@ -109,6 +139,7 @@ class IronicNode(base.ResourceObjectInterface):
             'value': lease.project_id,
         })
         get_ironic_client().node.update(self._uuid, patches)
+        identity_map.invalidate(self.resource_type, self._uuid)
 
     def remove_lease(self, lease):
         patches = []
@@ -127,6 +158,7 @@ class IronicNode(base.ResourceObjectInterface):
             })
         if len(patches) > 0:
             get_ironic_client().node.update(self._uuid, patches)
+            identity_map.invalidate(self.resource_type, self._uuid)
         state = self._get_node().provision_state
         if state == 'active':
             get_ironic_client().node.set_provision_state(self._uuid, 'deleted')
@@ -10,13 +10,18 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 import mock
+from oslo_utils import uuidutils
 import pecan
 import pecan.testing
 import tempfile
 
 from esi_leap.api import app
+from esi_leap.common import statuses
 import esi_leap.conf
+from esi_leap.objects import lease
+from esi_leap.objects import offer
 from esi_leap.tests import base
 
 
@@ -164,3 +169,32 @@ class APITestCase(base.DBTestCase):
             expect_errors=expect_errors
         )
         return response
+
+
+class FreeBusyTestCase(APITestCase):
+    """Two offers on test nodes and a lease on the first one."""
+
+    def setUp(self):
+        super(FreeBusyTestCase, self).setUp()
+        self.offers = []
+        for resource_uuid, day in (('111', 1), ('222', 2)):
+            o = offer.Offer(
+                uuid=uuidutils.generate_uuid(),
+                project_id='ownerid',
+                resource_type='test_node',
+                resource_uuid=resource_uuid,
+                start_time=datetime.datetime(2016, 7, day),
+                end_time=datetime.datetime(2016, 7, 5),
+                status=statuses.AVAILABLE)
+            o.create()
+            self.offers.append(o)
+        lease.Lease(
+            uuid=uuidutils.generate_uuid(),
+            offer_uuid=self.offers[0].uuid,
+            project_id='lesseeid',
+            owner_id='ownerid',
+            resource_type='test_node',
+            resource_uuid='111',
+            start_time=datetime.datetime(2016, 7, 3),
+            end_time=datetime.datetime(2016, 7, 3, 12),
+            status=statuses.CREATED).create()
@@ -0,0 +1,184 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import json
+
+import mock
+import msgpack
+import wsme.rest.json
+from wsme import types as wtypes
+
+from esi_leap.api.controllers import render
+from esi_leap.api.controllers.v1 import event
+from esi_leap.api.controllers.v1 import lease
+from esi_leap.api.controllers.v1 import offer
+from esi_leap.tests import base
+
+
+start = datetime.datetime(2016, 7, 16, 19, 20, 30)
+end = datetime.datetime(2016, 8, 16, 19, 20, 30, 123456)
+
+lease_dict = {
+    'id': 1,
+    'name': 'lease',
+    'uuid': '11111111-1111-1111-1111-111111111111',
+    'project_id': 'lessee-id',
+    'project': 'lessee',
+    'owner_id': 'owner-id',
+    'owner': 'owner',
+    'resource_type': 'ironic_node',
+    'resource_uuid': 'node-uuid',
+    'resource_class': 'baremetal',
+    'resource_properties': {'cpu': '40', 'traits': ['trait1']},
+    'resource': 'node',
+    'start_time': start,
+    'fulfill_time': start,
+    'expire_time': None,
+    'end_time': end,
+    'status': 'active',
+    'properties': {},
+    'purpose': None,
+    'offer_uuid': '22222222-2222-2222-2222-222222222222',
+    'parent_lease_uuid': None,
+    'created_at': start,
+    'updated_at': None,
+}
+
+offer_dict = {
+    'id': 2,
+    'name': 'offer',
+    'uuid': '22222222-2222-2222-2222-222222222222',
+    'project_id': 'owner-id',
+    'project': 'owner',
+    'lessee_id': None,
+    'lessee': None,
+    'resource_type': 'ironic_node',
+    'resource_uuid': 'node-uuid',
+    'resource': 'node',
+    'resource_class': 'baremetal',
+    'resource_properties': {'cpu': '40'},
+    'start_time': start,
+    'end_time': datetime.datetime.max,
+    'status': 'available',
+    'properties': {'floor': 3},
+    'availabilities': [[start, end], [end, datetime.datetime.max]],
+    'parent_lease_uuid': None,
+}
+
+event_dict = {
+    'id': 3,
+    'event_type': 'esi_leap.lease.fulfill.end',
+    'event_time': end,
+    'object_type': 'lease',
+    'object_uuid': '11111111-1111-1111-1111-111111111111',
+    'resource_type': 'ironic_node',
+    'resource_uuid': 'node-uuid',
+    'lessee_id': 'lessee-id',
+    'owner_id': 'owner-id',
+}
+
+golden_lease = {
+    'name': 'lease',
+    'uuid': '11111111-1111-1111-1111-111111111111',
+    'project_id': 'lessee-id',
+    'project': 'lessee',
+    'owner_id': 'owner-id',
+    'owner': 'owner',
+    'resource_type': 'ironic_node',
+    'resource_uuid': 'node-uuid',
+    'resource_class': 'baremetal',
+    'resource_properties': {'cpu': '40', 'traits': ['trait1']},
+    'resource': 'node',
+    'start_time': '2016-07-16T19:20:30',
+    'fulfill_time': '2016-07-16T19:20:30',
+    'expire_time': None,
+    'end_time': '2016-08-16T19:20:30.123456',
+    'status': 'active',
+    'properties': {},
+    'purpose': None,
+    'offer_uuid': '22222222-2222-2222-2222-222222222222',
+    'parent_lease_uuid': None,
+}
+
+
+def _render_json(result):
+    return json.loads(render.JSONRenderer(None, None).render(
+        None, {'result': result}))
+
+
+def _render_msgpack(result):
+    return msgpack.unpackb(render.MsgpackRenderer(None, None).render(
+        None, {'result': result}))
+
+
+def _render_wsme(collection_type, name, item_type, items):
+    collection = collection_type()
+    setattr(collection, name, [item_type(**d) for d in items])
+    return json.loads(wsme.rest.json.encode_result(collection,
+                                                   collection_type))
+
+
+class TestRender(base.TestCase):
+
+    def test_item(self):
+        d = {'name': 'lease', 'id': 1, 'status': wtypes.Unset,
+             'purpose': None}
+        self.assertEqual({'name': 'lease', 'purpose': None},
+                         render.item(lease.Lease, d))
+
+    def test_golden_lease(self):
+        result = {'leases': [render.item(lease.Lease, lease_dict)]}
+        self.assertEqual({'leases': [golden_lease]}, _render_json(result))
+
+    def test_same_as_wsme(self):
+        for collection_type, name, item_type, d in (
+                (lease.LeaseCollection, 'leases', lease.Lease, lease_dict),
+                (offer.OfferCollection, 'offers', offer.Offer, offer_dict),
+                (event.EventCollection, 'events', event.Event, event_dict)):
+            partial = dict((k, v) for k, v in d.items()
+                           if k not in ('name', 'status'))
+            items = [d, partial]
+            result = {name: [render.item(item_type, i) for i in items]}
+
+            expected = _render_wsme(collection_type, name, item_type, items)
+            self.assertEqual(expected, _render_json(result))
+            self.assertEqual(expected, _render_msgpack(result))
+
+    def test_msgpack_error(self):
+        fault = {'faultcode': 'Client', 'faultstring': 'bad',
+                 'debuginfo': None}
+        self.assertEqual(fault, msgpack.unpackb(
+            render.MsgpackRenderer(None, None).render(None, fault)))
+
+    def test_json_chunks(self):
+        chunks = render._json_chunks(
+            lease.Lease, 'leases', render._encode_batch(lease.Lease, []),
+            iter([[lease_dict], [], [lease_dict]]))
+
+        self.assertEqual({'leases': [golden_lease, golden_lease]},
+                         json.loads(b''.join(chunks)))
+
+    @mock.patch.object(render, 'LOG', autospec=True)
+    def test_json_chunks_error(self, mock_log):
+        def batches():
+            yield [lease_dict]
+            raise Exception('boom')
+
+        chunks = render._json_chunks(
+            lease.Lease, 'leases',
+            render._encode_batch(lease.Lease, [lease_dict]), batches())
+
+        self.assertEqual({'leases': [golden_lease, golden_lease],
+                          'error': render._STREAM_ERROR},
+                         json.loads(b''.join(chunks)))
+        mock_log.exception.assert_called_once()
@@ -0,0 +1,67 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import http.client as http_client
+
+from esi_leap.tests.api import base as test_api_base
+
+
+class TestCalendarController(test_api_base.FreeBusyTestCase):
+
+    def test_get_all(self):
+        data = self.get_json('/calendar?start_time=2016-07-01T00:00:00'
+                             '&end_time=2016-07-06T00:00:00'
+                             '&granularity=1440')
+
+        self.assertEqual([
+            {'resource_type': 'test_node', 'resource_uuid': '111',
+             'free': '11010', 'busy': '00100'},
+            {'resource_type': 'test_node', 'resource_uuid': '222',
+             'free': '01110', 'busy': '00000'},
+        ], data['calendar'])
+
+    def test_get_all_intervals(self):
+        data = self.get_json('/calendar?start_time=2016-07-01T00:00:00'
+                             '&end_time=2016-07-06T00:00:00'
+                             '&granularity=1440&format=intervals'
+                             '&resource_type=test_node&resource_class=fake')
+
+        self.assertEqual([
+            ['2016-07-01T00:00:00', '2016-07-03T00:00:00'],
+            ['2016-07-04T00:00:00', '2016-07-05T00:00:00'],
+        ], data['calendar'][0]['free'])
+        self.assertEqual([['2016-07-03T00:00:00', '2016-07-04T00:00:00']],
+                         data['calendar'][0]['busy'])
+        self.assertEqual(2, len(data['calendar']))
+
+    def test_get_all_resource_class(self):
+        data = self.get_json('/calendar?start_time=2016-07-01T00:00:00'
+                             '&end_time=2016-07-06T00:00:00'
+                             '&resource_type=test_node&resource_class=other')
+
+        self.assertEqual([], data['calendar'])
+
+    def test_get_all_no_end_time(self):
+        request = self.get_json('/calendar?start_time=2016-07-01T00:00:00',
+                                expect_errors=True)
+
+        self.assertIn('without providing both a valid Start Time and End '
+                      'Time', request.json['faultstring'])
+
+    def test_get_all_invalid(self):
+        for query in ('end_time=2016-07-06T00:00:00&granularity=0',
+                      'end_time=2016-07-06T00:00:00&format=png',
+                      'end_time=2036-07-06T00:00:00&granularity=1'):
+            request = self.get_json(
+                '/calendar?start_time=2016-07-01T00:00:00&' + query,
+                expect_errors=True)
+            self.assertEqual(http_client.BAD_REQUEST, request.status_int)
@@ -0,0 +1,51 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import http.client as http_client
+import mock
+
+from esi_leap.objects import offer
+from esi_leap.tests.api import base as test_api_base
+
+
+class TestCapacityController(test_api_base.FreeBusyTestCase):
+
+    def test_get_all(self):
+        data = self.get_json('/capacity?start_time=2016-07-01T00:00:00'
+                             '&end_time=2016-07-06T00:00:00'
+                             '&granularity=1440&resource_type=test_node')
+
+        self.assertEqual([{'resource_class': 'fake',
+                           'free': [1, 2, 1, 2, 0]}],
+                         data['capacity'])
+
+    def test_get_all_versions_once(self):
+        with mock.patch.object(offer.Offer, 'get_version',
+                               wraps=offer.Offer.get_version) as mock_gv:
+            self.get_json('/capacity?start_time=2016-07-01T00:00:00'
+                          '&end_time=2016-07-06T00:00:00')
+
+        mock_gv.assert_called_once()
+
+    def test_get_all_resource_class(self):
+        data = self.get_json('/capacity?start_time=2016-07-01T00:00:00'
+                             '&end_time=2016-07-06T00:00:00'
+                             '&resource_type=test_node&resource_class=other')
+
+        self.assertEqual([], data['capacity'])
+
+    def test_get_all_invalid(self):
+        request = self.get_json('/capacity?start_time=2016-07-01T00:00:00'
+                                '&end_time=2016-07-06T00:00:00'
+                                '&granularity=-60', expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
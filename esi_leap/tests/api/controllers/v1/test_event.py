@@ -11,7 +11,9 @@
 #    under the License.
 
 from datetime import datetime
+import http.client as http_client
 import mock
+import msgpack
 
 from esi_leap.common import exception
 from esi_leap.resource_objects.test_node import TestNode
@@ -98,3 +100,42 @@ class TestEventsController(test_api_base.APITestCase):
         mock_ega.assert_called_once_with(expected_filters, self.context)
 
         self.assertEqual(data['events'][0]['id'], 1)
+
+    @mock.patch('esi_leap.api.controllers.v1.utils.policy_authorize')
+    @mock.patch('esi_leap.objects.event.Event.get_all')
+    def test_get_all_fields(self, mock_ega, mock_pa):
+        mock_ega.return_value = [FakeEvent()]
+
+        data = self.get_json('/events?fields=id,event_type')
+
+        self.assertEqual([{'id': 1, 'event_type': 'fake:event'}],
+                         data['events'])
+
+    @mock.patch('esi_leap.objects.event.Event.get_all_batches')
+    @mock.patch('esi_leap.objects.event.Event.get_all')
+    def test_get_all_stream(self, mock_ega, mock_egab):
+        self.config(stream_batch_size=2, group='api')
+        events = [FakeEvent(), FakeEvent(), FakeEvent()]
+        for i, event in enumerate(events):
+            event.id = i + 1
+        mock_ega.return_value = events
+        mock_egab.return_value = iter([events[:2], events[2:]])
+        data = self.get_json('/events')
+
+        response = self.get_json('/events?stream=true', expect_errors=True)
+
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual(data, response.json)
+        self.assertEqual([1, 2, 3], [e['id'] for e in data['events']])
+        mock_egab.assert_called_once_with({}, 2, self.context)
+
+    @mock.patch('esi_leap.objects.event.Event.get_all_batches')
+    def test_get_all_stream_msgpack(self, mock_egab):
+        mock_egab.return_value = iter([[FakeEvent()], [FakeEvent()]])
+
+        response = self.get_json(
+            '/events?stream=true', expect_errors=True,
+            headers={'Accept': 'application/x-msgpack'})
+
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual(2, len(msgpack.unpackb(response.body)['events']))
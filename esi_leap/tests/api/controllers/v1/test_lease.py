@@ -13,24 +13,29 @@
 import datetime
 import http.client as http_client
 import mock
+import msgpack
 from oslo_context import context as ctx
 from oslo_utils import uuidutils
-import testtools
 
 from esi_leap.api.controllers.v1.lease import LeasesController
 from esi_leap.common import constants
 from esi_leap.common import exception
 from esi_leap.common import statuses
 from esi_leap.objects import lease as lease_obj
+from esi_leap.objects import offer as offer_obj
 from esi_leap.resource_objects.ironic_node import IronicNode
 from esi_leap.resource_objects.test_node import TestNode
 from esi_leap.tests.api import base as test_api_base
+from esi_leap.tests import base
 
 
 class TestLeasesController(test_api_base.APITestCase):
 
     def setUp(self):
         super(TestLeasesController, self).setUp()
+        # always fetch the full node and project lists
+        self.config(bulk_threshold=0, group='ironic')
+        self.config(bulk_threshold=0, group='keystone')
 
         self.test_lease = lease_obj.Lease(
             start_time=datetime.datetime(2016, 7, 16, 19, 20, 30),
@@ -67,6 +72,75 @@ class TestLeasesController(test_api_base.APITestCase):
         data = self.get_json('/leases')
         self.assertEqual([], data['leases'])
 
+    @mock.patch('esi_leap.common.enrichment.fetch')
+    @mock.patch('esi_leap.api.controllers.v1.utils.'
+                'lease_get_dict_with_added_info')
+    @mock.patch('esi_leap.api.controllers.v1.utils.'
+                'check_lease_policy_and_retrieve')
+    def test_get_one(self, mock_clpar, mock_lgdwai, mock_fetch):
+        self.test_lease_1.updated_at = None
+        mock_clpar.return_value = self.test_lease_1
+        mock_lgdwai.return_value = self.test_lease_1.to_dict()
+        mock_fetch.return_value = (['node'], ['project'])
+
+        self.get_json('/leases/' + self.test_lease_1.uuid)
+
+        mock_clpar.assert_called_once_with(self.context,
+                                           'esi_leap:lease:get',
+                                           self.test_lease_1.uuid)
+        mock_fetch.assert_called_once_with(['222'], {'lesseeid', 'ownerid'})
+        mock_lgdwai.assert_called_once_with(self.test_lease_1, ['project'],
+                                            ['node'])
+
+    @mock.patch('esi_leap.objects.lease.Lease.get_version')
+    @mock.patch('esi_leap.common.enrichment.fetch')
+    @mock.patch('esi_leap.api.controllers.v1.utils.'
+                'lease_get_dict_with_added_info')
+    @mock.patch('esi_leap.api.controllers.v1.utils.'
+                'check_lease_policy_and_retrieve')
+    def test_get_one_not_modified(self, mock_clpar, mock_lgdwai, mock_fetch,
+                                  mock_lgv):
+        mock_lgv.return_value = (1, 1, 0, 0, 0)
+        mock_clpar.return_value = self.test_lease_1
+        mock_lgdwai.return_value = self.test_lease_1.to_dict()
+        mock_fetch.return_value = ([], [])
+        path = '/leases/' + self.test_lease_1.uuid
+
+        response = self.get_json(path, expect_errors=True)
+        self.assertEqual(http_client.OK, response.status_int)
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        mock_fetch.reset_mock()
+
+        response = self.get_json(path, expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.NOT_MODIFIED, response.status_int)
+        self.assertEqual(b'', response.body)
+        mock_fetch.assert_not_called()
+        mock_lgv.assert_called_with({'uuid': self.test_lease_1.uuid})
+
+        # an update bumps the revision even within the same updated_at
+        mock_lgv.return_value = (1, 1, 1, 0, 0)
+        response = self.get_json(path, expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    def test_get_all_not_modified(self, mock_ga):
+        mock_ga.return_value = []
+
+        etag = self.get_json('/leases', expect_errors=True).headers['ETag']
+        response = self.get_json('/leases', expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.NOT_MODIFIED, response.status_int)
+        mock_ga.assert_called_once()
+
+        # other query parameters get a different ETag
+        response = self.get_json('/leases?status=any', expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.OK, response.status_int)
+
     @mock.patch('esi_leap.common.ironic.get_node_list')
     @mock.patch('esi_leap.common.keystone.get_project_list')
     @mock.patch('esi_leap.api.controllers.v1.utils.'
@@ -83,9 +157,86 @@ class TestLeasesController(test_api_base.APITestCase):
         self.assertEqual(self.test_lease.uuid,
                          data['leases'][0]['uuid'])
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         mock_lgdwai.assert_called_once()
 
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.api.controllers.v1.utils.'
+                'lease_get_dict_with_added_info')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    def test_get_all_msgpack(self, mock_ga, mock_lgdwai, mock_gpl):
+        mock_ga.return_value = [self.test_lease]
+        mock_lgdwai.return_value = self.test_lease.to_dict()
+        mock_gpl.return_value = []
+
+        data = self.get_json('/leases')
+        response = self.get_json(
+            '/leases', expect_errors=True,
+            headers={'Accept': 'application/x-msgpack'})
+
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual('application/x-msgpack', response.content_type)
+        self.assertEqual(data, msgpack.unpackb(response.body))
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all_batches')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    def test_get_all_stream(self, mock_ga, mock_gab, mock_gpl):
+        self.config(stream_batch_size=1, group='api')
+        mock_ga.return_value = [self.test_lease, self.test_lease_1]
+        mock_gab.return_value = iter([[self.test_lease],
+                                      [self.test_lease_1]])
+        mock_gpl.return_value = []
+        data = self.get_json('/leases?fields=uuid,project')
+
+        response = self.get_json('/leases?fields=uuid,project&stream=true',
+                                 expect_errors=True)
+
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual('application/json', response.content_type)
+        self.assertEqual(data, response.json)
+        mock_gab.assert_called_once_with(
+            mock.ANY, 1, self.context, read_only=True)
+        # projects are fetched for each batch
+        self.assertEqual(3, mock_gpl.call_count)
+
+    @mock.patch('esi_leap.objects.lease.Lease.get_all_batches')
+    def test_get_all_stream_empty(self, mock_gab):
+        mock_gab.return_value = iter([])
+
+        response = self.get_json('/leases?stream=true', expect_errors=True)
+
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual({'leases': []}, response.json)
+
+    @mock.patch('esi_leap.objects.lease.Lease.get_all_batches')
+    def test_get_all_stream_first_batch_error(self, mock_gab):
+        mock_gab.side_effect = Exception('boom')
+
+        response = self.get_json('/leases?stream=true', expect_errors=True)
+
+        self.assertEqual(http_client.INTERNAL_SERVER_ERROR,
+                         response.status_int)
+        self.assertNotIn('leases', response.json)
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all_batches')
+    def test_get_all_stream_error(self, mock_gab, mock_gpl):
+        def batches(*args, **kwargs):
+            yield [self.test_lease]
+            raise Exception('boom')
+
+        mock_gab.side_effect = batches
+        mock_gpl.return_value = []
+
+        response = self.get_json('/leases?fields=uuid&stream=true',
+                                 expect_errors=True)
+
+        self.assertEqual(http_client.OK, response.status_int)
+        self.assertEqual([{'uuid': self.test_lease.uuid}],
+                         response.json['leases'])
+        self.assertEqual('Server', response.json['error']['faultcode'])
+
     @mock.patch('esi_leap.api.controllers.v1.utils.'
                 'lease_get_dict_with_added_info')
     @mock.patch('esi_leap.api.controllers.v1.lease.get_resource_object')
@@ -369,9 +520,66 @@ class TestLeasesController(test_api_base.APITestCase):
                                            resource_uuid=None)
         mock_get_all.assert_called_once()
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         self.assertEqual(2, mock_lgdwai.call_count)
 
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.api.controllers.v1.lease.LeasesController.'
+                '_lease_get_all_authorize_filters')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    def test_get_no_detail(self, mock_get_all, mock_lgaaf, mock_gpl,
+                           mock_gnl):
+        mock_get_all.return_value = [self.test_lease]
+
+        data = self.get_json('/leases?detail=false')
+
+        mock_gpl.assert_not_called()
+        mock_gnl.assert_not_called()
+        self.assertEqual(self.test_lease.uuid, data['leases'][0]['uuid'])
+        for attr in ('project', 'owner', 'resource', 'resource_class',
+                     'resource_properties'):
+            self.assertNotIn(attr, data['leases'][0])
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.api.controllers.v1.lease.LeasesController.'
+                '_lease_get_all_authorize_filters')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    def test_get_fields(self, mock_get_all, mock_lgaaf, mock_gpl, mock_gnl):
+        mock_get_all.return_value = [self.test_lease]
+        mock_gpl.return_value = [mock.Mock(id='ownerid')]
+        mock_gpl.return_value[0].name = 'owner-name'
+
+        data = self.get_json('/leases?fields=uuid,owner')
+
+        mock_gpl.assert_called_once()
+        mock_gnl.assert_not_called()
+        self.assertEqual({'uuid': self.test_lease.uuid, 'owner': 'owner-name'},
+                         data['leases'][0])
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.api.controllers.v1.lease.LeasesController.'
+                '_lease_get_all_authorize_filters')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    def test_get_fields_resource_class_filter(self, mock_get_all, mock_lgaaf,
+                                              mock_gpl, mock_gnl):
+        mock_get_all.return_value = [self.test_lease]
+        mock_gnl.return_value = []
+
+        data = self.get_json('/leases?fields=uuid&resource_class=fake')
+
+        mock_gpl.assert_not_called()
+        self.assertEqual([mock.call(resource_class='fake')],
+                         mock_gnl.call_args_list)
+        self.assertEqual([{'uuid': self.test_lease.uuid}], data['leases'])
+
+    def test_get_invalid_fields(self):
+        request = self.get_json('/leases?fields=uuid,bogus',
+                                expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
     @mock.patch('esi_leap.common.ironic.get_node_list')
     @mock.patch('esi_leap.common.keystone.get_project_list')
     @mock.patch('esi_leap.api.controllers.v1.utils.'
@@ -402,7 +610,7 @@ class TestLeasesController(test_api_base.APITestCase):
                                            resource_uuid=None)
         mock_get_all.assert_called_once()
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         self.assertEqual(2, mock_lgdwai.call_count)
 
     @mock.patch('esi_leap.common.ironic.get_node_list')
@@ -437,7 +645,7 @@ class TestLeasesController(test_api_base.APITestCase):
 
         mock_get_all.assert_called_once()
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         self.assertEqual(2, mock_lgdwai.call_count)
 
     @mock.patch('esi_leap.common.ironic.get_node_list')
@@ -472,7 +680,7 @@ class TestLeasesController(test_api_base.APITestCase):
 
         mock_get_all.assert_called_once()
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         self.assertEqual(2, mock_lgdwai.call_count)
 
     @mock.patch('esi_leap.common.ironic.get_node_list')
@@ -532,11 +740,38 @@ class TestLeasesController(test_api_base.APITestCase):
                                            resource_uuid=None)
 
         mock_get_all.assert_called_once()
+        mock_lgaaf.return_value.__setitem__.assert_called_once_with(
+            'resources', {'dummy_node': None, 'ironic_node': [],
+                          'test_node': None})
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        self.assertEqual([mock.call(resource_class='fake')],
+                         mock_gnl.call_args_list)
         self.assertEqual(2, mock_lgdwai.call_count)
         self.assertEqual(response, expected_resp)
 
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    def test_get_resource_class_filter_ironic(self, mock_get_all, mock_gpl,
+                                              mock_gnl):
+        node_uuid = uuidutils.generate_uuid()
+        fake_node = mock.Mock(uuid=node_uuid, resource_class='baremetal',
+                              properties={}, traits=[])
+        fake_node.name = 'node-name'
+        self.test_lease_1.resource_uuid = node_uuid
+        mock_get_all.return_value = [self.test_lease_1]
+        mock_gpl.return_value = []
+        mock_gnl.return_value = [fake_node]
+
+        data = self.get_json('/leases?resource_class=baremetal'
+                             '&resource_type=ironic_node')
+
+        mock_gnl.assert_called_once_with(resource_class='baremetal')
+        filters = mock_get_all.call_args[0][0]
+        self.assertEqual({'ironic_node': [node_uuid]}, filters['resources'])
+        self.assertEqual('node-name', data['leases'][0]['resource'])
+        self.assertEqual('baremetal', data['leases'][0]['resource_class'])
+
     @mock.patch('esi_leap.common.ironic.get_node_list')
     @mock.patch('esi_leap.common.keystone.get_project_list')
     @mock.patch('esi_leap.api.controllers.v1.utils.'
@@ -571,7 +806,7 @@ class TestLeasesController(test_api_base.APITestCase):
 
         mock_get_all.assert_called_once()
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         self.assertEqual(2, mock_lgdwai.call_count)
 
     @mock.patch('esi_leap.api.controllers.v1.utils.'
@@ -588,8 +823,112 @@ class TestLeasesController(test_api_base.APITestCase):
                                            statuses.LEASE_CAN_DELETE)
         mock_cancel.assert_called_once()
 
+    def _create_group_offers(self, *resource_uuids):
+        offers = []
+        for resource_uuid in resource_uuids:
+            o = offer_obj.Offer(
+                uuid=uuidutils.generate_uuid(),
+                project_id='ownerid',
+                resource_type='test_node',
+                resource_uuid=resource_uuid,
+                start_time=datetime.datetime(2016, 7, 1),
+                end_time=datetime.datetime(2016, 9, 1),
+                status=statuses.AVAILABLE)
+            o.create()
+            offers.append(o)
+        return offers
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_group(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = self._create_group_offers('111', '222')
+        data = {
+            'offer_uuids': [o.uuid for o in offers],
+            'start_time': '2016-07-16T19:20:30',
+            'end_time': '2016-08-16T19:20:30',
+        }
+
+        request = self.post_json('/leases/group', data)
+
+        self.assertEqual(http_client.CREATED, request.status_int)
+        leases = request.json['leases']
+        self.assertEqual([o.uuid for o in offers],
+                         [l['offer_uuid'] for l in leases])
+        group_id = leases[0]['group_id']
+        self.assertTrue(uuidutils.is_uuid_like(group_id))
+        self.assertEqual([group_id, group_id],
+                         [l['group_id'] for l in leases])
+        self.assertEqual(2, len(lease_obj.Lease.get_all(
+            {'group_id': group_id})))
+
+        data = self.get_json('/leases?group_id=%s&status=any' % group_id)
+        self.assertEqual(2, len(data['leases']))
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_group_resource_class(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = self._create_group_offers('111', '222', '333')
+        data = {
+            'count': 2,
+            'resource_type': 'test_node',
+            'resource_class': 'fake',
+            'start_time': '2016-07-16T19:20:30',
+            'end_time': '2016-08-16T19:20:30',
+        }
+
+        request = self.post_json('/leases/group', data)
+
+        self.assertEqual(http_client.CREATED, request.status_int)
+        leases = request.json['leases']
+        self.assertEqual(2, len(leases))
+        self.assertTrue(set(l['offer_uuid'] for l in leases) <=
+                        set(o.uuid for o in offers))
+        self.assertEqual(2, len(set(l['resource_uuid'] for l in leases)))
+
+    def test_group_not_enough_offers(self):
+        self._create_group_offers('111')
+        data = {
+            'count': 2,
+            'resource_type': 'test_node',
+            'resource_class': 'fake',
+            'start_time': '2016-07-16T19:20:30',
+            'end_time': '2016-08-16T19:20:30',
+        }
+
+        request = self.post_json('/leases/group', data, expect_errors=True)
+
+        self.assertEqual(http_client.CONFLICT, request.status_int)
+        self.assertEqual([], lease_obj.Lease.get_all({}))
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_group_conflict(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = self._create_group_offers('111', '222')
+        data = {
+            'offer_uuids': [o.uuid for o in offers],
+            'start_time': '2016-07-16T19:20:30',
+            'end_time': '2016-08-16T19:20:30',
+        }
+        self.post_json('/leases/group', {
+            'offer_uuids': [offers[1].uuid],
+            'start_time': '2016-08-01T00:00:00',
+            'end_time': '2016-08-20T00:00:00'})
+
+        request = self.post_json('/leases/group', data, expect_errors=True)
+
+        self.assertIn('has no availabilities',
+                      request.json['faultstring'])
+        # the free offer was not leased either
+        self.assertEqual([], lease_obj.Lease.get_all(
+            {'offer_uuid': offers[0].uuid}))
+
+    def test_group_empty(self):
+        request = self.post_json('/leases/group', {}, expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
 
-class TestLeaseControllersGetAllFilters(testtools.TestCase):
+class TestLeaseControllersGetAllFilters(base.TestCase):
 
     def setUp(self):
         super(TestLeaseControllersGetAllFilters, self).setUp()
@@ -10,22 +10,41 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from datetime import datetime
+from datetime import timedelta
+import http.client as http_client
 import mock
 
+from esi_leap.common import statuses
 from esi_leap.tests.api import base as test_api_base
 
 
 class FakeIronicNode(object):
-    def __init__(self):
+    def __init__(self, uuid='fake-uuid'):
         self.name = 'fake-node'
         self.owner = 'fake-project-uuid'
-        self.uuid = 'fake-uuid'
+        self.uuid = uuid
         self.properties = {'lease_uuid': 'fake-lease-uuid', 'cpu': '40'}
         self.traits = ['trait1', 'trait2']
         self.lessee = 'fake-project-uuid'
         self.maintenance = False
         self.provision_state = 'active'
         self.resource_class = 'baremetal'
+        self.updated_at = '2016-07-16T19:20:30+00:00'
+
+
+class FakeOffer(object):
+    def __init__(self, uuid, resource_uuid, start_time, end_time):
+        self.uuid = uuid
+        self.resource_uuid = resource_uuid
+        self.start_time = start_time
+        self.end_time = end_time
+
+
+class FakeLease(object):
+    def __init__(self, uuid, resource_uuid):
+        self.uuid = uuid
+        self.resource_uuid = resource_uuid
 
 
 class FakeProject(object):
@@ -65,3 +84,138 @@ class TestNodesController(test_api_base.APITestCase):
         self.assertEqual(data['nodes'][0]['lessee'], 'fake-project')
         self.assertEqual(data['nodes'][0]['properties'], {
             'cpu': '40', 'traits': ['trait1', 'trait2']})
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.objects.offer.Offer.get_all')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_get_all_offers_and_leases(self, mock_gpl, mock_lga, mock_oga,
+                                       mock_gnl):
+        now = datetime.now()
+        past = now - timedelta(days=1)
+        future = now + timedelta(days=1)
+        mock_gnl.return_value = [FakeIronicNode('node-1'),
+                                 FakeIronicNode('node-2')]
+        mock_oga.return_value = [
+            FakeOffer('offer-1', 'node-1', past, future),
+            FakeOffer('offer-2', 'node-1', future, future),
+            FakeOffer('offer-3', 'node-1', future, future),
+            FakeOffer('offer-4', 'node-2', future, future)]
+        mock_lga.return_value = [FakeLease('lease-1', 'node-2'),
+                                 FakeLease('lease-2', 'node-2')]
+        mock_gpl.return_value = []
+
+        data = self.get_json('/nodes')
+
+        mock_oga.assert_called_once_with({'status': [statuses.AVAILABLE]},
+                                         self.context, read_only=True)
+        mock_lga.assert_called_once_with({'status': [statuses.CREATED]},
+                                         self.context, read_only=True)
+        node_1, node_2 = data['nodes']
+        self.assertEqual('offer-1', node_1['offer_uuid'])
+        self.assertEqual('offer-2 offer-3', node_1['future_offers'])
+        self.assertEqual('', node_1['future_leases'])
+        self.assertNotIn('offer_uuid', node_2)
+        self.assertEqual('offer-4', node_2['future_offers'])
+        self.assertEqual('lease-1 lease-2', node_2['future_leases'])
+
+    @mock.patch('esi_leap.common.keystone.get_project_uuid_from_ident')
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.objects.offer.Offer.get_all')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_get_all_filters(self, mock_gpl, mock_lga, mock_oga, mock_gnl,
+                             mock_gpufi):
+        mock_gpufi.return_value = 'owner-uuid'
+        mock_gnl.return_value = [FakeIronicNode()]
+        mock_oga.return_value = []
+        mock_lga.return_value = []
+        mock_gpl.return_value = []
+
+        data = self.get_json('/nodes?owner=owner-name'
+                             '&resource_class=baremetal'
+                             '&provision_state=active')
+
+        mock_gpufi.assert_called_once_with('owner-name')
+        mock_gnl.assert_called_once_with(self.context,
+                                         owner='owner-uuid',
+                                         resource_class='baremetal',
+                                         provision_state='active')
+        mock_oga.assert_called_once_with(
+            {'status': [statuses.AVAILABLE], 'resource_uuids': ['fake-uuid']},
+            self.context, read_only=True)
+        mock_lga.assert_called_once_with(
+            {'status': [statuses.CREATED], 'resource_uuids': ['fake-uuid']},
+            self.context, read_only=True)
+        self.assertNotIn('next', data)
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.objects.offer.Offer.get_all')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_get_all_pagination(self, mock_gpl, mock_lga, mock_oga,
+                                mock_gnl):
+        mock_gnl.return_value = [FakeIronicNode('node-1'),
+                                 FakeIronicNode('node-2')]
+        mock_oga.return_value = []
+        mock_lga.return_value = []
+        mock_gpl.return_value = []
+
+        data = self.get_json('/nodes?limit=2&marker=node-0'
+                             '&resource_class=baremetal')
+
+        mock_gnl.assert_called_once_with(self.context, limit=2,
+                                         marker='node-0',
+                                         resource_class='baremetal')
+        self.assertEqual(2, len(data['nodes']))
+        self.assertEqual('http://localhost/v1/nodes'
+                         '?resource_class=baremetal&limit=2&marker=node-2',
+                         data['next'])
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.objects.offer.Offer.get_all')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_get_all_empty_page(self, mock_gpl, mock_lga, mock_oga,
+                                mock_gnl):
+        mock_gnl.return_value = []
+        mock_gpl.return_value = []
+
+        data = self.get_json('/nodes?limit=2&marker=node-2')
+
+        self.assertEqual([], data['nodes'])
+        mock_oga.assert_not_called()
+        mock_lga.assert_not_called()
+
+    def test_get_all_invalid_limit(self):
+        request = self.get_json('/nodes?limit=0', expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.objects.offer.Offer.get_all')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_get_all_not_modified(self, mock_gpl, mock_lga, mock_oga,
+                                  mock_gnl):
+        fake_node = FakeIronicNode()
+        mock_gnl.return_value = [fake_node]
+        mock_oga.return_value = []
+        mock_lga.return_value = []
+        mock_gpl.return_value = [FakeProject()]
+
+        etag = self.get_json('/nodes', expect_errors=True).headers['ETag']
+        mock_gpl.reset_mock()
+        mock_oga.reset_mock()
+
+        response = self.get_json('/nodes', expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.NOT_MODIFIED, response.status_int)
+        mock_oga.assert_not_called()
+        mock_gpl.assert_not_called()
+
+        fake_node.updated_at = '2016-07-17T19:20:30+00:00'
+        response = self.get_json('/nodes', expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.OK, response.status_int)
+        mock_oga.assert_called_once()
+        mock_gpl.assert_called_once()
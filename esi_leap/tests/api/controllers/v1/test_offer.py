@@ -17,7 +17,10 @@ from oslo_utils import uuidutils
 
 from esi_leap.common import exception
 from esi_leap.common import statuses
+from esi_leap.common import utils
+from esi_leap.objects import lease as lease_obj
 from esi_leap.objects import offer
+from esi_leap.resource_objects.base import ResourceSet
 from esi_leap.resource_objects.ironic_node import IronicNode
 from esi_leap.resource_objects.test_node import TestNode
 from esi_leap.tests.api import base as test_api_base
@@ -54,6 +57,9 @@ class TestOffersController(test_api_base.APITestCase):
 
     def setUp(self):
         super(TestOffersController, self).setUp()
+        # always fetch the full node and project lists
+        self.config(bulk_threshold=0, group='ironic')
+        self.config(bulk_threshold=0, group='keystone')
 
         start = datetime.datetime(2016, 7, 16)
         self.test_offer = offer.Offer(
@@ -344,6 +350,294 @@ class TestOffersController(test_api_base.APITestCase):
         mock_ogdwai.assert_not_called()
         self.assertEqual(http_client.FORBIDDEN, request.status_int)
 
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_bulk(self, mock_gpl):
+        mock_gpl.return_value = []
+        uuid_1 = uuidutils.generate_uuid()
+        uuid_2 = uuidutils.generate_uuid()
+
+        data = {'offers': [
+            {'resource_type': 'test_node', 'resource_uuid': uuid_1,
+             'start_time': '2016-07-16T00:00:00',
+             'end_time': '2016-10-24T00:00:00'},
+            {'resource_type': 'test_node', 'resource_uuid': uuid_2,
+             'start_time': '2016-10-24T00:00:00',
+             'end_time': '2016-07-16T00:00:00'},
+            {'resource_type': 'test_node', 'resource_uuid': uuid_1,
+             'start_time': '2016-08-16T00:00:00',
+             'end_time': '2016-11-24T00:00:00'},
+        ]}
+
+        request = self.post_json('/offers/bulk', data)
+
+        self.assertEqual(http_client.MULTI_STATUS, request.status_int)
+        offers = request.json['offers']
+        self.assertEqual(1, len(offers))
+        self.assertEqual(uuid_1, offers[0]['resource_uuid'])
+        self.assertEqual('test-node-%s' % uuid_1, offers[0]['resource'])
+        self.assertEqual(self.context.project_id, offers[0]['project_id'])
+        self.assertEqual(statuses.AVAILABLE, offers[0]['status'])
+        self.assertNotIn('availabilities', offers[0])
+        self.assertEqual(
+            [('test_node', uuid_2), ('test_node', uuid_1)],
+            [(e['resource_type'], e['resource_uuid'])
+             for e in request.json['errors']])
+        self.assertIn('Start Time must be strictly less',
+                      request.json['errors'][0]['message'])
+        self.assertEqual('Time conflict for test_node %s.' % uuid_1,
+                         request.json['errors'][1]['message'])
+        self.assertEqual(1, len(offer.Offer.get_all({})))
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.common.keystone.get_project_uuid_from_ident')
+    @mock.patch('esi_leap.api.controllers.v1.offer.find_by_resource_class')
+    def test_bulk_resource_class(self, mock_fbrc, mock_gpufi, mock_gpl):
+        owned = TestNode(uuidutils.generate_uuid())
+        other = TestNode(uuidutils.generate_uuid(), project_id='other')
+        mock_fbrc.return_value = {'test_node': ResourceSet('test_node', {
+            owned.get_uuid(): owned, other.get_uuid(): other})}
+        mock_gpufi.return_value = 'lessee-uuid'
+        mock_gpl.return_value = []
+
+        data = {
+            'resource_type': 'test_node',
+            'resource_class': 'fake',
+            'lessee_id': 'lessee',
+            'start_time': '2016-07-16T00:00:00',
+            'end_time': '2016-10-24T00:00:00',
+        }
+
+        request = self.post_json('/offers/bulk', data)
+
+        self.assertEqual(http_client.CREATED, request.status_int)
+        mock_fbrc.assert_called_once_with('fake', ['test_node'])
+        mock_gpufi.assert_called_once_with('lessee')
+        offers = request.json['offers']
+        self.assertEqual(1, len(offers))
+        self.assertEqual(owned.get_uuid(), offers[0]['resource_uuid'])
+        self.assertEqual('lessee-uuid', offers[0]['lessee_id'])
+        self.assertEqual('2016-10-24T00:00:00', offers[0]['end_time'])
+        self.assertEqual([], request.json['errors'])
+
+    @mock.patch('esi_leap.api.controllers.v1.offer.find_by_resource_class')
+    def test_bulk_resource_class_not_searchable(self, mock_fbrc):
+        mock_fbrc.return_value = {'test_node': None}
+
+        request = self.post_json('/offers/bulk',
+                                 {'resource_type': 'test_node',
+                                  'resource_class': 'fake'},
+                                 expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
+    def test_bulk_empty(self):
+        request = self.post_json('/offers/bulk', {'offers': []},
+                                 expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
+    def _create_search_offers(self):
+        offers = []
+        for resource_uuid in ('111', '222'):
+            o = offer.Offer(
+                uuid=uuidutils.generate_uuid(),
+                project_id='ownerid',
+                resource_type='test_node',
+                resource_uuid=resource_uuid,
+                start_time=datetime.datetime(2016, 7, 1),
+                end_time=datetime.datetime(2016, 9, 1),
+                status=statuses.AVAILABLE)
+            o.create()
+            offers.append(o)
+        return offers
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_search(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = self._create_search_offers()
+        props = {
+            '111': {'memory_mb': 262144, 'traits': ['CUSTOM_GPU']},
+            '222': {'memory_mb': 131072, 'traits': ['CUSTOM_GPU']},
+        }
+
+        def get_properties(node, resource_list=None):
+            return props[node.get_uuid()]
+        data = {
+            'start_time': '2016-07-16T00:00:00',
+            'end_time': '2016-07-20T00:00:00',
+            'resource_type': 'test_node',
+            'resource_class': 'fake',
+            'properties': {'memory_mb': {'min': 262144}},
+            'traits': ['CUSTOM_GPU'],
+        }
+
+        with mock.patch.object(TestNode, 'get_properties', autospec=True,
+                               side_effect=get_properties):
+            request = self.post_json('/offers/search', data)
+
+        self.assertEqual(http_client.OK, request.status_int)
+        self.assertEqual([offers[0].uuid],
+                         [o['uuid'] for o in request.json['offers']])
+        availabilities = request.json['offers'][0]['availabilities']
+        self.assertEqual(1, len(availabilities))
+        self.assertEqual('2016-09-01T00:00:00', availabilities[0][1])
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_search_leased(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = self._create_search_offers()
+        lease_obj.Lease(uuid=uuidutils.generate_uuid(),
+                        project_id='lesseeid',
+                        owner_id='ownerid',
+                        offer_uuid=offers[1].uuid,
+                        resource_type='test_node',
+                        resource_uuid='222',
+                        start_time=datetime.datetime(2016, 7, 10),
+                        end_time=datetime.datetime(2016, 7, 18),
+                        status=statuses.CREATED).create()
+
+        request = self.post_json('/offers/search', {
+            'start_time': '2016-07-16T00:00:00',
+            'end_time': '2016-07-20T00:00:00'})
+
+        self.assertEqual([offers[0].uuid],
+                         [o['uuid'] for o in request.json['offers']])
+
+    def test_search_invalid(self):
+        request = self.post_json('/offers/search', {
+            'start_time': '2016-07-20T00:00:00',
+            'end_time': '2016-07-16T00:00:00'}, expect_errors=True)
+        self.assertEqual(http_client.INTERNAL_SERVER_ERROR,
+                         request.status_int)
+
+        request = self.post_json('/offers/search', {
+            'start_time': '2016-07-16T00:00:00',
+            'end_time': '2016-07-20T00:00:00',
+            'properties': {'memory_mb': {'gte': 1}}}, expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_earliest(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = self._create_search_offers()
+        lease_obj.Lease(uuid=uuidutils.generate_uuid(),
+                        project_id='lesseeid',
+                        owner_id='ownerid',
+                        offer_uuid=offers[0].uuid,
+                        resource_type='test_node',
+                        resource_uuid='111',
+                        start_time=datetime.datetime(2016, 7, 10),
+                        end_time=datetime.datetime(2016, 7, 20),
+                        status=statuses.CREATED).create()
+        data = {'duration': 7 * 24 * 60,
+                'not_before': '2016-07-05T00:00:00',
+                'resource_type': 'test_node',
+                'resource_class': 'fake'}
+
+        request = self.post_json('/offers/earliest', data)
+
+        self.assertEqual(http_client.OK, request.status_int)
+        self.assertEqual([
+            (offers[1].uuid, '222', '2016-07-05T00:00:00',
+             '2016-07-12T00:00:00'),
+            (offers[0].uuid, '111', '2016-07-20T00:00:00',
+             '2016-07-27T00:00:00'),
+        ], [(s['offer_uuid'], s['resource_uuid'], s['start_time'],
+             s['end_time']) for s in request.json['slots']])
+
+        request = self.post_json('/offers/earliest', dict(data, limit=1))
+
+        self.assertEqual([offers[1].uuid],
+                         [s['offer_uuid'] for s in request.json['slots']])
+
+    def test_earliest_invalid(self):
+        for data in ({'duration': 0}, {'duration': 60, 'limit': 0},
+                     {'duration': 60, 'properties': {'cpus': {}}}):
+            request = self.post_json('/offers/earliest', data,
+                                     expect_errors=True)
+            self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
+    def _create_check_lease(self):
+        offers = self._create_search_offers()
+        lease = lease_obj.Lease(uuid=uuidutils.generate_uuid(),
+                                project_id='lesseeid',
+                                owner_id='ownerid',
+                                offer_uuid=offers[0].uuid,
+                                resource_type='test_node',
+                                resource_uuid='111',
+                                start_time=datetime.datetime(2016, 7, 10),
+                                end_time=datetime.datetime(2016, 7, 20),
+                                status=statuses.ACTIVE)
+        lease.create()
+        windows = [
+            {'start_time': '2016-07-02T00:00:00',
+             'end_time': '2016-07-05T00:00:00'},
+            {'start_time': '2016-07-15T00:00:00',
+             'end_time': '2016-07-25T00:00:00'},
+            {'start_time': '2016-10-01T00:00:00',
+             'end_time': '2016-10-02T00:00:00'},
+        ]
+        return offers[0], lease, windows
+
+    def test_check(self):
+        o, lease, windows = self._create_check_lease()
+
+        request = self.post_json('/offers/%s/check' % o.uuid,
+                                 {'windows': windows})
+
+        self.assertEqual(http_client.OK, request.status_int)
+        self.assertEqual([
+            (True, o.uuid, None), (False, o.uuid, lease.uuid),
+            (False, None, None),
+        ], [(w['available'], w.get('offer_uuid'), w.get('lease_uuid'))
+            for w in request.json['windows']])
+        self.assertEqual('2016-07-15T00:00:00',
+                         request.json['windows'][1]['start_time'])
+
+    def test_check_resource(self):
+        o, lease, windows = self._create_check_lease()
+
+        request = self.post_json('/offers/check', {
+            'resource_type': 'test_node', 'resource_uuid': '111',
+            'windows': windows})
+
+        self.assertEqual([
+            (True, o.uuid, None), (False, o.uuid, lease.uuid),
+            (False, None, None),
+        ], [(w['available'], w.get('offer_uuid'), w.get('lease_uuid'))
+            for w in request.json['windows']])
+
+    def test_check_invalid(self):
+        o, lease, windows = self._create_check_lease()
+
+        request = self.post_json('/offers/check', {'windows': windows},
+                                 expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
+        for path in ('/offers/check', '/offers/%s/check' % o.uuid):
+            request = self.app.post('/v1' + path, expect_errors=True)
+            self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
+        request = self.post_json('/offers/%s/check' % o.uuid, {
+            'windows': [{'start_time': '2016-07-05T00:00:00',
+                         'end_time': '2016-07-02T00:00:00'}]},
+            expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
+    @mock.patch('esi_leap.api.controllers.v1.utils.check_resource_admin')
+    def test_bulk_forbidden(self, mock_cra):
+        mock_cra.side_effect = exception.HTTPResourceForbidden(
+            resource_type='test_node', resource=self.test_offer.resource_uuid)
+
+        data = {'offers': [{'resource_type': 'test_node',
+                            'resource_uuid': self.test_offer.resource_uuid}]}
+        request = self.post_json('/offers/bulk', data)
+
+        self.assertEqual(http_client.MULTI_STATUS, request.status_int)
+        self.assertEqual([], request.json['offers'])
+        self.assertEqual(1, len(request.json['errors']))
+        self.assertEqual(0, len(offer.Offer.get_all({})))
+
     @mock.patch('esi_leap.common.ironic.get_node_list')
     @mock.patch('esi_leap.common.keystone.get_project_list')
     @mock.patch('esi_leap.api.controllers.v1.utils.'
@@ -364,12 +658,50 @@ class TestOffersController(test_api_base.APITestCase):
 
         request = self.get_json('/offers')
 
-        mock_get_all.assert_called_once_with(expected_filters, self.context)
+        mock_get_all.assert_called_once_with(expected_filters, self.context,
+                                             read_only=True)
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.objects.offer.Offer.get_availabilities')
+    @mock.patch('esi_leap.objects.offer.Offer.get_all')
+    def test_get_no_detail(self, mock_get_all, mock_ga, mock_gpl, mock_gnl):
+        mock_get_all.return_value = [self.test_offer]
+
+        request = self.get_json('/offers?detail=false')
+
+        mock_ga.assert_not_called()
+        mock_gpl.assert_not_called()
+        mock_gnl.assert_not_called()
+        self.assertEqual(self.test_offer.uuid, request['offers'][0]['uuid'])
+        for attr in ('availabilities', 'project', 'lessee', 'resource',
+                     'resource_class', 'resource_properties'):
+            self.assertNotIn(attr, request['offers'][0])
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.objects.offer.Offer.get_availabilities')
+    @mock.patch('esi_leap.objects.offer.Offer.get_all')
+    def test_get_fields(self, mock_get_all, mock_ga, mock_gpl, mock_gnl):
+        mock_get_all.return_value = [self.test_offer]
+
+        request = self.get_json('/offers?fields=uuid,name')
+
+        mock_ga.assert_not_called()
+        mock_gpl.assert_not_called()
+        mock_gnl.assert_not_called()
+        self.assertEqual({'offers': [{'uuid': self.test_offer.uuid,
+                                      'name': self.test_offer.name}]},
+                         request)
+
+    def test_get_invalid_fields(self):
+        request = self.get_json('/offers?fields=bogus', expect_errors=True)
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
     @mock.patch('esi_leap.common.ironic.get_node_list')
     @mock.patch('esi_leap.common.keystone.get_project_list')
     @mock.patch('esi_leap.api.controllers.v1.utils.'
@@ -390,9 +722,10 @@ class TestOffersController(test_api_base.APITestCase):
 
         request = self.get_json('/offers/?status=any')
 
-        mock_get_all.assert_called_once_with(expected_filters, self.context)
+        mock_get_all.assert_called_once_with(expected_filters, self.context,
+                                             read_only=True)
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
@@ -417,9 +750,10 @@ class TestOffersController(test_api_base.APITestCase):
         request = self.get_json(
             '/offers/?status=available')
 
-        mock_get_all.assert_called_once_with(expected_filters, self.context)
+        mock_get_all.assert_called_once_with(expected_filters, self.context,
+                                             read_only=True)
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
@@ -448,9 +782,10 @@ class TestOffersController(test_api_base.APITestCase):
             '/offers/?project_id=' + self.context.project_id)
 
         mock_gpufi.assert_called_once_with(self.context.project_id)
-        mock_get_all.assert_called_once_with(expected_filters, self.context)
+        mock_get_all.assert_called_once_with(expected_filters, self.context,
+                                             read_only=True)
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
@@ -480,9 +815,10 @@ class TestOffersController(test_api_base.APITestCase):
                                 'resource_type=test_node')
 
         mock_gro.assert_called_once_with('test_node', '54321')
-        mock_get_all.assert_called_once_with(expected_filters, self.context)
+        mock_get_all.assert_called_once_with(expected_filters, self.context,
+                                             read_only=True)
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
@@ -501,14 +837,19 @@ class TestOffersController(test_api_base.APITestCase):
             _get_offer_response(self.test_offer_drt, use_datetime=True)]
         mock_gpl.return_value = []
         mock_gnl.return_value = []
-        expected_filters = {'status': statuses.OFFER_CAN_DELETE}
+        expected_filters = {'status': statuses.OFFER_CAN_DELETE,
+                            'resources': {'dummy_node': None,
+                                          'ironic_node': [],
+                                          'test_node': None}}
         expected_resp = {'offers': [_get_offer_response(self.test_offer),
                                     _get_offer_response(self.test_offer_2)]}
         request = self.get_json('/offers/?resource_class=fake')
 
-        mock_get_all.assert_called_once_with(expected_filters, self.context)
+        mock_get_all.assert_called_once_with(expected_filters, self.context,
+                                             read_only=True)
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        self.assertEqual([mock.call(resource_class='fake'), mock.call()],
+                         mock_gnl.call_args_list)
         assert mock_ogdwai.call_count == 3
         self.assertEqual(request, expected_resp)
 
@@ -540,20 +881,26 @@ class TestOffersController(test_api_base.APITestCase):
 
         request = self.get_json('/offers/?resource_uuid=%s' % fake_uuid)
         mock_gro.assert_called_once_with('ironic_node', fake_uuid)
-        mock_get_all.assert_called_once_with(expected_filters, self.context)
+        mock_get_all.assert_called_once_with(expected_filters, self.context,
+                                             read_only=True)
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
+    @mock.patch('esi_leap.common.keystone.get_parent_project_id_tree')
     @mock.patch('esi_leap.common.ironic.get_node_list')
     @mock.patch('esi_leap.common.keystone.get_project_list')
     @mock.patch('esi_leap.api.controllers.v1.utils.'
                 'offer_get_dict_with_added_info')
+    @mock.patch('esi_leap.objects.offer.Offer.get_lease_version')
+    @mock.patch('esi_leap.objects.offer.Offer.get_version')
     @mock.patch('esi_leap.objects.offer.Offer.get_all')
     @mock.patch('esi_leap.api.controllers.v1.utils.policy_authorize')
     def test_get_lessee_filter(self, mock_authorize, mock_get_all,
-                               mock_ogdwai, mock_gpl, mock_gnl):
+                               mock_get_version, mock_glv, mock_ogdwai,
+                               mock_gpl, mock_gnl, mock_gppit):
+        mock_gppit.return_value = [self.context.project_id, 'parent']
         mock_get_all.return_value = [self.test_offer, self.test_offer_2]
         mock_ogdwai.side_effect = [
             _get_offer_response(self.test_offer, use_datetime=True),
@@ -566,26 +913,36 @@ class TestOffersController(test_api_base.APITestCase):
         mock_gnl.return_value = []
 
         expected_filters = {'status': statuses.OFFER_CAN_DELETE,
-                            'lessee_id': self.context.project_id}
+                            'lessee_id': self.context.project_id,
+                            'lessee_id_tree': [self.context.project_id,
+                                               'parent']}
         expected_resp = {'offers': [_get_offer_response(self.test_offer),
                                     _get_offer_response(self.test_offer_2)]}
 
         request = self.get_json('/offers')
 
-        mock_get_all.assert_called_once_with(expected_filters, self.context)
+        mock_get_version.assert_called_once_with(expected_filters)
+        mock_glv.assert_called_once_with(expected_filters)
+        mock_get_all.assert_called_once_with(expected_filters, self.context,
+                                             read_only=True)
+        # the project tree is resolved once for all three queries
+        mock_gppit.assert_called_once_with(self.context.project_id)
         mock_gpl.assert_called_once()
-        mock_gnl.assert_called_once()
+        mock_gnl.assert_not_called()
         assert mock_ogdwai.call_count == 2
         self.assertEqual(request, expected_resp)
 
+    @mock.patch('esi_leap.common.enrichment.fetch')
     @mock.patch('esi_leap.api.controllers.v1.utils.check_offer_lessee')
     @mock.patch('esi_leap.api.controllers.v1.utils.'
                 'check_offer_policy_and_retrieve')
     @mock.patch('esi_leap.api.controllers.v1.utils.'
                 'offer_get_dict_with_added_info')
-    def test_get_one(self, mock_ogdwai, mock_copar, mock_col):
+    def test_get_one(self, mock_ogdwai, mock_copar, mock_col, mock_fetch):
+        self.test_offer.updated_at = None
         mock_copar.return_value = self.test_offer
         mock_ogdwai.return_value = self.test_offer.to_dict()
+        mock_fetch.return_value = ([], ['project'])
 
         self.get_json('/offers/' + self.test_offer.uuid)
 
@@ -594,7 +951,72 @@ class TestOffersController(test_api_base.APITestCase):
                                            self.test_offer.uuid)
         mock_col.assert_called_once_with(self.context.to_policy_values(),
                                          self.test_offer)
-        mock_ogdwai.assert_called_once_with(self.test_offer)
+        mock_fetch.assert_called_once_with([], {self.context.project_id})
+        mock_ogdwai.assert_called_once_with(self.test_offer, ['project'], [])
+
+    @mock.patch('esi_leap.objects.lease.Lease.get_version')
+    @mock.patch('esi_leap.objects.offer.Offer.get_version')
+    @mock.patch('esi_leap.common.enrichment.fetch')
+    @mock.patch('esi_leap.api.controllers.v1.utils.check_offer_lessee')
+    @mock.patch('esi_leap.api.controllers.v1.utils.'
+                'check_offer_policy_and_retrieve')
+    @mock.patch('esi_leap.api.controllers.v1.utils.'
+                'offer_get_dict_with_added_info')
+    def test_get_one_not_modified(self, mock_ogdwai, mock_copar, mock_col,
+                                  mock_fetch, mock_ogv, mock_lgv):
+        mock_copar.return_value = self.test_offer
+        mock_ogdwai.return_value = self.test_offer.to_dict()
+        mock_fetch.return_value = ([], [])
+        mock_ogv.return_value = (1, 1, 0, 0, 0)
+        mock_lgv.return_value = (0, None, None, 0, 0)
+        path = '/offers/' + self.test_offer.uuid
+
+        etag = self.get_json(path, expect_errors=True).headers['ETag']
+        response = self.get_json(path, expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.NOT_MODIFIED, response.status_int)
+        mock_ogv.assert_called_with({'uuid': self.test_offer.uuid})
+        mock_lgv.assert_called_with({'offer_uuid': self.test_offer.uuid})
+
+        # an update bumps the revision even within the same updated_at
+        mock_ogv.return_value = (1, 1, 1, 0, 0)
+        response = self.get_json(path, expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.OK, response.status_int)
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    @mock.patch('esi_leap.objects.offer.Offer.get_lease_version')
+    @mock.patch('esi_leap.objects.offer.Offer.get_version')
+    @mock.patch('esi_leap.api.controllers.v1.utils.'
+                'offer_get_dict_with_added_info')
+    @mock.patch('esi_leap.objects.offer.Offer.get_all')
+    def test_get_all_not_modified(self, mock_oga, mock_ogdwai, mock_ogv,
+                                  mock_lgv, mock_gpl, mock_gnl):
+        mock_oga.return_value = [self.test_offer]
+        mock_ogdwai.return_value = self.test_offer.to_dict()
+        mock_ogv.return_value = (1, None, None, 0, 0)
+        mock_lgv.return_value = (0, None, None, 0, 0)
+        mock_gpl.return_value = []
+        mock_gnl.return_value = []
+
+        etag = self.get_json('/offers', expect_errors=True).headers['ETag']
+        mock_oga.reset_mock()
+        mock_gpl.reset_mock()
+
+        response = self.get_json('/offers', expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.NOT_MODIFIED, response.status_int)
+        mock_oga.assert_not_called()
+        mock_gpl.assert_not_called()
+
+        # a new lease changes the availabilities of the offers
+        mock_lgv.return_value = (1, None, None, 0, 0)
+        response = self.get_json('/offers', expect_errors=True,
+                                 headers={'If-None-Match': etag})
+        self.assertEqual(http_client.OK, response.status_int)
+        mock_oga.assert_called_once()
+        mock_lgv.assert_called_with(mock_oga.call_args[0][0])
 
     @mock.patch('oslo_utils.uuidutils.generate_uuid')
     @mock.patch('esi_leap.objects.lease.Lease.create')
@@ -659,6 +1081,111 @@ class TestOffersController(test_api_base.APITestCase):
         mock_lgdwai.assert_called_once()
         self.assertEqual(http_client.CREATED, request.status_int)
 
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_claim_matching(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = self._create_search_offers()
+        data = {
+            'name': 'lease_claim',
+            'resource_type': 'test_node',
+            'resource_class': 'fake',
+            'start_time': '2016-07-16T19:20:30',
+            'end_time': '2016-08-16T19:20:30'
+        }
+
+        request = self.post_json('/offers/claim', data)
+
+        self.assertEqual(http_client.CREATED, request.status_int)
+        leases = request.json['leases']
+        self.assertEqual(1, len(leases))
+        # offers of the same length are taken in uuid order
+        self.assertEqual(min(o.uuid for o in offers),
+                         leases[0]['offer_uuid'])
+        self.assertEqual('lease_claim', leases[0]['name'])
+        self.assertEqual(self.context.project_id, leases[0]['project_id'])
+        self.assertIsNone(leases[0]['group_id'])
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_claim_matching_count(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = self._create_search_offers()
+        data = {
+            'count': 2,
+            'start_time': '2016-07-16T19:20:30',
+            'end_time': '2016-08-16T19:20:30'
+        }
+
+        request = self.post_json('/offers/claim', data)
+
+        leases = request.json['leases']
+        self.assertEqual(set(o.uuid for o in offers),
+                         set(l['offer_uuid'] for l in leases))
+        self.assertIsNotNone(leases[0]['group_id'])
+        self.assertEqual(leases[0]['group_id'], leases[1]['group_id'])
+
+        request = self.post_json('/offers/claim', data, expect_errors=True)
+        self.assertEqual(http_client.CONFLICT, request.status_int)
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_claim_matching_skip_locked(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = sorted(self._create_search_offers(), key=lambda o: o.uuid)
+        data = {
+            'start_time': '2016-07-16T19:20:30',
+            'end_time': '2016-08-16T19:20:30'
+        }
+
+        with utils.lock(utils.get_resource_lock_name(
+                'test_node', offers[0].resource_uuid), external=True):
+            request = self.post_json('/offers/claim', data)
+
+        self.assertEqual([offers[1].uuid],
+                         [l['offer_uuid'] for l in request.json['leases']])
+
+    @mock.patch('esi_leap.common.keystone.get_project_list')
+    def test_claim_matching_best_fit(self, mock_gpl):
+        mock_gpl.return_value = []
+        offers = sorted(self._create_search_offers(), key=lambda o: o.uuid)
+        # a lease ending when the claim starts leaves offers[1] the
+        # smaller free gap
+        lease_obj.Lease(uuid=uuidutils.generate_uuid(),
+                        project_id='lesseeid',
+                        owner_id='ownerid',
+                        offer_uuid=offers[1].uuid,
+                        resource_type='test_node',
+                        resource_uuid=offers[1].resource_uuid,
+                        start_time=datetime.datetime(2016, 7, 1),
+                        end_time=datetime.datetime(2016, 7, 16),
+                        status=statuses.CREATED).create()
+        data = {
+            'start_time': '2016-07-16T00:00:00',
+            'end_time': '2016-07-20T00:00:00'
+        }
+
+        request = self.post_json('/offers/claim', data)
+
+        self.assertEqual([offers[1].uuid],
+                         [l['offer_uuid'] for l in request.json['leases']])
+
+    def test_claim_matching_not_enough(self):
+        self._create_search_offers()
+        data = {
+            'count': 3,
+            'start_time': '2016-07-16T19:20:30',
+            'end_time': '2016-08-16T19:20:30'
+        }
+
+        request = self.post_json('/offers/claim', data, expect_errors=True)
+
+        self.assertEqual(http_client.CONFLICT, request.status_int)
+        self.assertEqual([], lease_obj.Lease.get_all({}))
+
+    def test_claim_matching_invalid_count(self):
+        request = self.post_json('/offers/claim', {'count': 0},
+                                 expect_errors=True)
+
+        self.assertEqual(http_client.BAD_REQUEST, request.status_int)
+
     @mock.patch('esi_leap.api.controllers.v1.utils.'
                 'check_offer_policy_and_retrieve')
     @mock.patch('esi_leap.objects.offer.Offer.cancel')
@@ -18,6 +18,7 @@ from oslo_utils import uuidutils
 
 import testtools
 
+from esi_leap.api.controllers.v1 import offer as offer_api
 from esi_leap.api.controllers.v1 import utils
 from esi_leap.common import exception
 from esi_leap.common import policy
@@ -658,6 +659,114 @@ class TestOfferGetDictWithAddedInfoUtils(testtools.TestCase):
         self.assertEqual(expected_offer_dict, o_dict)
         self.assertEqual(2, mock_gpn.call_count)
 
+    @mock.patch('esi_leap.common.keystone.get_project_name')
+    @mock.patch('esi_leap.objects.offer.Offer.get_availabilities')
+    @mock.patch('esi_leap.objects.offer.Offer.resource_object')
+    def test_offer_get_dict_with_added_info_fields(self, mock_ro, mock_ga,
+                                                   mock_gpn):
+        mock_gpn.return_value = 'project-name'
+        o = offer.Offer(
+            resource_type='test_node',
+            resource_uuid='1234567890',
+            name='o',
+            project_id=uuidutils.generate_uuid(),
+        )
+
+        o_dict = utils.offer_get_dict_with_added_info(
+            o, fields={'name', 'project'})
+
+        self.assertEqual({'name': 'o', 'project': 'project-name'}, o_dict)
+        mock_gpn.assert_called_once_with(o.project_id, None)
+        mock_ga.assert_not_called()
+        mock_ro.assert_not_called()
+
+
+class TestGetRequestedFields(testtools.TestCase):
+
+    def test_all(self):
+        self.assertIsNone(utils.get_requested_fields(
+            offer_api.Offer, utils.OFFER_ADDED_FIELDS))
+
+    def test_fields(self):
+        self.assertEqual({'uuid', 'resource'}, utils.get_requested_fields(
+            offer_api.Offer, utils.OFFER_ADDED_FIELDS, 'uuid, resource'))
+
+    def test_invalid_fields(self):
+        self.assertRaises(exception.InvalidFields,
+                          utils.get_requested_fields,
+                          offer_api.Offer, utils.OFFER_ADDED_FIELDS,
+                          'uuid,bogus')
+
+    def test_no_detail(self):
+        fields = utils.get_requested_fields(
+            offer_api.Offer, utils.OFFER_ADDED_FIELDS, detail=False)
+        self.assertIn('uuid', fields)
+        for attr in utils.OFFER_ADDED_FIELDS:
+            self.assertNotIn(attr, fields)
+
+    @mock.patch('esi_leap.common.enrichment.fetch')
+    def test_get_enrichment_lists(self, mock_fetch):
+        offers = [offer.Offer(project_id='p1', lessee_id='l1'),
+                  offer.Offer(project_id='p1')]
+        resources = [('ironic_node', 'n1'), ('test_node', 't1')]
+
+        result = utils.get_enrichment_lists(
+            {'uuid', 'lessee'}, offers, utils.OFFER_PROJECT_FIELDS,
+            resources)
+        self.assertEqual(mock_fetch.return_value, result)
+        mock_fetch.assert_called_once_with((), {'l1'})
+
+        mock_fetch.reset_mock()
+        utils.get_enrichment_lists(None, offers, utils.OFFER_PROJECT_FIELDS,
+                                   resources)
+        mock_fetch.assert_called_once_with(['n1'], {'p1', 'l1'})
+
+
+class TestResourceMatches(testtools.TestCase):
+
+    def setUp(self):
+        super(TestResourceMatches, self).setUp()
+        self.properties = {'memory_mb': '262144', 'cpu_arch': 'x86_64',
+                           'traits': ['CUSTOM_GPU', 'CUSTOM_NVME']}
+
+    def test_no_criteria(self):
+        self.assertTrue(utils.resource_matches(self.properties))
+
+    def test_value(self):
+        self.assertTrue(utils.resource_matches(
+            self.properties, {'cpu_arch': 'x86_64'}))
+        self.assertFalse(utils.resource_matches(
+            self.properties, {'cpu_arch': 'aarch64'}))
+        self.assertFalse(utils.resource_matches(
+            self.properties, {'gpu_count': 1}))
+
+    def test_range(self):
+        self.assertTrue(utils.resource_matches(
+            self.properties, {'memory_mb': {'min': 262144}}))
+        self.assertTrue(utils.resource_matches(
+            self.properties, {'memory_mb': {'min': 1024, 'max': 300000}}))
+        self.assertFalse(utils.resource_matches(
+            self.properties, {'memory_mb': {'min': 262145}}))
+        self.assertFalse(utils.resource_matches(
+            self.properties, {'memory_mb': {'max': 1024}}))
+        self.assertFalse(utils.resource_matches(
+            self.properties, {'cpu_arch': {'min': 1}}))
+
+    def test_traits(self):
+        self.assertTrue(utils.resource_matches(
+            self.properties, traits=['CUSTOM_GPU']))
+        self.assertFalse(utils.resource_matches(
+            self.properties, traits=['CUSTOM_GPU', 'CUSTOM_FPGA']))
+        self.assertFalse(utils.resource_matches({}, traits=['CUSTOM_GPU']))
+
+    def test_check_property_filters(self):
+        utils.check_property_filters(None)
+        utils.check_property_filters({'a': 1, 'b': {'min': 1, 'max': 2}})
+        self.assertRaises(exception.InvalidPropertyFilter,
+                          utils.check_property_filters, {'a': {}})
+        self.assertRaises(exception.InvalidPropertyFilter,
+                          utils.check_property_filters, {'a': {'gte': 1}})
+
 
 class TestLeaseGetDictWithAddedInfoUtils(testtools.TestCase):
 
@@ -18,6 +18,7 @@ from oslo_context import context as ctx
 from oslo_db.sqlalchemy import enginefacade
 from oslotest import base
 
+from esi_leap.common import policy
 import esi_leap.conf
 from esi_leap.db import api as db_api
 from esi_leap.db.sqlalchemy import models
@@ -56,6 +57,9 @@ class TestCase(base.BaseTestCase):
     def setUp(self):
         self.config = self.useFixture(config.Config(lockutils.CONF)).config
         super(TestCase, self).setUp()
+        # the enforcer reads the configuration, which is reset after
+        # every test
+        self.addCleanup(policy.reset)
 
         if not hasattr(self, 'context'):
             self.context = ctx.RequestContext(
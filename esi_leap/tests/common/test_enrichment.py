@@ -0,0 +1,90 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from ironicclient.common.apiclient import exceptions as ir_exception
+import mock
+
+from esi_leap.common import enrichment
+from esi_leap.common import identity_map
+from esi_leap.tests import base
+
+
+class FakeNode(object):
+    def __init__(self, uuid):
+        self.uuid = uuid
+
+
+class FakeProject(object):
+    def __init__(self, project_id):
+        self.id = project_id
+
+
+@mock.patch('esi_leap.common.keystone.get_project_list')
+@mock.patch('esi_leap.common.keystone.get_project')
+@mock.patch('esi_leap.common.ironic.get_node_list')
+@mock.patch('esi_leap.common.ironic.get_node')
+class EnrichmentTestCase(base.TestCase):
+
+    def setUp(self):
+        super(EnrichmentTestCase, self).setUp()
+        self.config(bulk_threshold=2, group='ironic')
+        self.config(bulk_threshold=2, group='keystone')
+
+    def test_fetch_per_id(self, mock_gn, mock_gnl, mock_gp, mock_gpl):
+        mock_gn.side_effect = lambda uuid: FakeNode(uuid)
+        mock_gp.side_effect = lambda project_id: FakeProject(project_id)
+
+        node_list, project_list = enrichment.fetch(
+            ['n1', 'n2', 'n1'], ['p1', None])
+
+        self.assertEqual({'n1', 'n2'}, set(n.uuid for n in node_list))
+        self.assertEqual(['p1'], [p.id for p in project_list])
+        self.assertEqual(2, mock_gn.call_count)
+        mock_gp.assert_called_once_with('p1')
+        mock_gnl.assert_not_called()
+        mock_gpl.assert_not_called()
+
+    def test_fetch_bulk(self, mock_gn, mock_gnl, mock_gp, mock_gpl):
+        mock_gnl.return_value = [FakeNode('n1')]
+        mock_gpl.return_value = [FakeProject('p1')]
+
+        node_list, project_list = enrichment.fetch(
+            ['n1', 'n2', 'n3'], ['p1', 'p2', 'p3'])
+
+        self.assertEqual(mock_gnl.return_value, node_list)
+        self.assertEqual(mock_gpl.return_value, project_list)
+        mock_gn.assert_not_called()
+        mock_gp.assert_not_called()
+
+    def test_fetch_nothing(self, mock_gn, mock_gnl, mock_gp, mock_gpl):
+        self.assertEqual(([], []), enrichment.fetch())
+        for m in (mock_gn, mock_gnl, mock_gp, mock_gpl):
+            m.assert_not_called()
+
+    def test_fetch_not_found(self, mock_gn, mock_gnl, mock_gp, mock_gpl):
+        mock_gn.side_effect = ir_exception.NotFound()
+        mock_gp.return_value = None
+
+        self.assertEqual(([], []), enrichment.fetch(['n1'], ['p1']))
+
+    def test_fetch_cached(self, mock_gn, mock_gnl, mock_gp, mock_gpl):
+        mock_gp.side_effect = lambda project_id: FakeProject(project_id)
+
+        with identity_map.scope():
+            enrichment.fetch(project_ids=['p1', 'p2'])
+            # p1 and p2 are cached, so only p3 is left to look up
+            _, project_list = enrichment.fetch(
+                project_ids=['p1', 'p2', 'p3'])
+
+        self.assertEqual({'p1', 'p2', 'p3'}, set(p.id for p in project_list))
+        self.assertEqual(3, mock_gp.call_count)
+        mock_gpl.assert_not_called()
@@ -0,0 +1,64 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import fixtures
+import threading
+
+from esi_leap.common import exception
+from esi_leap.common import executor
+from esi_leap.tests import base
+
+
+class ExecutorTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ExecutorTestCase, self).setUp()
+        executors = {}
+        self.useFixture(fixtures.MockPatchObject(executor, '_executors',
+                                                 executors))
+        self.addCleanup(lambda: [e.shutdown(wait=False)
+                                 for e in executors.values()])
+
+    def test_get_executor(self):
+        self.config(max_concurrency=3, group='ironic')
+
+        ironic_executor = executor.get_executor('ironic')
+
+        self.assertIs(ironic_executor, executor.get_executor('ironic'))
+        self.assertIsNot(ironic_executor, executor.get_executor('keystone'))
+        self.assertEqual(3, ironic_executor._max_workers)
+
+    def test_gather(self):
+        results = executor.gather(('ironic', lambda x: x * 2, 2),
+                                  ('keystone', lambda: 'projects'))
+
+        self.assertEqual([4, 'projects'], results)
+
+    def test_gather_error(self):
+        def fail():
+            raise exception.NodeNotFound(uuid='1111', resource_type='ironic',
+                                         err='gone')
+
+        self.assertRaises(exception.NodeNotFound, executor.gather,
+                          ('ironic', fail))
+
+    def test_gather_timeout(self):
+        self.config(enrichment_timeout=1, group='api')
+        event = threading.Event()
+        self.addCleanup(event.set)
+
+        e = self.assertRaises(exception.DependencyTimeout, executor.gather,
+                              ('keystone', lambda: 'projects'),
+                              ('ironic', event.wait))
+
+        self.assertEqual(503, e.code)
+        self.assertIn('ironic', str(e))
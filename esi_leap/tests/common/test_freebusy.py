@@ -0,0 +1,77 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from esi_leap.common import freebusy
+from esi_leap.tests import base
+
+start = datetime.datetime(2016, 7, 1)
+hour = datetime.timedelta(hours=1)
+
+
+def at(hours):
+    return start + datetime.timedelta(hours=hours)
+
+
+class FreeBusyTestCase(base.TestCase):
+
+    def test_bucket_count(self):
+        self.assertEqual(24, freebusy.bucket_count(at(0), at(24), hour))
+        self.assertEqual(25, freebusy.bucket_count(at(0), at(24.5), hour))
+
+    def test_coverage(self):
+        intervals = [(at(1), at(3)), (at(2), at(4)), (at(4.5), at(5.5))]
+
+        self.assertEqual([0, 1, 2, 1, 0, 0],
+                         freebusy.coverage(intervals, start, hour, 6, False))
+        self.assertEqual([0, 1, 2, 1, 1, 1],
+                         freebusy.coverage(intervals, start, hour, 6, True))
+
+    def test_coverage_clipped(self):
+        intervals = [(at(-5), at(2)), (at(4), at(50))]
+
+        self.assertEqual([1, 1, 0, 0, 1, 1],
+                         freebusy.coverage(intervals, start, hour, 6, False))
+
+    def test_free_intervals(self):
+        offers = [(at(0), at(4)), (at(2), at(6)), (at(8), at(9))]
+        leases = [(at(1), at(2)), (at(3), at(5)), (at(4), at(5.5))]
+
+        self.assertEqual([(at(0), at(1)), (at(2), at(3)), (at(5.5), at(6)),
+                          (at(8), at(9))],
+                         freebusy.free_intervals(offers, leases))
+        self.assertEqual([], freebusy.free_intervals([], leases))
+
+    def test_timeline(self):
+        offers = [(at(0), at(3.5)), (at(5), at(8))]
+        leases = [(at(1.5), at(2)), (at(6), at(7))]
+
+        free, busy = freebusy.timeline(offers, leases, start, hour, 8)
+
+        self.assertEqual('10100101', freebusy.to_bitmap(free))
+        self.assertEqual('01000010', freebusy.to_bitmap(busy))
+
+    def test_timeline_adjacent_offers(self):
+        offers = [(at(0), at(1.5)), (at(1.5), at(3))]
+
+        free, busy = freebusy.timeline(offers, [], start, hour, 3)
+
+        self.assertEqual([True, True, True], free)
+        self.assertEqual([False, False, False], busy)
+
+    def test_to_intervals(self):
+        flags = [True, True, False, True, False, False]
+
+        self.assertEqual([[at(0), at(2)], [at(3), at(4)]],
+                         freebusy.to_intervals(flags, start, hour))
+        self.assertEqual([], freebusy.to_intervals([False], start, hour))
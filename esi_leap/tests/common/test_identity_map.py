@@ -0,0 +1,63 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from esi_leap.common import identity_map
+from esi_leap.tests import base
+
+
+class IdentityMapTestCase(base.TestCase):
+
+    def test_no_scope(self):
+        identity_map.add('lease', '1111', 'obj')
+
+        self.assertFalse(identity_map.active())
+        self.assertIsNone(identity_map.get('lease', '1111'))
+
+    def test_scope(self):
+        with identity_map.scope():
+            self.assertEqual('obj', identity_map.add('lease', '1111', 'obj'))
+            self.assertEqual('obj', identity_map.get('lease', '1111'))
+            self.assertIsNone(identity_map.get('offer', '1111'))
+
+            identity_map.invalidate('lease', '1111')
+            self.assertIsNone(identity_map.get('lease', '1111'))
+
+        self.assertFalse(identity_map.active())
+
+    def test_nested_scope(self):
+        with identity_map.scope():
+            identity_map.add('lease', '1111', 'obj')
+            with identity_map.scope():
+                self.assertEqual('obj', identity_map.get('lease', '1111'))
+            self.assertEqual('obj', identity_map.get('lease', '1111'))
+
+        self.assertIsNone(identity_map.get('lease', '1111'))
+
+    def test_start_resets(self):
+        identity_map.start()
+        identity_map.add('lease', '1111', 'obj')
+
+        identity_map.start()
+        self.assertTrue(identity_map.active())
+        self.assertIsNone(identity_map.get('lease', '1111'))
+
+        identity_map.stop()
+        self.assertFalse(identity_map.active())
+
+    def test_scoped(self):
+        @identity_map.scoped
+        def func():
+            identity_map.add('lease', '1111', 'obj')
+            return identity_map.get('lease', '1111')
+
+        self.assertEqual('obj', func())
+        self.assertFalse(identity_map.active())
@@ -49,6 +49,17 @@ class IronicTestCase(base.TestCase):
 
         self.assertEqual(None, node)
 
+    @mock.patch.object(ironic, 'get_ironic_client', autospec=True)
+    def test_get_node_list_filters(self, mock_ironic):
+        fake_node = FakeNode()
+        mock_ironic.return_value.node.list.return_value = [fake_node]
+        node_list = ironic.get_node_list(resource_class='baremetal',
+                                         limit=10)
+
+        self.assertEqual([fake_node], node_list)
+        mock_ironic.return_value.node.list.assert_called_once_with(
+            detail=True, resource_class='baremetal', limit=10)
+
     def test_get_condensed_properties(self):
         properties = {
             'lease_uuid': '12345',
@@ -10,6 +10,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from keystoneauth1 import exceptions as ks_exception
 import mock
 
 from esi_leap.common import exception as e
@@ -62,6 +63,20 @@ class KeystoneTestCase(base.TestCase):
         mock_keystone.return_value.projects.list.assert_called_once_with(
             name='name')
 
+    @mock.patch.object(keystone, 'get_keystone_client', autospec=True)
+    def test_get_project(self, mock_keystone):
+        fake_project = FakeProject()
+        mock_keystone.return_value.projects.get.return_value = fake_project
+
+        self.assertEqual(fake_project, keystone.get_project('uuid'))
+
+    @mock.patch.object(keystone, 'get_keystone_client', autospec=True)
+    def test_get_project_not_found(self, mock_keystone):
+        mock_keystone.return_value.projects.get.side_effect = \
+            ks_exception.NotFound()
+
+        self.assertIsNone(keystone.get_project('uuid'))
+
     @mock.patch.object(keystone, 'get_keystone_client', autospec=True)
     def test_get_project_name_no_list(self, mock_keystone):
         mock_keystone.return_value.projects.get.return_value = FakeProject()
@@ -0,0 +1,87 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+from esi_leap.common import placement
+from esi_leap.objects import offer as offer_obj
+from esi_leap.tests import base
+
+
+def day(n):
+    return datetime.datetime(2016, 7, 1) + datetime.timedelta(days=n)
+
+
+class PlacementTestCase(base.TestCase):
+
+    def setUp(self):
+        super(PlacementTestCase, self).setUp()
+        self.conflicts = [(day(2), day(4)), (day(10), day(12)),
+                          (day(20), day(22))]
+
+    def test_free_gap(self):
+        self.assertEqual((day(4), day(10)), placement.free_gap(
+            self.conflicts, day(0), day(30), day(5), day(7)))
+        self.assertEqual((day(0), day(2)), placement.free_gap(
+            self.conflicts, day(0), day(30), day(0), day(1)))
+        self.assertEqual((day(22), day(30)), placement.free_gap(
+            self.conflicts, day(0), day(30), day(25), day(26)))
+        self.assertEqual((day(0), day(30)), placement.free_gap(
+            [], day(0), day(30), day(25), day(26)))
+
+    def test_leftover(self):
+        self.assertEqual(datetime.timedelta(days=4), placement.leftover(
+            self.conflicts, day(0), day(30), day(5), day(7)))
+        self.assertEqual(datetime.timedelta(0), placement.leftover(
+            self.conflicts, day(0), day(30), day(4), day(10)))
+
+    def test_best_fit(self):
+        offers = [
+            offer_obj.Offer(uuid='c', start_time=day(0), end_time=day(30)),
+            offer_obj.Offer(uuid='b', start_time=day(0), end_time=day(30)),
+            offer_obj.Offer(uuid='a', start_time=day(0), end_time=day(30)),
+            offer_obj.Offer(uuid='d', start_time=day(4), end_time=day(8)),
+        ]
+        conflicts = {'c': self.conflicts}
+
+        ranked = placement.best_fit(offers, conflicts, day(5), day(7))
+
+        self.assertEqual(['d', 'c', 'a', 'b'], [o.uuid for o in ranked])
+
+    def test_free_gaps(self):
+        self.assertEqual(
+            [(day(1), day(2)), (day(4), day(10)), (day(12), day(20)),
+             (day(22), day(30))],
+            list(placement.free_gaps(self.conflicts, day(0), day(30),
+                                     day(1))))
+        self.assertEqual(
+            [(day(12), day(20)), (day(22), day(25))],
+            list(placement.free_gaps(self.conflicts[1:], day(11), day(25),
+                                     day(5))))
+        self.assertEqual(
+            [], list(placement.free_gaps(self.conflicts, day(0), day(3),
+                                         day(2))))
+
+    def test_earliest_slots(self):
+        offers = [
+            offer_obj.Offer(uuid='b', start_time=day(0), end_time=day(30)),
+            offer_obj.Offer(uuid='a', start_time=day(0), end_time=day(30)),
+            offer_obj.Offer(uuid='c', start_time=day(5), end_time=day(8)),
+        ]
+        conflicts = {'b': self.conflicts,
+                     'a': [(day(0), day(1)), (day(6), day(30))]}
+
+        slots = placement.earliest_slots(offers, conflicts,
+                                         datetime.timedelta(days=5), day(1))
+
+        self.assertEqual([('a', day(1), day(6)), ('b', day(4), day(9))],
+                         [(o.uuid, s, e) for o, s, e in slots])
@@ -10,8 +10,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
 from oslo_policy import policy as oslo_policy
 
+from esi_leap.common import identity_map
 from esi_leap.common import policy
 import esi_leap.conf
 from esi_leap.tests import base
@@ -28,6 +30,18 @@ class PolicyTestCase(base.TestCase):
         CONF.set_override('auth_enable', True,
                           group='pecan')
 
+    def test_get_enforcer_config_not_parsed(self):
+        # as the oslo.policy generator scripts call it
+        CONF.reset()
+        policy.reset()
+
+        enforcer = policy.get_enforcer()
+        enforcer.load_rules()
+
+        self.assertEqual(len(list(policy.list_rules())),
+                         len(enforcer.rules))
+        self.assertIs(enforcer, policy.get_enforcer())
+
     def test_authorized(self):
         creds = {'roles': ['esi_leap_owner']}
         self.assertTrue(policy.authorize('esi_leap:offer:get',
@@ -44,3 +58,41 @@ class PolicyTestCase(base.TestCase):
         self.assertRaises(
             oslo_policy.PolicyNotRegistered,
             policy.authorize, 'esi_leap:foo:bar', creds, creds)
+
+    @mock.patch('oslo_policy.policy.Enforcer.authorize')
+    def test_authorize_cached_in_scope(self, mock_authorize):
+        mock_authorize.return_value = True
+        creds = {'roles': ['esi_leap_owner']}
+
+        with identity_map.scope():
+            self.assertTrue(policy.authorize('esi_leap:offer:get',
+                                             creds, creds))
+            self.assertTrue(policy.authorize('esi_leap:offer:get',
+                                             dict(creds), dict(creds)))
+            self.assertTrue(policy.authorize('esi_leap:lease:get',
+                                             creds, creds))
+
+        self.assertEqual(2, mock_authorize.call_count)
+        mock_authorize.assert_any_call('esi_leap:offer:get', creds, creds,
+                                       do_raise=False)
+
+    @mock.patch('oslo_policy.policy.Enforcer.authorize')
+    def test_unauthorized_cached_in_scope(self, mock_authorize):
+        mock_authorize.return_value = False
+        creds = {'roles': ['generic_user']}
+
+        with identity_map.scope():
+            for _ in range(2):
+                self.assertRaises(
+                    oslo_policy.PolicyNotAuthorized,
+                    policy.authorize, 'esi_leap:offer:get', creds, creds)
+
+        mock_authorize.assert_called_once_with(
+            'esi_leap:offer:get', creds, creds, do_raise=False)
+
+    def test_unauthorized_in_scope(self):
+        creds = {'roles': ['generic_user']}
+        with identity_map.scope():
+            self.assertRaises(
+                oslo_policy.PolicyNotAuthorized,
+                policy.authorize, 'esi_leap:offer:get', creds, creds)
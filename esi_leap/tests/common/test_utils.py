@@ -10,6 +10,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
+
 from esi_leap.common import utils
 from esi_leap.tests import base
 
@@ -23,3 +25,28 @@ class LockTestCase(base.TestCase):
         self.assertEqual(resource_type + '-' + resource_uuid,
                          utils.get_resource_lock_name(
                              resource_type, resource_uuid))
+
+    def test_get_resource_update_lock_name(self):
+        self.assertEqual('ironic_node-12345-update',
+                         utils.get_resource_update_lock_name(
+                             'ironic_node', '12345'))
+
+    @mock.patch.object(utils, 'LOG')
+    @mock.patch.object(utils, '_lock')
+    def test_lock(self, mock_lock, mock_log):
+        with utils.lock('ironic_node-12345', external=True):
+            mock_lock.assert_called_once_with('ironic_node-12345',
+                                              external=True, blocking=True)
+            mock_log.debug.assert_not_called()
+
+        mock_log.debug.assert_called_once_with(
+            mock.ANY, 'ironic_node-12345', mock.ANY, mock.ANY)
+
+    def test_lock_not_blocking(self):
+        def take():
+            with utils.lock('ironic_node-12345', blocking=False):
+                pass
+
+        with utils.lock('ironic_node-12345'):
+            self.assertRaises(utils.LockHeld, take)
+        take()
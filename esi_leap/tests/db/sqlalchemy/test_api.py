@@ -228,6 +228,100 @@ class TestOfferAPI(base.DBTestCase):
         assert len(o) == 1
         assert o[0].to_dict() == offer.to_dict()
 
+    def test_offer_create_bulk(self):
+        api.offer_create(test_offer_4)
+        api.lease_create(test_lease_1)
+
+        # free, after the existing offer
+        o1 = dict(test_offer_5, uuid='o1')
+        # conflicts with the existing lease
+        o2 = dict(test_offer_1, uuid='o2',
+                  end_time=now + datetime.timedelta(days=15))
+        # conflicts with the existing offer
+        o3 = dict(test_offer_1, uuid='o3',
+                  start_time=now + datetime.timedelta(days=80))
+        # free, on another resource
+        o4 = dict(test_offer_1, uuid='o4', resource_uuid='2222')
+        # conflicts with o4
+        o5 = dict(o4, uuid='o5', start_time=now + datetime.timedelta(days=5))
+
+        created, conflicts = api.offer_create_bulk([o1, o2, o3, o4, o5])
+
+        self.assertEqual(['o1', 'o4'], [o.uuid for o in created])
+        self.assertEqual([o2, o3, o5], conflicts)
+        self.assertEqual(
+            ['44444', 'o1', 'o4'],
+            sorted(o.uuid for o in api.offer_get_all({}).all()))
+
+    def test_offer_create_bulk_empty(self):
+        self.assertEqual(([], []), api.offer_create_bulk([]))
+
+    def test_offer_get_conflict_times_bulk(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(dict(test_offer_2, resource_uuid='2222'))
+        api.lease_create(dict(test_lease_2, offer_uuid=o1.uuid))
+        api.lease_create(dict(test_lease_1, offer_uuid=o1.uuid))
+        api.lease_create(dict(test_lease_3, offer_uuid=o1.uuid,
+                              status=statuses.EXPIRED))
+
+        conflicts = api.offer_get_conflict_times_bulk([o1.uuid, o2.uuid])
+
+        self.assertEqual({
+            o1.uuid: [(test_lease_1['start_time'], test_lease_1['end_time']),
+                      (test_lease_2['start_time'], test_lease_2['end_time'])],
+            o2.uuid: [],
+        }, dict((k, [tuple(c) for c in v]) for k, v in conflicts.items()))
+        self.assertEqual({}, api.offer_get_conflict_times_bulk([]))
+
+    def test_offer_get_calendar(self):
+        o1 = api.offer_create(test_offer_1)
+        api.offer_create(dict(test_offer_2, resource_uuid='2222'))
+        api.offer_create(dict(test_offer_2, uuid='33333', resource_uuid='3333',
+                              start_time=now + datetime.timedelta(days=60)))
+        api.lease_create(dict(test_lease_1, offer_uuid=o1.uuid))
+        api.lease_create(dict(test_lease_2, offer_uuid=o1.uuid))
+        api.lease_create(dict(test_lease_3, offer_uuid=o1.uuid))
+
+        start = now + datetime.timedelta(days=15)
+        end = now + datetime.timedelta(days=45)
+        rows = api.offer_get_calendar({}, start, end)
+
+        self.assertEqual([
+            ('dummy_node', '1111', o1.start_time, o1.end_time,
+             test_lease_1['start_time'], test_lease_1['end_time']),
+            ('dummy_node', '1111', o1.start_time, o1.end_time,
+             test_lease_2['start_time'], test_lease_2['end_time']),
+            ('dummy_node', '2222', test_offer_2['start_time'],
+             test_offer_2['end_time'], None, None),
+        ], sorted(tuple(r) for r in rows))
+
+    def test_offer_check_windows(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(dict(test_offer_2, resource_uuid='2222'))
+        l1 = api.lease_create(dict(test_lease_1, offer_uuid=o1.uuid))
+        api.lease_create(dict(test_lease_2, offer_uuid=o1.uuid,
+                              status=statuses.DELETED))
+        l3 = api.lease_create(dict(test_lease_3, offer_uuid=o1.uuid))
+        windows = [
+            (now + datetime.timedelta(days=5),
+             now + datetime.timedelta(days=8)),
+            (now + datetime.timedelta(days=15),
+             now + datetime.timedelta(days=30)),
+            (now + datetime.timedelta(days=20),
+             now + datetime.timedelta(days=40)),
+            (now + datetime.timedelta(days=45),
+             now + datetime.timedelta(days=51)),
+        ]
+
+        checks = api.offer_check_windows([o1, o2], windows)
+
+        self.assertEqual([(True, None), (False, l1.uuid), (True, None),
+                          (False, l3.uuid)],
+                         [(a, b and b.uuid) for a, b in checks[o1.uuid]])
+        self.assertEqual([(False, None), (False, None), (False, None),
+                          (True, None)], checks[o2.uuid])
+        self.assertEqual({o1.uuid: []}, api.offer_check_windows([o1], []))
+
     def test_offer_verify_availability(self):
         offer = api.offer_create(test_offer_1)
 
@@ -431,6 +525,88 @@ class TestOfferAPI(base.DBTestCase):
         self.assertEqual((o1.to_dict(), o2.to_dict()),
                          (res[0].to_dict(), res[1].to_dict()))
 
+    def test_offer_get_all_resource_uuids_filter(self):
+        o1 = api.offer_create(test_offer_2)
+        api.offer_create(dict(test_offer_3, resource_uuid='2222'))
+        o3 = api.offer_create(dict(test_offer_4, resource_uuid='3333'))
+        res = api.offer_get_all({'resource_uuids': ['1111', '3333']})
+
+        self.assertEqual([o1.uuid, o3.uuid], [o.uuid for o in res])
+        self.assertEqual(0, api.offer_get_all({'resource_uuids': []}).count())
+
+    def test_offer_get_all_resources_filter(self):
+        api.offer_create(test_offer_2)
+        o2 = api.offer_create(dict(test_offer_3, resource_uuid='2222'))
+        res = api.offer_get_all({'resources': {'dummy_node': ['2222']}})
+
+        self.assertEqual([o2.uuid], [o.uuid for o in res])
+
+    def test_offer_get_all_availability_filter(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(dict(test_offer_2, resource_uuid='2222'))
+        api.lease_create(dict(test_lease_1, offer_uuid=o1.uuid))
+        api.lease_create(dict(test_lease_2, offer_uuid=o2.uuid,
+                              resource_uuid='2222',
+                              status=statuses.DELETED))
+
+        def available(start, end):
+            return [o.uuid for o in api.offer_get_all({
+                'available_start_time': now + datetime.timedelta(days=start),
+                'available_end_time': now + datetime.timedelta(days=end)})]
+
+        # o1 is leased from day 10 to 20, o2 starts on day 25
+        self.assertEqual([o1.uuid], available(1, 10))
+        self.assertEqual([], available(15, 26))
+        self.assertEqual([o1.uuid, o2.uuid], available(25, 30))
+        self.assertEqual([o1.uuid], available(20, 100))
+        self.assertEqual([], available(20, 101))
+
+    def test_offer_get_version(self):
+        empty = api.offer_get_version({})
+        self.assertEqual(0, empty[0])
+
+        o1 = api.offer_create(test_offer_2)
+        v1 = api.offer_get_version({})
+        self.assertEqual(1, v1[0])
+        self.assertNotEqual(empty, v1)
+        self.assertEqual(v1, api.offer_get_version({}))
+
+        api.offer_update(o1.uuid, {'status': statuses.DELETED})
+        self.assertNotEqual(v1, api.offer_get_version({}))
+        self.assertEqual(
+            empty, api.offer_get_version({'resource_uuids': ['2222']}))
+
+    def test_offer_get_lease_version(self):
+        o1 = api.offer_create(test_offer_2)
+        o2 = api.offer_create(dict(test_offer_3, resource_uuid='3333'))
+        filters = {'resource_uuids': ['1111']}
+        api.lease_create(dict(test_lease_1, offer_uuid=o1.uuid))
+        v1 = api.offer_get_lease_version(dict(filters))
+        self.assertEqual(1, v1[0])
+
+        # leases on other offers leave the version alone
+        api.lease_create(dict(test_lease_2, offer_uuid=o2.uuid))
+        self.assertEqual(v1, api.offer_get_lease_version(dict(filters)))
+
+        api.lease_update(test_lease_1['uuid'], {'name': 'l'})
+        self.assertNotEqual(v1, api.offer_get_lease_version(dict(filters)))
+
+    def test_offer_get_version_same_updated_at(self):
+        o1 = api.offer_create(test_offer_2)
+        api.offer_create(test_offer_3)
+        v1 = api.offer_get_version({})
+
+        # an update of an older row within the same clock tick
+        api.offer_update(o1.uuid, {'name': 'a', 'updated_at': now})
+        v2 = api.offer_get_version({})
+        api.offer_update(o1.uuid, {'name': 'b', 'updated_at': now})
+        v3 = api.offer_get_version({})
+        api.lease_offer_batch_update({}, {o1.uuid: {'name': 'c',
+                                                    'updated_at': now}})
+        v4 = api.offer_get_version({})
+
+        self.assertEqual(4, len(set([v1, v2, v3, v4])))
+
     @mock.patch('esi_leap.common.keystone.get_parent_project_id_tree')
     def test_offer_get_all_lessee_filter(self, mock_gppit):
         mock_gppit.return_value = ['12345', '67890']
@@ -449,6 +625,20 @@ class TestOfferAPI(base.DBTestCase):
                          (res[0].to_dict(), res[1].to_dict(),
                           res[2].to_dict(), res[3].to_dict()))
 
+    @mock.patch('esi_leap.common.keystone.get_parent_project_id_tree')
+    def test_offer_get_all_lessee_id_tree(self, mock_gppit):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(test_offer_2)
+        o3 = api.offer_create(test_offer_3)
+        api.offer_create(test_offer_4)
+        o5 = api.offer_create(test_offer_5)
+        res = api.offer_get_all({'lessee_id': '12345',
+                                 'lessee_id_tree': ['12345', '67890']})
+
+        mock_gppit.assert_not_called()
+        self.assertEqual([o1.uuid, o2.uuid, o3.uuid, o5.uuid],
+                         [o.uuid for o in res])
+
     def test_offer_get_all_time_filter(self):
         o1 = api.offer_create(test_offer_1)
         o2 = api.offer_create(test_offer_2)
@@ -533,6 +723,55 @@ class TestLeaseAPI(base.DBTestCase):
         self.assertIn(test_lease_1['uuid'], res_uuids)
         self.assertIn(test_lease_2['uuid'], res_uuids)
 
+    def test_lease_get_version(self):
+        empty = api.lease_get_version({})
+        api.lease_create(test_lease_1)
+        v1 = api.lease_get_version({})
+        self.assertEqual(1, v1[0])
+        self.assertNotEqual(empty, v1)
+        self.assertEqual(v1, api.lease_get_version({}))
+
+        api.lease_create(test_lease_6)
+        self.assertNotEqual(v1, api.lease_get_version({}))
+        self.assertEqual(
+            1, api.lease_get_version({'resource_uuids': ['2222']})[0])
+
+    def test_lease_get_all_batches(self):
+        api.lease_create(test_lease_1)
+        api.lease_create(test_lease_2)
+        api.lease_create(test_lease_6)
+
+        batches = list(api.lease_get_all_batches({}, 2))
+        self.assertEqual([2, 1], [len(batch) for batch in batches])
+        self.assertEqual(
+            [test_lease_1['uuid'], test_lease_2['uuid'], test_lease_6['uuid']],
+            [l.uuid for batch in batches for l in batch])
+
+        batches = api.lease_get_all_batches({'resource_uuids': ['2222']}, 2)
+        self.assertEqual([[test_lease_6['uuid']]],
+                         [[l.uuid for l in batch] for batch in batches])
+
+    def test_lease_get_all_filter_by_resource_uuids(self):
+        api.lease_create(test_lease_1)
+        api.lease_create(test_lease_6)
+
+        res = api.lease_get_all({'resource_uuids': ['2222']})
+
+        self.assertEqual([test_lease_6['uuid']], [l.uuid for l in res])
+
+    def test_lease_get_all_filter_by_resources(self):
+        api.lease_create(test_lease_1)
+        api.lease_create(test_lease_6)
+        api.lease_create(dict(test_lease_7, resource_type='test_node'))
+
+        res = api.lease_get_all({'resources': {'dummy_node': ['2222'],
+                                               'test_node': None}})
+        self.assertEqual({test_lease_6['uuid'], test_lease_7['uuid']},
+                         set(l.uuid for l in res))
+
+        res = api.lease_get_all({'resources': {}})
+        self.assertEqual(0, res.count())
+
     def test_lease_get_all_filter_by_status(self):
         api.lease_create(test_lease_1)
         api.lease_create(test_lease_2)
@@ -606,6 +845,59 @@ class TestLeaseAPI(base.DBTestCase):
         assert len(l2) == 1
         assert l2[0].to_dict() == l1.to_dict()
 
+    def test_lease_create_group(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(dict(test_offer_1, uuid='o2',
+                                   resource_uuid='2222'))
+        api.lease_create(dict(test_lease_1, offer_uuid=o1.uuid))
+
+        l1 = dict(test_lease_2, uuid='l1', offer_uuid=o1.uuid,
+                  group_id='g1')
+        l2 = dict(test_lease_2, uuid='l2', offer_uuid=o2.uuid,
+                  resource_uuid='2222', group_id='g1')
+        leases = api.lease_create_group([l1, l2])
+
+        self.assertEqual(['l1', 'l2'], [l.uuid for l in leases])
+        self.assertEqual(
+            ['l1', 'l2'],
+            sorted(l.uuid for l in api.lease_get_all({'group_id': 'g1'})))
+
+    def test_lease_create_group_conflict(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(dict(test_offer_1, uuid='o2',
+                                   resource_uuid='2222'))
+        api.lease_create(dict(test_lease_1, offer_uuid=o2.uuid))
+
+        # the second lease conflicts with the existing one, the third with
+        # the first
+        l1 = dict(test_lease_1, uuid='l1', offer_uuid=o1.uuid)
+        l2 = dict(test_lease_1, uuid='l2', offer_uuid=o2.uuid)
+        l3 = dict(test_lease_2, uuid='l3', offer_uuid=o1.uuid,
+                  start_time=now + datetime.timedelta(days=15))
+        for values_list in ([l1, l2], [l1, l3]):
+            self.assertRaises(e.OfferNoTimeAvailabilities,
+                              api.lease_create_group, values_list)
+        self.assertEqual(['11111'],
+                         [l.uuid for l in api.lease_get_all({})])
+
+    def test_lease_create_group_offer_not_available(self):
+        o1 = api.offer_create(test_offer_1)
+        o2 = api.offer_create(dict(test_offer_1, uuid='o2',
+                                   status=statuses.DELETED))
+
+        l1 = dict(test_lease_1, uuid='l1', offer_uuid=o1.uuid)
+        l2 = dict(test_lease_1, uuid='l2', offer_uuid=o2.uuid)
+        l3 = dict(test_lease_1, uuid='l3', offer_uuid='missing')
+        self.assertRaises(e.OfferNotAvailable,
+                          api.lease_create_group, [l1, l2])
+        self.assertRaises(e.OfferNotFound,
+                          api.lease_create_group, [l1, l3])
+        # the offer does not cover the lease
+        l4 = dict(l1, end_time=now + datetime.timedelta(days=200))
+        self.assertRaises(e.OfferNoTimeAvailabilities,
+                          api.lease_create_group, [l4])
+        self.assertEqual(0, api.lease_get_all({}).count())
+
     def test_lease_update(self):
         o1 = api.offer_create(test_offer_2)
         test_lease_4['offer_uuid'] = o1.uuid
@@ -760,6 +1052,113 @@ class TestLeaseVerifyChildAvailability(base.DBTestCase):
                           parent_lease, start, end,)
 
 
+class TestLeaseDescendantsAPI(base.DBTestCase):
+
+    def setUp(self):
+        super(TestLeaseDescendantsAPI, self).setUp()
+
+        self.parent_lease_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='le55ee',
+            owner_id='0wn3r',
+            resource_uuid='1111',
+            resource_type='dummy_node',
+            start_time=now,
+            end_time=now + datetime.timedelta(days=100),
+            status=statuses.ACTIVE,
+        )
+        self.child_offer_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='le55ee',
+            parent_lease_uuid=self.parent_lease_data['uuid'],
+            resource_uuid='1111',
+            resource_type='dummy_node',
+            start_time=now + datetime.timedelta(days=10),
+            end_time=now + datetime.timedelta(days=20),
+            status=statuses.AVAILABLE,
+        )
+        self.offer_lease_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='le55ee_2',
+            owner_id='le55ee',
+            offer_uuid=self.child_offer_data['uuid'],
+            parent_lease_uuid=self.parent_lease_data['uuid'],
+            resource_uuid='1111',
+            resource_type='dummy_node',
+            start_time=now + datetime.timedelta(days=10),
+            end_time=now + datetime.timedelta(days=15),
+            status=statuses.CREATED,
+        )
+        self.child_lease_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='le55ee_3',
+            owner_id='le55ee',
+            parent_lease_uuid=self.parent_lease_data['uuid'],
+            resource_uuid='1111',
+            resource_type='dummy_node',
+            start_time=now + datetime.timedelta(days=30),
+            end_time=now + datetime.timedelta(days=40),
+            status=statuses.ACTIVE,
+        )
+        self.expired_child_lease_data = dict(
+            self.child_lease_data,
+            uuid=uuidutils.generate_uuid(),
+            status=statuses.EXPIRED,
+        )
+
+        api.lease_create(self.parent_lease_data)
+        api.offer_create(self.child_offer_data)
+        api.lease_create(self.offer_lease_data)
+        api.lease_create(self.child_lease_data)
+        api.lease_create(self.expired_child_lease_data)
+
+    def test_lease_get_descendants(self):
+        leases, offers = api.lease_get_descendants(
+            [self.parent_lease_data['uuid']], [],
+            statuses.LEASE_CAN_DELETE, statuses.OFFER_CAN_DELETE)
+
+        self.assertEqual([self.offer_lease_data['uuid'],
+                          self.child_lease_data['uuid']],
+                         [lease.uuid for lease in leases])
+        self.assertEqual([self.child_offer_data['uuid']],
+                         [offer.uuid for offer in offers])
+
+    def test_lease_get_descendants_offer_root(self):
+        leases, offers = api.lease_get_descendants(
+            [], [self.child_offer_data['uuid']],
+            statuses.LEASE_CAN_DELETE, statuses.OFFER_CAN_DELETE)
+
+        self.assertEqual([self.offer_lease_data['uuid']],
+                         [lease.uuid for lease in leases])
+        self.assertEqual([], offers)
+
+    def test_lease_get_descendants_no_roots(self):
+        self.assertEqual(([], []), api.lease_get_descendants(
+            [], [], statuses.LEASE_CAN_DELETE, statuses.OFFER_CAN_DELETE))
+
+    def test_lease_offer_batch_update(self):
+        expire_time = now + datetime.timedelta(days=1)
+        api.lease_offer_batch_update(
+            {self.parent_lease_data['uuid']: {'status': statuses.DELETED,
+                                              'expire_time': expire_time},
+             self.child_lease_data['uuid']: {'status': statuses.DELETED,
+                                             'expire_time': expire_time},
+             self.offer_lease_data['uuid']: {'status': statuses.WAIT_CANCEL}},
+            {self.child_offer_data['uuid']: {'status': statuses.DELETED}})
+
+        parent = api.lease_get_by_uuid(self.parent_lease_data['uuid'])
+        child = api.lease_get_by_uuid(self.child_lease_data['uuid'])
+        offer_lease = api.lease_get_by_uuid(self.offer_lease_data['uuid'])
+        offer = api.offer_get_by_uuid(self.child_offer_data['uuid'])
+        self.assertEqual(statuses.DELETED, parent.status)
+        self.assertEqual(expire_time, parent.expire_time)
+        self.assertEqual(statuses.DELETED, child.status)
+        self.assertEqual(expire_time, child.expire_time)
+        self.assertEqual(statuses.WAIT_CANCEL, offer_lease.status)
+        self.assertIsNone(offer_lease.expire_time)
+        self.assertEqual(statuses.DELETED, offer.status)
+
+
 class TestResourceVerifyAvailabilityAPI(base.DBTestCase):
 
     def test_resource_verify_availability_offer_conflict(self):
@@ -829,6 +1228,154 @@ class TestResourceVerifyAvailabilityAPI(base.DBTestCase):
                           r_type, r_uuid, start, end)
 
 
+class TestResourceVerifyAdmissionAPI(base.DBTestCase):
+
+    def setUp(self):
+        super(TestResourceVerifyAdmissionAPI, self).setUp()
+
+        self.offer_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='0wn3r',
+            resource_uuid='1111',
+            resource_type='dummy_node',
+            start_time=now,
+            end_time=now + datetime.timedelta(days=100),
+            status=statuses.AVAILABLE,
+        )
+        self.offer_lease_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='le55ee',
+            owner_id='0wn3r',
+            offer_uuid=self.offer_data['uuid'],
+            resource_uuid='1111',
+            resource_type='dummy_node',
+            start_time=now + datetime.timedelta(days=10),
+            end_time=now + datetime.timedelta(days=20),
+            status=statuses.CREATED,
+        )
+        self.parent_lease_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='le55ee',
+            owner_id='0wn3r',
+            resource_uuid='2222',
+            resource_type='dummy_node',
+            start_time=now,
+            end_time=now + datetime.timedelta(days=100),
+            status=statuses.ACTIVE,
+        )
+        self.child_lease_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='le55ee_2',
+            owner_id='le55ee',
+            parent_lease_uuid=self.parent_lease_data['uuid'],
+            resource_uuid='2222',
+            resource_type='dummy_node',
+            start_time=now + datetime.timedelta(days=10),
+            end_time=now + datetime.timedelta(days=20),
+            status=statuses.ACTIVE,
+        )
+        self.child_offer_data = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id='le55ee',
+            parent_lease_uuid=self.parent_lease_data['uuid'],
+            resource_uuid='2222',
+            resource_type='dummy_node',
+            start_time=now + datetime.timedelta(days=30),
+            end_time=now + datetime.timedelta(days=40),
+            status=statuses.AVAILABLE,
+        )
+
+    def test_resource_verify_admission_offer(self):
+        api.offer_create(self.offer_data)
+        api.lease_create(self.offer_lease_data)
+        offer_uuid = self.offer_data['uuid']
+
+        api.resource_verify_admission(
+            now + datetime.timedelta(days=20),
+            now + datetime.timedelta(days=30),
+            offer_uuid=offer_uuid)
+        self.assertRaises(e.OfferNoTimeAvailabilities,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=15),
+                          now + datetime.timedelta(days=25),
+                          offer_uuid=offer_uuid)
+        self.assertRaises(e.OfferNoTimeAvailabilities,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=90),
+                          now + datetime.timedelta(days=110),
+                          offer_uuid=offer_uuid)
+        self.assertRaises(e.OfferNotFound,
+                          api.resource_verify_admission,
+                          now, now + datetime.timedelta(days=1),
+                          offer_uuid='none')
+
+        api.offer_update(offer_uuid, {'status': statuses.DELETED})
+        self.assertRaises(e.OfferNotAvailable,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=20),
+                          now + datetime.timedelta(days=30),
+                          offer_uuid=offer_uuid)
+
+    def test_resource_verify_admission_parent_lease(self):
+        api.lease_create(self.parent_lease_data)
+        api.lease_create(self.child_lease_data)
+        api.offer_create(self.child_offer_data)
+        parent_uuid = self.parent_lease_data['uuid']
+
+        api.resource_verify_admission(
+            now + datetime.timedelta(days=20),
+            now + datetime.timedelta(days=30),
+            parent_lease_uuid=parent_uuid)
+        self.assertRaises(e.LeaseNoTimeAvailabilities,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=15),
+                          now + datetime.timedelta(days=25),
+                          parent_lease_uuid=parent_uuid)
+        self.assertRaises(e.LeaseNoTimeAvailabilities,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=35),
+                          now + datetime.timedelta(days=45),
+                          parent_lease_uuid=parent_uuid)
+        self.assertRaises(e.LeaseNoTimeAvailabilities,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=90),
+                          now + datetime.timedelta(days=110),
+                          parent_lease_uuid=parent_uuid)
+        self.assertRaises(e.LeaseNotFound,
+                          api.resource_verify_admission,
+                          now, now + datetime.timedelta(days=1),
+                          parent_lease_uuid='none')
+
+        api.lease_update(parent_uuid, {'status': statuses.EXPIRED})
+        self.assertRaises(e.LeaseNotActive,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=20),
+                          now + datetime.timedelta(days=30),
+                          parent_lease_uuid=parent_uuid)
+
+    def test_resource_verify_admission_resource(self):
+        api.offer_create(self.offer_data)
+        api.lease_create(self.parent_lease_data)
+
+        api.resource_verify_admission(
+            now + datetime.timedelta(days=100),
+            now + datetime.timedelta(days=110),
+            resource_type='dummy_node', resource_uuid='1111')
+        api.resource_verify_admission(
+            now, now + datetime.timedelta(days=1),
+            resource_type='dummy_node', resource_uuid='3333')
+        self.assertRaises(e.ResourceTimeConflict,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=90),
+                          now + datetime.timedelta(days=110),
+                          resource_type='dummy_node', resource_uuid='1111')
+        self.assertRaises(e.ResourceTimeConflict,
+                          api.resource_verify_admission,
+                          now + datetime.timedelta(days=90),
+                          now + datetime.timedelta(days=110),
+                          resource_type='dummy_node', resource_uuid='2222')
+
+
 class TestEventAPI(base.DBTestCase):
 
     def test_event_get_all(self):
@@ -842,6 +1389,21 @@ class TestEventAPI(base.DBTestCase):
         self.assertIn(test_event_1['id'], event_ids)
         self.assertIn(test_event_2['id'], event_ids)
 
+    def test_event_get_all_batches(self):
+        api.event_create(test_event_1)
+        api.event_create(test_event_2)
+        api.event_create(test_event_3)
+
+        batches = api.event_get_all_batches({}, 2)
+        self.assertEqual([[1, 2], [3]],
+                         [[e.id for e in batch] for batch in batches])
+
+        batches = api.event_get_all_batches({'last_event_id': 1}, 2)
+        self.assertEqual([[2, 3]],
+                         [[e.id for e in batch] for batch in batches])
+        self.assertEqual([], list(api.event_get_all_batches(
+            {'last_event_id': 3}, 2)))
+
     def test_event_get_all_filter_by_last_event_time(self):
         api.event_create(test_event_1)
         api.event_create(test_event_2)
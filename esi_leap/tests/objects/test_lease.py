@@ -17,7 +17,9 @@ import tempfile
 import threading
 
 from esi_leap.common import exception
+from esi_leap.common import identity_map
 from esi_leap.common import statuses
+from esi_leap.common import utils
 from esi_leap.objects import fields as obj_fields
 from esi_leap.objects import lease as lease_obj
 from esi_leap.objects import offer as offer_obj
@@ -42,14 +44,6 @@ class TestLeaseObject(base.DBTestCase):
             status=statuses.AVAILABLE,
             properties={'floor_price': 3},
         )
-        self.test_parent_lease = lease_obj.Lease(
-            uuid=uuidutils.generate_uuid(),
-            status=statuses.ACTIVE,
-        )
-        self.test_parent_lease_expired = lease_obj.Lease(
-            uuid=uuidutils.generate_uuid(),
-            status=statuses.EXPIRED,
-        )
         self.test_lease_dict = {
             'id': 28,
             'name': 'lease',
@@ -67,6 +61,7 @@ class TestLeaseObject(base.DBTestCase):
             'purpose': 'test_purpose',
             'offer_uuid': None,
             'parent_lease_uuid': None,
+            'group_id': None,
             'created_at': None,
             'updated_at': None
         }
@@ -105,6 +100,27 @@ class TestLeaseObject(base.DBTestCase):
             mock_lease_get_by_uuid.assert_called_once_with(lease_uuid)
             self.assertEqual(self.context, lease._context)
 
+    def test_get_identity_map(self):
+        lease_uuid = self.test_lease_dict['uuid']
+        with mock.patch.object(self.db_api, 'lease_get_by_uuid',
+                               autospec=True) as mock_lease_get_by_uuid, \
+                mock.patch.object(self.db_api, 'lease_update',
+                                  autospec=True) as mock_lease_update:
+            mock_lease_get_by_uuid.return_value = self.test_lease_dict
+            mock_lease_update.return_value = self.test_lease_dict
+
+            with identity_map.scope():
+                lease1 = lease_obj.Lease.get(lease_uuid, self.context)
+                lease1.status = statuses.ACTIVE
+                lease2 = lease_obj.Lease.get(lease_uuid, self.context)
+                self.assertEqual(1, mock_lease_get_by_uuid.call_count)
+                lease1.save(self.context)
+                lease_obj.Lease.get(lease_uuid, self.context)
+
+            self.assertIsNot(lease1, lease2)
+            self.assertEqual(self.test_lease_dict['status'], lease2.status)
+            self.assertEqual(2, mock_lease_get_by_uuid.call_count)
+
     def test_get_all(self):
         with mock.patch.object(
                 self.db_api, 'lease_get_all', autospec=True
@@ -119,6 +135,30 @@ class TestLeaseObject(base.DBTestCase):
             self.assertIsInstance(leases[0], lease_obj.Lease)
             self.assertEqual(self.context, leases[0]._context)
 
+    def test_get_all_read_only(self):
+        with mock.patch.object(
+                self.db_api, 'lease_get_all', autospec=True
+        ) as mock_lease_get_all:
+            mock_lease_get_all.return_value = [self.test_lease_dict,
+                                               self.test_lease_offer_dict]
+
+            leases = lease_obj.Lease.get_all({}, self.context, read_only=True)
+            full_leases = lease_obj.Lease.get_all({}, self.context)
+
+            self.assertEqual(len(leases), 2)
+            self.assertNotIsInstance(leases[0], lease_obj.Lease)
+            self.assertEqual(self.context, leases[0]._context)
+            self.assertEqual(full_leases[0].to_dict(), leases[0].to_dict())
+            self.assertEqual(full_leases[1].to_dict(), leases[1].to_dict())
+            self.assertRaises(AttributeError, setattr, leases[0], 'status',
+                              statuses.ACTIVE)
+
+            lease = leases[0].to_object()
+            self.assertIsInstance(lease, lease_obj.Lease)
+            self.assertEqual(self.context, lease._context)
+            self.assertEqual({}, lease.obj_get_changes())
+            self.assertEqual(full_leases[0].to_dict(), lease.to_dict())
+
     @mock.patch('esi_leap.objects.lease.Lease.verify_time_range')
     @mock.patch('esi_leap.db.sqlalchemy.api.lease_create')
     def test_create(self, mock_lc, mock_vtr):
@@ -161,6 +201,84 @@ class TestLeaseObject(base.DBTestCase):
                 assert mock_vtr.call_count == 2
                 mock_lease_create.assert_called_once()
 
+    @mock.patch('esi_leap.common.utils.lock')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_create_group')
+    def test_create_group(self, mock_lcg, mock_lock):
+        leases = [
+            lease_obj.Lease(self.context, **dict(
+                self.test_lease_create_dict, resource_uuid=uuid))
+            for uuid in ('1719', '1718')]
+        values_list = [l.obj_get_changes() for l in leases]
+        mock_lcg.return_value = [
+            dict(self.test_lease_dict, resource_uuid=uuid)
+            for uuid in ('1719', '1718')]
+
+        lease_obj.Lease.create_group(leases, self.context)
+
+        mock_lcg.assert_called_once_with(values_list)
+        self.assertEqual([mock.call('dummy_node-1718', external=True),
+                          mock.call('dummy_node-1719', external=True)],
+                         mock_lock.call_args_list)
+        self.assertEqual(['1719', '1718'],
+                         [l.resource_uuid for l in leases])
+        self.assertEqual(self.test_lease_dict['uuid'], leases[0].uuid)
+
+    @mock.patch('esi_leap.objects.lease.Lease.verify_time_range')
+    @mock.patch('esi_leap.common.utils.lock')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_create_group')
+    def test_claim_first(self, mock_lcg, mock_lock, mock_vtr):
+        leases = [
+            lease_obj.Lease(self.context, **dict(
+                self.test_lease_create_offer_dict, resource_uuid=uuid,
+                uuid=uuidutils.generate_uuid()))
+            for uuid in ('1717', '1718', '1719', '1720')]
+        values_list = [l.obj_get_changes() for l in leases]
+
+        def lock(name, external=False, blocking=True):
+            if name == 'dummy_node-1717':
+                raise utils.LockHeld(name)
+            return mock.MagicMock()
+
+        mock_lock.side_effect = lock
+        mock_vtr.side_effect = [
+            exception.OfferNoTimeAvailabilities(
+                offer_uuid='offer', start_time='start', end_time='end'),
+            None, None]
+        mock_lcg.return_value = [
+            dict(self.test_lease_dict, resource_uuid=uuid)
+            for uuid in ('1719', '1720')]
+
+        claimed = lease_obj.Lease.claim_first(leases, 2, self.context)
+
+        self.assertEqual([leases[2], leases[3]], claimed)
+        mock_lcg.assert_called_once_with(values_list[2:])
+        self.assertEqual(3, mock_vtr.call_count)
+        for call in mock_lock.call_args_list:
+            self.assertEqual({'external': True, 'blocking': False},
+                             call[1])
+
+    @mock.patch('esi_leap.objects.lease.Lease.verify_time_range')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_create_group')
+    def test_claim_first_not_enough(self, mock_lcg, mock_vtr):
+        lease = lease_obj.Lease(self.context,
+                                **self.test_lease_create_offer_dict)
+        mock_vtr.side_effect = exception.ResourceTimeConflict(
+            resource_type='dummy_node', resource_uuid='1718')
+
+        self.assertRaises(exception.OfferClaimNoMatch,
+                          lease_obj.Lease.claim_first, [lease], 1)
+        mock_lcg.assert_not_called()
+
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_create_group')
+    def test_create_group_invalid_time(self, mock_lcg):
+        lease = lease_obj.Lease(self.context, **dict(
+            self.test_lease_create_dict,
+            end_time=self.test_lease_create_dict['start_time']))
+
+        self.assertRaises(exception.InvalidTimeRange,
+                          lease_obj.Lease.create_group, [lease])
+        mock_lcg.assert_not_called()
+
     @mock.patch('esi_leap.objects.lease.Lease.save')
     @mock.patch('esi_leap.objects.lease.Lease.verify_time_range')
     def test_update(self, mock_vtr, mock_save):
@@ -178,6 +296,56 @@ class TestLeaseObject(base.DBTestCase):
             lease.resource_type, lease.resource_uuid)
         mock_save.assert_called_once
 
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    @mock.patch('esi_leap.objects.lease.Lease.verify_time_range')
+    def test_update_group(self, mock_vtr, mock_get_all, mock_lobu):
+        lease = lease_obj.Lease(self.context, **dict(
+            self.test_lease_dict, group_id='group-id'))
+        other = lease_obj.Lease(self.context, **dict(
+            self.test_lease_dict, group_id='group-id',
+            uuid=uuidutils.generate_uuid(), resource_uuid='1719'))
+        mock_get_all.return_value = [lease, other]
+        end_time = lease.end_time
+        new_end_time = end_time + datetime.timedelta(days=10)
+
+        lease.update({'end_time': new_end_time})
+
+        mock_get_all.assert_called_once_with(
+            {'group_id': 'group-id',
+             'status': [statuses.CREATED, statuses.ACTIVE]}, None)
+        mock_vtr.assert_has_calls([
+            mock.call(end_time, new_end_time, None, None,
+                      'dummy_node', '1718'),
+            mock.call(end_time, new_end_time, None, None,
+                      'dummy_node', '1719')])
+        mock_lobu.assert_called_once_with(
+            {lease.uuid: {'end_time': new_end_time},
+             other.uuid: {'end_time': new_end_time}}, {})
+        self.assertEqual(new_end_time, lease.end_time)
+        self.assertEqual(new_end_time, other.end_time)
+
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    @mock.patch('esi_leap.objects.lease.Lease.verify_time_range')
+    def test_update_group_conflict(self, mock_vtr, mock_get_all, mock_lobu):
+        lease = lease_obj.Lease(self.context, **dict(
+            self.test_lease_dict, group_id='group-id'))
+        other = lease_obj.Lease(self.context, **dict(
+            self.test_lease_dict, group_id='group-id',
+            uuid=uuidutils.generate_uuid(), resource_uuid='1719'))
+        mock_get_all.return_value = [lease, other]
+        mock_vtr.side_effect = [None, exception.OfferNoTimeAvailabilities(
+            offer_uuid='offer', start_time='start', end_time='end')]
+        end_time = lease.end_time
+
+        self.assertRaises(exception.OfferNoTimeAvailabilities, lease.update,
+                          {'end_time': end_time + datetime.timedelta(days=10)})
+
+        mock_lobu.assert_not_called()
+        self.assertEqual(end_time, lease.end_time)
+        self.assertEqual(end_time, other.end_time)
+
     @mock.patch('esi_leap.objects.lease.Lease.save')
     @mock.patch('esi_leap.objects.lease.Lease.verify_time_range')
     def test_update_no_end_time(self, mock_vtr, mock_save):
@@ -238,16 +406,18 @@ class TestLeaseObject(base.DBTestCase):
                 assert mock_vtr.call_count == 2
                 mock_save.assert_called_once()
 
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_get_by_uuid')
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.set_lease')
     @mock.patch('esi_leap.objects.lease.Lease.save')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
     def test_fulfill(self, mock_notify,
-                     mock_save, mock_set_lease, mock_ro):
+                     mock_save, mock_set_lease, mock_ro, mock_lgbu):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = TestNode('test-node', '12345')
 
+        mock_lgbu.return_value = self.test_lease_dict
         mock_ro.return_value = test_node
 
         lease.fulfill()
@@ -265,16 +435,33 @@ class TestLeaseObject(base.DBTestCase):
         mock_save.assert_called_once()
         self.assertEqual(lease.status, statuses.ACTIVE)
 
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_get_by_uuid')
+    @mock.patch('esi_leap.objects.lease.Lease.resource_object')
+    @mock.patch('esi_leap.objects.lease.Lease.save')
+    def test_fulfill_not_pending(self, mock_save, mock_ro, mock_lgbu):
+        lease = lease_obj.Lease(self.context, **self.test_lease_dict)
+        mock_lgbu.return_value = dict(self.test_lease_dict,
+                                      status=statuses.WAIT_CANCEL)
+
+        lease.fulfill()
+
+        mock_lgbu.assert_called_once_with(lease.uuid)
+        mock_ro.assert_not_called()
+        mock_save.assert_not_called()
+        self.assertEqual(lease.status, statuses.CREATED)
+
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_get_by_uuid')
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.set_lease')
     @mock.patch('esi_leap.objects.lease.Lease.save')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
     def test_fulfill_error(self, mock_notify, mock_save,
-                           mock_set_lease, mock_ro):
+                           mock_set_lease, mock_ro, mock_lgbu):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = TestNode('test-node', '12345')
 
+        mock_lgbu.return_value = self.test_lease_dict
         mock_ro.return_value = test_node
         mock_set_lease.side_effect = Exception('bad')
 
@@ -298,10 +485,10 @@ class TestLeaseObject(base.DBTestCase):
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.get_lease_uuid')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
-    @mock.patch('esi_leap.objects.lease.Lease.save')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
-    def test_cancel(self, mock_notify, mock_save,
+    def test_cancel(self, mock_notify, mock_lobu,
                     mock_rl, mock_glu, mock_ro,
                     mock_lg, mock_sl):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
@@ -324,18 +511,39 @@ class TestLeaseObject(base.DBTestCase):
         mock_ro.assert_called_once()
         mock_glu.assert_called_once()
         mock_rl.assert_called_once()
-        mock_save.assert_called_once()
+        self.assertEqual(2, mock_lobu.call_count)
+        self.assertEqual(
+            mock.call({lease.uuid: {'status': statuses.WAIT_CANCEL}}, {}),
+            mock_lobu.call_args_list[0])
         self.assertEqual(lease.status, statuses.DELETED)
 
+    @mock.patch('esi_leap.objects.lease.deactivate_tree')
+    @mock.patch('esi_leap.objects.lease.Lease.get_all')
+    def test_cancel_group(self, mock_get_all, mock_dt):
+        lease = lease_obj.Lease(self.context, **dict(
+            self.test_lease_dict, group_id='group-id'))
+        other = lease_obj.Lease(self.context, **dict(
+            self.test_lease_dict, group_id='group-id',
+            uuid=uuidutils.generate_uuid(), resource_uuid='1719'))
+        mock_get_all.return_value = [lease, other]
+
+        lease.cancel(self.context)
+
+        mock_get_all.assert_called_once_with(
+            {'group_id': 'group-id', 'status': statuses.LEASE_CAN_DELETE},
+            self.context)
+        mock_dt.assert_called_once_with(self.context, [lease, other], [],
+                                        'cancel')
+
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.set_lease')
     @mock.patch('esi_leap.objects.lease.Lease.get')
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.get_lease_uuid')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
-    @mock.patch('esi_leap.objects.lease.Lease.save')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
-    def test_cancel_error(self, mock_notify, mock_save,
+    def test_cancel_error(self, mock_notify, mock_lobu,
                           mock_rl, mock_glu,
                           mock_ro, mock_lg, mock_sl):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
@@ -360,7 +568,7 @@ class TestLeaseObject(base.DBTestCase):
         mock_ro.assert_called_once()
         mock_glu.assert_called_once()
         mock_rl.assert_called_once()
-        mock_save.assert_called_once()
+        self.assertEqual(2, mock_lobu.call_count)
         self.assertEqual(lease.status, statuses.WAIT_CANCEL)
 
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.set_lease')
@@ -368,16 +576,19 @@ class TestLeaseObject(base.DBTestCase):
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.get_lease_uuid')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
-    @mock.patch('esi_leap.objects.lease.Lease.save')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
-    def test_cancel_with_parent(self, mock_notify, mock_save,
+    def test_cancel_with_parent(self, mock_notify, mock_lobu,
                                 mock_rl, mock_glu,
                                 mock_ro, mock_lg, mock_sl):
         lease = lease_obj.Lease(self.context,
                                 **self.test_lease_parent_lease_dict)
         test_node = TestNode('test-node', '12345')
 
+        mock_lg.return_value = lease_obj.Lease(
+            self.context, **dict(self.test_lease_dict,
+                                 status=statuses.ACTIVE))
         mock_ro.return_value = test_node
         mock_glu.return_value = lease.uuid
 
@@ -396,16 +607,16 @@ class TestLeaseObject(base.DBTestCase):
         mock_ro.assert_called_once()
         mock_glu.assert_called_once()
         mock_rl.assert_called_once()
-        mock_save.assert_called_once()
+        self.assertEqual(2, mock_lobu.call_count)
         self.assertEqual(lease.status, statuses.DELETED)
 
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.get_lease_uuid')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
-    @mock.patch('esi_leap.objects.lease.Lease.save')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
-    def test_cancel_no_expire(self, mock_notify, mock_save,
+    def test_cancel_no_expire(self, mock_notify, mock_lobu,
                               mock_rl, mock_glu,
                               mock_ro):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
@@ -427,7 +638,7 @@ class TestLeaseObject(base.DBTestCase):
         mock_ro.assert_called_once()
         mock_glu.assert_called_once()
         mock_rl.assert_not_called()
-        mock_save.assert_called_once()
+        self.assertEqual(2, mock_lobu.call_count)
         self.assertEqual(lease.status, statuses.DELETED)
 
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.set_lease')
@@ -435,10 +646,10 @@ class TestLeaseObject(base.DBTestCase):
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.get_lease_uuid')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
-    @mock.patch('esi_leap.objects.lease.Lease.save')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
-    def test_expire(self, mock_notify, mock_save, mock_rl, mock_glu, mock_ro,
+    def test_expire(self, mock_notify, mock_lobu, mock_rl, mock_glu, mock_ro,
                     mock_lg, mock_sl):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = TestNode('test-node', '12345')
@@ -461,7 +672,7 @@ class TestLeaseObject(base.DBTestCase):
         mock_ro.assert_called_once()
         mock_glu.assert_called_once()
         mock_rl.assert_called_once()
-        mock_save.assert_called_once()
+        self.assertEqual(2, mock_lobu.call_count)
         self.assertEqual(lease.status, statuses.EXPIRED)
 
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.set_lease')
@@ -469,10 +680,10 @@ class TestLeaseObject(base.DBTestCase):
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.get_lease_uuid')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
-    @mock.patch('esi_leap.objects.lease.Lease.save')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
-    def test_expire_error(self, mock_notify, mock_save, mock_rl, mock_glu,
+    def test_expire_error(self, mock_notify, mock_lobu, mock_rl, mock_glu,
                           mock_ro, mock_lg, mock_sl):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = TestNode('test-node', '12345')
@@ -496,7 +707,7 @@ class TestLeaseObject(base.DBTestCase):
         mock_ro.assert_called_once()
         mock_glu.assert_called_once()
         mock_rl.assert_called_once()
-        mock_save.assert_called_once()
+        self.assertEqual(2, mock_lobu.call_count)
         self.assertEqual(lease.status, statuses.WAIT_EXPIRE)
 
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.set_lease')
@@ -504,15 +715,18 @@ class TestLeaseObject(base.DBTestCase):
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.get_lease_uuid')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
-    @mock.patch('esi_leap.objects.lease.Lease.save')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
-    def test_expire_with_parent(self, mock_notify, mock_save, mock_rl,
+    def test_expire_with_parent(self, mock_notify, mock_lobu, mock_rl,
                                 mock_glu, mock_ro, mock_lg, mock_sl):
         lease = lease_obj.Lease(self.context,
                                 **self.test_lease_parent_lease_dict)
         test_node = TestNode('test-node', '12345')
 
+        mock_lg.return_value = lease_obj.Lease(
+            self.context, **dict(self.test_lease_dict,
+                                 status=statuses.ACTIVE))
         mock_ro.return_value = test_node
         mock_glu.return_value = lease.uuid
 
@@ -531,16 +745,16 @@ class TestLeaseObject(base.DBTestCase):
         mock_ro.assert_called_once()
         mock_glu.assert_called_once()
         mock_rl.assert_called_once()
-        mock_save.assert_called_once()
+        self.assertEqual(2, mock_lobu.call_count)
         self.assertEqual(lease.status, statuses.EXPIRED)
 
     @mock.patch('esi_leap.objects.lease.Lease.resource_object')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.get_lease_uuid')
     @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
-    @mock.patch('esi_leap.objects.lease.Lease.save')
+    @mock.patch('esi_leap.db.sqlalchemy.api.lease_offer_batch_update')
     @mock.patch('esi_leap.common.notification_utils'
                 '._emit_notification')
-    def test_expire_no_expire(self, mock_notify, mock_save, mock_rl,
+    def test_expire_no_expire(self, mock_notify, mock_lobu, mock_rl,
                               mock_glu, mock_ro):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         test_node = TestNode('test-node', '12345')
@@ -561,9 +775,66 @@ class TestLeaseObject(base.DBTestCase):
         mock_ro.assert_called_once()
         mock_glu.assert_called_once()
         mock_rl.assert_not_called()
-        mock_save.assert_called_once()
+        self.assertEqual(2, mock_lobu.call_count)
         self.assertEqual(lease.status, statuses.EXPIRED)
 
+    @mock.patch('esi_leap.resource_objects.test_node.TestNode.set_lease')
+    @mock.patch('esi_leap.objects.lease.Lease.get')
+    @mock.patch('esi_leap.objects.lease.Lease.resource_object')
+    @mock.patch('esi_leap.resource_objects.test_node.TestNode.remove_lease')
+    @mock.patch('esi_leap.common.notification_utils'
+                '._emit_notification')
+    def test_cancel_with_descendants(self, mock_notify, mock_rl, mock_ro,
+                                     mock_lg, mock_sl):
+        parent = self.test_lease_dict.copy()
+        parent['status'] = statuses.ACTIVE
+        child_offer = dict(
+            uuid=uuidutils.generate_uuid(),
+            project_id=parent['project_id'],
+            resource_type=parent['resource_type'],
+            resource_uuid=parent['resource_uuid'],
+            start_time=parent['start_time'],
+            end_time=parent['end_time'],
+            status=statuses.AVAILABLE,
+            parent_lease_uuid=parent['uuid'],
+        )
+        child_lease = self.test_lease_dict.copy()
+        child_lease.update(
+            id=29,
+            uuid=uuidutils.generate_uuid(),
+            status=statuses.ACTIVE,
+            offer_uuid=child_offer['uuid'],
+            parent_lease_uuid=parent['uuid'])
+        self.db_api.lease_create(parent)
+        self.db_api.offer_create(child_offer)
+        self.db_api.lease_create(child_lease)
+
+        test_node = TestNode('test-node', '12345')
+        mock_ro.return_value = test_node
+        lease = lease_obj.Lease._from_db_object(
+            self.context, lease_obj.Lease(),
+            self.db_api.lease_get_by_uuid(parent['uuid']))
+
+        with mock.patch.object(TestNode, 'get_lease_uuid',
+                               return_value=child_lease['uuid']):
+            lease.cancel()
+
+        mock_ro.assert_called_once()
+        mock_rl.assert_called_once()
+        self.assertEqual(child_lease['uuid'], mock_rl.call_args[0][0].uuid)
+        mock_lg.assert_not_called()
+        mock_sl.assert_not_called()
+        self.assertEqual(statuses.DELETED, lease.status)
+        self.assertEqual(
+            statuses.DELETED,
+            self.db_api.lease_get_by_uuid(parent['uuid']).status)
+        self.assertEqual(
+            statuses.DELETED,
+            self.db_api.lease_get_by_uuid(child_lease['uuid']).status)
+        self.assertEqual(
+            statuses.DELETED,
+            self.db_api.offer_get_by_uuid(child_offer['uuid']).status)
+
     def test_destroy(self):
         lease = lease_obj.Lease(self.context, **self.test_lease_dict)
         with mock.patch.object(self.db_api, 'lease_destroy',
@@ -599,70 +870,50 @@ class TestLeaseObject(base.DBTestCase):
         mock_gro.assert_called_once_with(lease.resource_type,
                                          lease.resource_uuid)
 
-    @mock.patch('esi_leap.db.sqlalchemy.api.resource_verify_availability')
-    @mock.patch('esi_leap.db.sqlalchemy.api.offer_verify_availability')
-    @mock.patch('esi_leap.objects.offer.Offer.get')
-    def test_verify_time_range(self, mock_og, mock_ova, mock_rva):
+    @mock.patch('esi_leap.db.sqlalchemy.api.resource_verify_admission')
+    def test_verify_time_range(self, mock_rva):
         lease = lease_obj.Lease(self.context, **self.test_lease_create_dict)
         lease.verify_time_range(lease.start_time, lease.end_time,
                                 None, None,
                                 lease.resource_type, lease.resource_uuid)
 
-        mock_og.assert_not_called
-        mock_ova.assert_not_called
-        mock_rva.assert_called_once_with(lease.resource_type,
-                                         lease.resource_uuid,
-                                         lease.start_time,
-                                         lease.end_time)
-
-    @mock.patch('esi_leap.db.sqlalchemy.api.resource_verify_availability')
-    @mock.patch('esi_leap.db.sqlalchemy.api.offer_verify_availability')
-    @mock.patch('esi_leap.objects.offer.Offer.get')
-    def test_verify_time_range_with_offer(self, mock_og, mock_ova, mock_rva):
+        mock_rva.assert_called_once_with(lease.start_time,
+                                         lease.end_time,
+                                         offer_uuid=None,
+                                         parent_lease_uuid=None,
+                                         resource_type=lease.resource_type,
+                                         resource_uuid=lease.resource_uuid)
+
+    @mock.patch('esi_leap.db.sqlalchemy.api.resource_verify_admission')
+    def test_verify_time_range_with_offer(self, mock_rva):
         lease = lease_obj.Lease(self.context,
                                 **self.test_lease_create_offer_dict)
-        mock_og.return_value = self.test_offer
         lease.verify_time_range(lease.start_time, lease.end_time,
                                 lease.offer_uuid, None,
                                 lease.resource_type, lease.resource_uuid)
 
-        mock_og.assert_called_once_with(lease.offer_uuid)
-        mock_ova.assert_called_once_with(self.test_offer,
-                                         lease.start_time,
-                                         lease.end_time)
-        mock_rva.assert_not_called
+        mock_rva.assert_called_once_with(lease.start_time,
+                                         lease.end_time,
+                                         offer_uuid=lease.offer_uuid,
+                                         parent_lease_uuid=None,
+                                         resource_type=lease.resource_type,
+                                         resource_uuid=lease.resource_uuid)
 
-    @mock.patch('esi_leap.db.sqlalchemy.api.lease_verify_child_availability')
-    @mock.patch('esi_leap.objects.lease.Lease.get')
-    def test_verify_time_range_with_parent_lease(self, mock_lg, mock_lvca):
+    @mock.patch('esi_leap.db.sqlalchemy.api.resource_verify_admission')
+    def test_verify_time_range_with_parent_lease(self, mock_rva):
         lease = lease_obj.Lease(self.context,
                                 **self.test_lease_create_parent_lease_dict)
-        mock_lg.return_value = self.test_parent_lease
         lease.verify_time_range(lease.start_time, lease.end_time,
                                 None, lease.parent_lease_uuid,
                                 lease.resource_type, lease.resource_uuid)
 
-        mock_lg.assert_called_once_with('parent-lease-uuid')
-        mock_lvca.assert_called_once_with(self.test_parent_lease,
-                                          lease.start_time,
-                                          lease.end_time)
-
-    @mock.patch('esi_leap.db.sqlalchemy.api.lease_verify_child_availability')
-    @mock.patch('esi_leap.objects.lease.Lease.get')
-    def test_verify_time_range_with_parent_lease_expired(
-            self, mock_lg, mock_lvca):
-        lease = lease_obj.Lease(self.context,
-                                **self.test_lease_create_parent_lease_dict)
-        mock_lg.return_value = self.test_parent_lease_expired
-
-        self.assertRaises(exception.LeaseNotActive,
-                          lease.verify_time_range,
-                          lease.start_time, lease.end_time,
-                          None, lease.parent_lease_uuid,
-                          lease.resource_type, lease.resource_uuid)
-
-        mock_lg.assert_called_once_with('parent-lease-uuid')
-        mock_lvca.assert_not_called()
+        mock_rva.assert_called_once_with(
+            lease.start_time,
+            lease.end_time,
+            offer_uuid=None,
+            parent_lease_uuid='parent-lease-uuid',
+            resource_type=lease.resource_type,
+            resource_uuid=lease.resource_uuid)
 
     def test_verify_time_range_invalid_time(self):
         bad_lease = {
@@ -12,11 +12,13 @@
 
 import datetime
 import mock
+from oslo_context import context as ctx
 from oslo_utils import uuidutils
 import tempfile
 import threading
 
 from esi_leap.common import exception
+from esi_leap.common import identity_map
 from esi_leap.common import statuses
 from esi_leap.objects import lease
 from esi_leap.objects import offer
@@ -77,6 +79,22 @@ class TestOfferObject(base.DBTestCase):
         mock_offer_get_by_uuid.assert_called_once_with(offer_uuid)
         self.assertEqual(self.context, o._context)
 
+    @mock.patch('esi_leap.db.sqlalchemy.api.offer_get_by_uuid')
+    def test_get_identity_map(self, mock_offer_get_by_uuid):
+        offer_uuid = self.test_offer_data['uuid']
+        mock_offer_get_by_uuid.return_value = self.test_offer_data
+
+        other_context = ctx.RequestContext(project_id='other')
+        with identity_map.scope():
+            o1 = offer.Offer.get(offer_uuid, self.context)
+            o1.status = statuses.DELETED
+            o2 = offer.Offer.get(offer_uuid, other_context)
+
+        self.assertIsNot(o1, o2)
+        self.assertEqual(self.test_offer_data['status'], o2.status)
+        self.assertEqual(other_context, o2._context)
+        mock_offer_get_by_uuid.assert_called_once_with(offer_uuid)
+
     @mock.patch('esi_leap.db.sqlalchemy.api.offer_get_all')
     def test_get_all(self, mock_offer_get_all):
         mock_offer_get_all.return_value = [self.test_offer_data]
@@ -88,6 +106,27 @@ class TestOfferObject(base.DBTestCase):
         self.assertIsInstance(offers[0], offer.Offer)
         self.assertEqual(self.context, offers[0]._context)
 
+    @mock.patch('esi_leap.db.sqlalchemy.api.offer_get_conflict_times')
+    @mock.patch('esi_leap.objects.offer.datetime')
+    @mock.patch('esi_leap.db.sqlalchemy.api.offer_get_all')
+    def test_get_all_read_only(self, mock_offer_get_all, mock_datetime,
+                               mock_ogct):
+        mock_offer_get_all.return_value = [self.test_offer_data]
+        mock_datetime.datetime.now = mock.Mock(
+            return_value=self.test_offer_data['start_time'])
+        mock_ogct.return_value = []
+
+        offers = offer.Offer.get_all({}, self.context, read_only=True)
+        o = offer.Offer(self.context, **self.test_offer_data)
+
+        mock_offer_get_all.assert_called_once_with({})
+        self.assertEqual(len(offers), 1)
+        self.assertNotIsInstance(offers[0], offer.Offer)
+        self.assertEqual(o.to_dict(), offers[0].to_dict())
+        self.assertEqual(o.get_availabilities(),
+                         offers[0].get_availabilities())
+        self.assertIsInstance(offers[0].to_object(), offer.Offer)
+
     @mock.patch('esi_leap.db.sqlalchemy.api.offer_get_conflict_times')
     @mock.patch('esi_leap.objects.offer.datetime')
     def test_get_availabilities_offer_in_future(self, mock_datetime,
@@ -216,6 +255,24 @@ class TestOfferObject(base.DBTestCase):
                                          o.end_time)
         mock_oc.assert_called_once_with(self.test_offer_create_data)
 
+    @mock.patch('esi_leap.common.utils.lock')
+    @mock.patch('esi_leap.db.sqlalchemy.api.offer_create_bulk')
+    def test_create_bulk(self, mock_ocb, mock_lock):
+        other = dict(self.test_offer_create_data, resource_uuid='1234')
+        mock_ocb.return_value = ([self.test_offer_data], [other])
+
+        offers, conflicts = offer.Offer.create_bulk(
+            [self.test_offer_create_data, other], self.context)
+
+        mock_ocb.assert_called_once_with(
+            [self.test_offer_create_data, other])
+        self.assertEqual([mock.call('dummy_node-1234', external=True),
+                          mock.call('dummy_node-1718', external=True)],
+                         mock_lock.call_args_list)
+        self.assertEqual([self.test_offer_data['uuid']],
+                         [o.uuid for o in offers])
+        self.assertEqual([other], conflicts)
+
     def test_create_invalid_time(self):
         start = self.test_offer_data['start_time']
         bad_offer = {
@@ -319,12 +376,80 @@ class TestOfferObject(base.DBTestCase):
         self.assertEqual(self.context, o._context)
         self.assertEqual(updated_at, o.updated_at)
 
+    def test_get_capacity(self):
+        offers = []
+        for resource_uuid, day in (('111', 1), ('222', 2)):
+            offers.append(offer.Offer.dbapi.offer_create({
+                'uuid': uuidutils.generate_uuid(),
+                'project_id': '0wn5r',
+                'resource_type': 'test_node',
+                'resource_uuid': resource_uuid,
+                'start_time': datetime.datetime(2016, 7, day),
+                'end_time': datetime.datetime(2016, 7, 5),
+                'status': statuses.AVAILABLE}))
+        lease_data = {
+            'uuid': uuidutils.generate_uuid(),
+            'offer_uuid': offers[0].uuid,
+            'project_id': 'l355e',
+            'owner_id': '0wn5r',
+            'resource_type': 'test_node',
+            'resource_uuid': '111',
+            'start_time': datetime.datetime(2016, 7, 3),
+            'end_time': datetime.datetime(2016, 7, 3, 12),
+            'status': statuses.CREATED,
+        }
+        lease.Lease.dbapi.lease_create(lease_data)
+        args = ({'status': [statuses.AVAILABLE]},
+                datetime.datetime(2016, 7, 1), datetime.datetime(2016, 7, 6),
+                datetime.timedelta(days=1))
+
+        self.assertEqual({'fake': [1, 2, 1, 2, 0]},
+                         offer.Offer.get_capacity(*args))
+        self.assertEqual({}, offer.Offer.get_capacity(*args, 'other'))
+
+        with mock.patch.object(offer.Offer, 'get_calendar') as mock_gc:
+            self.assertEqual({'fake': [1, 2, 1, 2, 0]},
+                             offer.Offer.get_capacity(*args))
+            mock_gc.assert_not_called()
+
+        # versions the caller already has are not computed again
+        versions = (offer.Offer.get_version(args[0]),
+                    offer.Offer.get_lease_version(args[0]))
+        with mock.patch.object(offer.Offer, 'get_version') as mock_gv:
+            self.assertEqual({'fake': [1, 2, 1, 2, 0]},
+                             offer.Offer.get_capacity(*args, None, versions))
+            mock_gv.assert_not_called()
+
+        lease.Lease.dbapi.lease_create(dict(
+            lease_data, uuid=uuidutils.generate_uuid(),
+            offer_uuid=offers[1].uuid, resource_uuid='222'))
+
+        self.assertEqual({'fake': [1, 2, 0, 2, 0]},
+                         offer.Offer.get_capacity(*args))
+
+        # an update of an existing offer within the same clock tick
+        updated_at = offer.Offer.dbapi.offer_get_by_uuid(
+            offers[1].uuid).updated_at
+        offer.Offer.dbapi.offer_update(offers[1].uuid, {
+            'end_time': datetime.datetime(2016, 7, 4),
+            'updated_at': updated_at})
+
+        self.assertEqual({'fake': [1, 2, 0, 1, 0]},
+                         offer.Offer.get_capacity(*args))
+
     @mock.patch('esi_leap.db.sqlalchemy.api.offer_verify_availability')
     def test_verify_availability(self, mock_ova):
         o = offer.Offer(self.context, **self.test_offer_data)
         o.verify_availability(o.start_time, o.end_time)
         mock_ova.assert_called_once_with(o, o.start_time, o.end_time)
 
+    @mock.patch('esi_leap.db.sqlalchemy.api.offer_check_windows')
+    def test_check_windows(self, mock_ocw):
+        o = offer.Offer(self.context, **self.test_offer_data)
+        windows = [(o.start_time, o.end_time)]
+        offer.Offer.check_windows([o], windows)
+        mock_ocw.assert_called_once_with([o], windows)
+
     @mock.patch('esi_leap.objects.offer.get_resource_object')
     def test_resource_object(self, mock_gro):
         o = offer.Offer(self.context, **self.test_offer_data)
@@ -11,7 +11,11 @@
 #    under the License.
 
 import datetime
+import fixtures
 import json
+import os
+import shutil
+import tempfile
 
 import mock
 
@@ -67,9 +71,22 @@ class TestDummyNode(base.TestCase):
 
     def setUp(self):
         super(TestDummyNode, self).setUp()
+        self.node_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.node_dir)
+        self._write_node('1111', self.test_node_1)
+        self._write_node('2222', self.test_node_2)
+
+        store = dummy_node.FileNodeStore(self.node_dir)
+        self.useFixture(fixtures.MockPatchObject(dummy_node, '_store', store))
         self.fake_dummy_node = dummy_node.DummyNode('1111')
-        self.fake_read_data_1 = json.dumps(self.test_node_1)
-        self.fake_read_data_2 = json.dumps(self.test_node_2)
+
+    def _write_node(self, uuid, node_dict):
+        with open(os.path.join(self.node_dir, uuid), 'w') as node_file:
+            json.dump(node_dict, node_file)
+
+    def _read_node(self, uuid):
+        with open(os.path.join(self.node_dir, uuid)) as node_file:
+            return json.load(node_file)
 
     def test_resource_type(self):
         self.assertEqual('dummy_node', self.fake_dummy_node.resource_type)
@@ -82,71 +99,126 @@ class TestDummyNode(base.TestCase):
                          self.fake_dummy_node.get_name())
 
     def test_get_resource_class(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_1)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            resource_class = self.fake_dummy_node.get_resource_class()
-            self.assertEqual(resource_class,
-                             self.test_node_1['resource_class'])
-            mock_file_open.assert_called_once()
+        resource_class = self.fake_dummy_node.get_resource_class()
+        self.assertEqual(resource_class, self.test_node_1['resource_class'])
+
+    def test_bulk_load(self):
+        with mock.patch.object(dummy_node.FileNodeStore, 'get_many',
+                               wraps=dummy_node._store.get_many) as mock_gm:
+            resources = dummy_node.DummyNode.bulk_load(
+                ['1111', '2222', '1111', '3333'])
+            mock_gm.assert_called_once_with({'1111', '2222', '3333'})
+
+        self.assertEqual(3, len(resources))
+        self.assertEqual('dummy_node', resources.resource_type)
+        resource = resources['1111']
+        with mock.patch('builtins.open') as mock_file_open:
+            self.assertEqual(resource.get_owner_project_id(),
+                             self.test_node_1['project_owner_id'])
+            self.assertEqual(resource.get_lease_uuid(), '001')
+            self.assertEqual(resource.get_lessee_project_id(),
+                             self.test_node_1['project_id'])
+            mock_file_open.assert_not_called()
+        self.assertIsNone(resources['3333']._node)
 
     def test_get_properties(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_1)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            properties = self.fake_dummy_node.get_properties()
-            self.assertEqual(properties, self.test_node_1['properties'])
-            mock_file_open.assert_called_once()
+        properties = self.fake_dummy_node.get_properties()
+        self.assertEqual(properties, self.test_node_1['properties'])
 
     def test_get_owner_project_id(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_1)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            self.assertEqual(self.fake_dummy_node.get_owner_project_id(),
-                             self.test_node_1['project_owner_id'])
-            self.assertEqual(mock_file_open.call_count, 1)
+        self.assertEqual(self.fake_dummy_node.get_owner_project_id(),
+                         self.test_node_1['project_owner_id'])
 
     def test_get_lease_uuid(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_1)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            lease_uuid = self.fake_dummy_node.get_lease_uuid()
-            self.assertEqual(lease_uuid, '001')
-            mock_file_open.assert_called_once()
+        lease_uuid = self.fake_dummy_node.get_lease_uuid()
+        self.assertEqual(lease_uuid, '001')
 
     def test_get_lessee_project_id(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_1)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            project_id = self.fake_dummy_node.get_lessee_project_id()
-            self.assertEqual(project_id, '654321')
-            mock_file_open.assert_called_once()
+        project_id = self.fake_dummy_node.get_lessee_project_id()
+        self.assertEqual(project_id, '654321')
 
     def test_get_node_power_state(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_1)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            power_state = self.fake_dummy_node.get_node_power_state()
-            self.assertEqual(power_state, 'off')
-            mock_file_open.assert_called_once()
+        power_state = self.fake_dummy_node.get_node_power_state()
+        self.assertEqual(power_state, 'off')
 
     def test_get_node_provision_state(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_1)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            provision_state = self.fake_dummy_node.get_node_provision_state()
-            self.assertEqual(provision_state, 'enroll')
-            mock_file_open.assert_called_once()
+        provision_state = self.fake_dummy_node.get_node_provision_state()
+        self.assertEqual(provision_state, 'enroll')
+
+    def test_get_node_cached(self):
+        self.fake_dummy_node.get_resource_class()
+        with mock.patch('builtins.open') as mock_file_open:
+            self.fake_dummy_node.get_lease_uuid()
+            self.fake_dummy_node.get_lessee_project_id()
+            mock_file_open.assert_not_called()
+
+    def test_get_node_changed(self):
+        self.assertEqual(self.fake_dummy_node.get_lease_uuid(), '001')
+        node_dict = dict(self.test_node_1, lease_uuid='002')
+        self._write_node('1111', node_dict)
+        # make sure the change is visible even within mtime granularity
+        os.utime(os.path.join(self.node_dir, '1111'), ns=(0, 0))
+        self.assertEqual(self.fake_dummy_node.get_lease_uuid(), '002')
 
     def test_set_lease(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_2)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            fake_lease = FakeLease()
-            self.fake_dummy_node.set_lease(fake_lease)
-            self.assertEqual(mock_file_open.call_count, 2)
+        fake_lease = FakeLease()
+        node = dummy_node.DummyNode('2222')
+        self.assertEqual(node.get_lease_uuid(), '')
+        node.set_lease(fake_lease)
+
+        node_dict = self._read_node('2222')
+        self.assertEqual(node_dict['lease_uuid'], fake_lease.uuid)
+        self.assertEqual(node_dict['project_id'], fake_lease.project_id)
+        self.assertEqual(node.get_lease_uuid(), fake_lease.uuid)
+        self.assertEqual(['1111', '2222'], sorted(os.listdir(self.node_dir)))
 
     def test_remove_lease(self):
-        mock_open = mock.mock_open(read_data=self.fake_read_data_1)
-        with mock.patch('builtins.open', mock_open) as mock_file_open:
-            fake_lease = FakeLease()
-            self.fake_dummy_node.remove_lease(fake_lease)
-            self.assertEqual(mock_file_open.call_count, 2)
-
-    @mock.patch('builtins.open')
-    def test_get_deleted_node_info(self, mock_open):
-        mock_open.side_effect = FileNotFoundError
+        fake_lease = FakeLease()
+        self.fake_dummy_node.remove_lease(fake_lease)
+
+        node_dict = self._read_node('1111')
+        self.assertNotIn('lease_uuid', node_dict)
+        self.assertNotIn('project_id', node_dict)
+        self.assertEqual(self.fake_dummy_node.get_lease_uuid(), '')
+
+    def test_get_deleted_node_info(self):
+        os.remove(os.path.join(self.node_dir, '1111'))
         self.assertEqual(self.fake_dummy_node.get_resource_class(),
                          'unknown-class')
+
+
+class TestSqliteNodeStore(base.TestCase):
+
+    def setUp(self):
+        super(TestSqliteNodeStore, self).setUp()
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        self.store = dummy_node.SqliteNodeStore(
+            os.path.join(tmp_dir, 'nodes.db'))
+        self.useFixture(fixtures.MockPatchObject(dummy_node, '_store',
+                                                 self.store))
+
+    def test_put_get(self):
+        self.assertIsNone(self.store.get('1111'))
+        self.store.put('1111', TestDummyNode.test_node_1)
+        self.assertEqual(TestDummyNode.test_node_1, self.store.get('1111'))
+
+    def test_get_many(self):
+        self.store.put('1111', TestDummyNode.test_node_1)
+        self.store.put('2222', TestDummyNode.test_node_2)
+        self.assertEqual({'1111': TestDummyNode.test_node_1,
+                          '2222': TestDummyNode.test_node_2},
+                         self.store.get_many(['1111', '2222', '3333']))
+
+    def test_dummy_node(self):
+        self.store.put('2222', TestDummyNode.test_node_2)
+        node = dummy_node.DummyNode('2222')
+        fake_lease = FakeLease()
+
+        node.set_lease(fake_lease)
+        self.assertEqual(fake_lease.uuid,
+                         self.store.get('2222')['lease_uuid'])
+        node.remove_lease(fake_lease)
+        self.assertNotIn('lease_uuid', self.store.get('2222'))
+        self.assertEqual('unknown-class',
+                         dummy_node.DummyNode('3333').get_resource_class())
@@ -231,3 +231,55 @@ class TestIronicNode(base.TestCase):
 
         self.assertRaises(exception.NodeNotFound,
                           test_unknown_node._get_node)
+
+    @mock.patch('esi_leap.common.ironic.get_node')
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    def test_bulk_load(self, mock_gnl, mock_gn):
+        other_uuid = '8d4f9b6a-4e8b-4c43-9a36-5d3e5e3a52a1'
+        fake_get_node = FakeIronicNode()
+        mock_gnl.return_value = [fake_get_node]
+
+        resources = ironic_node.IronicNode.bulk_load(
+            [fake_uuid, other_uuid, fake_uuid])
+
+        mock_gnl.assert_called_once_with()
+        self.assertEqual(2, len(resources))
+        self.assertEqual('ironic_node', resources.resource_type)
+        self.assertEqual(fake_get_node, resources[fake_uuid]._get_node())
+        self.assertEqual('123456',
+                         resources[fake_uuid].get_owner_project_id())
+        self.assertEqual('001', resources[fake_uuid].get_lease_uuid())
+        self.assertEqual('abcdef',
+                         resources[fake_uuid].get_lessee_project_id())
+        mock_gn.assert_not_called()
+        self.assertIsNone(resources[other_uuid]._node)
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    def test_find_by_resource_class(self, mock_gnl):
+        fake_get_node = FakeIronicNode()
+        mock_gnl.return_value = [fake_get_node]
+
+        resources = ironic_node.IronicNode.find_by_resource_class(
+            'baremetal')
+
+        mock_gnl.assert_called_once_with(resource_class='baremetal')
+        self.assertEqual([fake_uuid], [uuid for uuid, _ in resources.items()])
+        self.assertEqual('fake-node', resources[fake_uuid].get_name())
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    def test_find_by_resource_class_resource_list(self, mock_gnl):
+        resources = ironic_node.IronicNode.find_by_resource_class(
+            'gpu', resource_list=[FakeIronicNode()])
+
+        mock_gnl.assert_not_called()
+        self.assertEqual(0, len(resources))
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    def test_bulk_load_resource_list(self, mock_gnl):
+        fake_get_node = FakeIronicNode()
+
+        resources = ironic_node.IronicNode.bulk_load(
+            [fake_uuid], resource_list=[fake_get_node])
+
+        mock_gnl.assert_not_called()
+        self.assertEqual(fake_get_node, resources[fake_uuid]._get_node())
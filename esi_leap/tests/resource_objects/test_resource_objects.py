@@ -13,6 +13,7 @@
 import mock
 
 from esi_leap.common import exception
+from esi_leap.common import identity_map
 from esi_leap import resource_objects
 from esi_leap.tests import base
 
@@ -91,3 +92,30 @@ class TestResourceObjects(base.TestCase):
         self.assertRaises(exception.ResourceTypeUnknown,
                           resource_objects.get_resource_object,
                           'foo_node', '1111')
+
+    def test_bulk_load_all(self):
+        with identity_map.scope():
+            resources = resource_objects.bulk_load_all(
+                [('test_node', '1111'), ('test_node', '2222'),
+                 ('test_node', '1111')])
+
+            self.assertEqual({('test_node', '1111'), ('test_node', '2222')},
+                             set(resources))
+            self.assertIs(resources[('test_node', '1111')],
+                          resource_objects.get_resource_object('test_node',
+                                                               '1111'))
+
+    @mock.patch('esi_leap.common.ironic.get_node_list')
+    def test_find_by_resource_class(self, mock_gnl):
+        fake_node = mock.Mock(uuid='8d4f9b6a-4e8b-4c43-9a36-5d3e5e3a52a1',
+                              resource_class='baremetal')
+        mock_gnl.return_value = [fake_node]
+
+        with identity_map.scope():
+            found = resource_objects.find_by_resource_class(
+                'baremetal', ('ironic_node', 'test_node'))
+
+            self.assertIsNone(found['test_node'])
+            resource = found['ironic_node'][fake_node.uuid]
+            self.assertIs(resource, resource_objects.get_resource_object(
+                'ironic_node', fake_node.uuid))
@@ -81,3 +81,10 @@ class TestTestNode(base.TestCase):
     def test_get_node_provision_state(self):
         self.assertEqual(self.fake_test_node.get_node_provision_state(),
                          'available')
+
+    def test_bulk_load(self):
+        resources = test_node.TestNode.bulk_load(['1111', '2222'])
+        self.assertEqual(2, len(resources))
+        self.assertEqual('test_node', resources.resource_type)
+        self.assertEqual('1111', resources['1111'].get_uuid())
+        self.assertIn('2222', resources)
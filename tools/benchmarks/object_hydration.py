@@ -0,0 +1,87 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Microbenchmark for building lease lists from database rows.
+
+Compares full versioned objects against the read-only views used by the
+list endpoints:
+
+    python tools/benchmarks/object_hydration.py --rows 100000
+"""
+
+import argparse
+import datetime
+import time
+
+from oslo_utils import uuidutils
+
+from esi_leap.common import statuses
+from esi_leap.objects import lease as lease_obj
+
+
+def make_rows(count):
+    start = datetime.datetime(2016, 7, 16, 19, 20, 30)
+    rows = []
+    for i in range(count):
+        rows.append({
+            'id': i,
+            'name': 'lease-%d' % i,
+            'uuid': uuidutils.generate_uuid(),
+            'project_id': 'le55ee',
+            'owner_id': '0wn5r',
+            'purpose': None,
+            'resource_type': 'dummy_node',
+            'resource_uuid': uuidutils.generate_uuid(),
+            'start_time': start,
+            'end_time': start + datetime.timedelta(days=100),
+            'fulfill_time': None,
+            'expire_time': None,
+            'status': statuses.CREATED,
+            'properties': {},
+            'offer_uuid': uuidutils.generate_uuid(),
+            'parent_lease_uuid': None,
+            'group_id': None,
+            'created_at': start,
+            'updated_at': None,
+        })
+    return rows
+
+
+def run(name, func, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(None, rows)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    print('%-10s %8.3fs  %6.2fus/row' % (name, best,
+                                         best * 1e6 / len(rows)))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print('%d rows, best of %d' % (args.rows, args.repeat))
+    full = run('objects', lease_obj.Lease._from_db_object_list, rows,
+               args.repeat)
+    view = run('views', lease_obj.Lease._view_from_db_object_list, rows,
+               args.repeat)
+    print('speedup    %8.1fx' % (full / view))
+
+
+if __name__ == '__main__':
+    main()
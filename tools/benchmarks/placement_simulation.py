@@ -0,0 +1,117 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Simulation of lease placement on a pool of offered nodes.
+
+Replays the same stream of random lease requests, a mix of short and
+long ones, against one offer per node, placing each request with the
+best fit rule used by POST /v1/offers/claim or on a random free offer.
+Reports the share of requests and of requested hours that could be
+placed, and the CPU time spent choosing:
+
+    python tools/benchmarks/placement_simulation.py --nodes 50
+"""
+
+import argparse
+import bisect
+import collections
+import random
+import time
+
+from esi_leap.common import placement
+
+# times are whole hours from the start of the horizon
+SimOffer = collections.namedtuple('SimOffer',
+                                  ['uuid', 'start_time', 'end_time'])
+
+
+def make_requests(count, horizon, long_share, seed):
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        if rng.random() < long_share:
+            duration = rng.randint(72, 240)
+        else:
+            duration = rng.randint(4, 24)
+        start = rng.randint(0, horizon - duration)
+        requests.append((start, start + duration))
+    return requests
+
+
+def is_free(conflicts, start, end):
+    # conflicts are sorted and never overlap each other, so only the last
+    # one starting before end can overlap start to end
+    i = bisect.bisect_left(conflicts, (end,))
+    return i == 0 or conflicts[i - 1][1] <= start
+
+
+def place_best_fit(offers, conflicts, start, end, rng):
+    return placement.best_fit(offers, conflicts, start, end)[0]
+
+
+def place_random(offers, conflicts, start, end, rng):
+    return rng.choice(offers)
+
+
+def simulate(choose, nodes, horizon, requests, seed):
+    rng = random.Random(seed)
+    offers = [SimOffer('node-%04d' % i, 0, horizon) for i in range(nodes)]
+    conflicts = dict((o.uuid, []) for o in offers)
+
+    accepted = 0
+    hours = 0
+    cpu = 0.0
+    for start, end in requests:
+        t0 = time.process_time()
+        free = [o for o in offers if is_free(conflicts[o.uuid], start, end)]
+        chosen = choose(free, conflicts, start, end, rng) if free else None
+        cpu += time.process_time() - t0
+
+        if chosen is not None:
+            bisect.insort(conflicts[chosen.uuid], (start, end))
+            accepted += 1
+            hours += end - start
+    return accepted, hours, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=50)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--long-share', type=float, default=0.3,
+                        help='share of requests of 3 to 10 days; the '
+                             'others last 4 to 24 hours')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    horizon = args.days * 24
+    requests = make_requests(args.requests, horizon, args.long_share,
+                             args.seed)
+    requested_hours = sum(end - start for start, end in requests)
+
+    print('%d nodes over %d days, %d requests' % (
+        args.nodes, args.days, args.requests))
+    print('%-10s %10s %10s %14s' % ('placement', 'accepted', 'hours',
+                                    'cpu/request'))
+    for name, choose in (('random', place_random),
+                         ('best_fit', place_best_fit)):
+        accepted, hours, cpu = simulate(choose, args.nodes, horizon,
+                                        requests, args.seed)
+        print('%-10s %9.1f%% %9.1f%% %12.1fus' % (
+            name, 100.0 * accepted / len(requests),
+            100.0 * hours / requested_hours,
+            cpu * 1e6 / len(requests)))
+
+
+if __name__ == '__main__':
+    main()
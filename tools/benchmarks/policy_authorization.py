@@ -0,0 +1,98 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Microbenchmark for policy checks made while serving a request.
+
+Compares parsing the configuration on every check, as get_enforcer used
+to, against the shared enforcer with and without the per-request
+decision cache:
+
+    python tools/benchmarks/policy_authorization.py --requests 2000
+"""
+
+import argparse
+import time
+
+from esi_leap.common import identity_map
+from esi_leap.common import policy
+import esi_leap.conf
+
+CONF = esi_leap.conf.CONF
+
+# the checks made by GET /v1/offers/<uuid> for an owner
+CHECKS = (
+    'esi_leap:offer:get',
+    'esi_leap:offer:offer_admin',
+    'esi_leap:offer:get',
+    'esi_leap:offer:get',
+)
+CREDS = {'user_id': 'user', 'project_id': 'owner',
+         'roles': ['esi_leap_owner']}
+
+
+def reparse(requests):
+    enforcer = policy.get_enforcer()
+    for _ in range(requests):
+        for rule in CHECKS:
+            CONF([], project='esi-leap')
+            enforcer.authorize(rule, CREDS, CREDS, do_raise=False)
+
+
+def shared(requests):
+    enforcer = policy.get_enforcer()
+    for _ in range(requests):
+        for rule in CHECKS:
+            enforcer.authorize(rule, CREDS, CREDS, do_raise=False)
+
+
+def cached(requests):
+    for _ in range(requests):
+        with identity_map.scope():
+            for rule in CHECKS:
+                try:
+                    policy.authorize(rule, CREDS, CREDS)
+                except policy.policy.PolicyNotAuthorized:
+                    pass
+
+
+def run(name, func, requests, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(requests)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    print('%-10s %8.3fs  %8.2fus/request' % (name, best,
+                                             best * 1e6 / requests))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    CONF([], project='esi-leap')
+    CONF.set_override('auth_enable', True, group='pecan')
+    policy.init()
+
+    print('%d requests of %d checks, best of %d' % (
+        args.requests, len(CHECKS), args.repeat))
+    slow = run('reparse', reparse, args.requests, args.repeat)
+    run('shared', shared, args.requests, args.repeat)
+    fast = run('cached', cached, args.requests, args.repeat)
+    print('speedup    %8.1fx' % (slow / fast))
+
+
+if __name__ == '__main__':
+    main()